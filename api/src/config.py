@@ -20,6 +20,7 @@ class Settings(BaseSettings):
     supabase_url: str = Field(validation_alias=AliasChoices("SUPABASE_URL"))
     supabase_key: str = Field(validation_alias=AliasChoices("SUPABASE_KEY"))
     postgresql_database_url: Optional[str] = Field(None, validation_alias=AliasChoices("POSTGRESQL_DATABASE_URL"))
+    postgresql_replica_url: Optional[str] = Field(None, validation_alias=AliasChoices("POSTGRESQL_REPLICA_URL"))
     postgresql_username: Optional[str] = Field(None, validation_alias=AliasChoices("POSTGRESQL_USERNAME"))
     postgresql_password: Optional[str] = Field(None, validation_alias=AliasChoices("POSTGRESQL_PASSWORD"))
     postgresql_host: Optional[str] = Field(None, validation_alias=AliasChoices("POSTGRESQL_HOST"))
@@ -45,6 +46,80 @@ class Settings(BaseSettings):
     recall_api_key: str | None = None
     telegram_bot_token: Optional[str] = Field(None, validation_alias=AliasChoices("TELEGRAM_BOT_TOKEN"))
 
+    # Bearer token for /metrics; unset = only scrapes from localhost are answered
+    metrics_token: Optional[str] = Field(None, validation_alias=AliasChoices("METRICS_TOKEN"))
+
+    # GitHub token validation cache (routers/auth.get_current_user)
+    auth_token_cache_ttl: float = 300.0
+    auth_token_negative_ttl: float = 30.0
+    auth_token_cache_size: int = 10_000
+
+    # GitHub webhook queue (public.webhook_events)
+    # Events handled at the same time; one repository's events always run one by one
+    webhook_workers: int = 4
+    webhook_max_attempts: int = 5
+    webhook_retry_base_seconds: float = 5.0
+    webhook_retry_max_seconds: float = 600.0
+    webhook_poll_interval_seconds: float = 2.0
+    # A `processing` row older than this is assumed abandoned and claimed again
+    webhook_visibility_timeout_seconds: float = 900.0
+    # Deliveries are deduplicated on X-GitHub-Delivery for this long
+    webhook_dedup_ttl_hours: int = 72
+    webhook_dedup_cache_size: int = 10_000
+    # pull_request.synchronize events for one PR inside this window collapse into one run
+    pr_synchronize_debounce_seconds: float = 30.0
+
+    # Conditional-request (ETag) cache for GitHub REST reads
+    github_cache_max_bytes: int = 32 * 1024 * 1024
+    # Optional on-disk copy so a restart revalidates instead of re-downloading
+    github_cache_dir: Optional[str] = None
+    github_cache_disk_max_bytes: int = 256 * 1024 * 1024
+
+    # Threads for blocking work (PyGithub, psycopg2) called from async code
+    blocking_executor_workers: int = 8
+    # Log when the event loop falls this far behind schedule
+    loop_lag_warn_seconds: float = 0.1
+    loop_lag_interval_seconds: float = 0.5
+
+    # Gemini gateway (services/llm_gateway.py)
+    llm_max_concurrency: int = 4
+    llm_requests_per_minute: float = 60.0
+    llm_burst: int = 10
+    llm_max_attempts: int = 3
+    llm_retry_base_seconds: float = 1.0
+    llm_retry_max_seconds: float = 20.0
+
+    # PR evaluation results (public.pr_evaluation_cache)
+    pr_eval_cache_ttl_hours: int = 168
+    pr_eval_cache_max_entries: int = 5000
+    # Prepared diffs above this many characters are reviewed in concurrent per-file chunks
+    pr_eval_chunk_chars: int = 60_000
+    pr_eval_max_chunks: int = 8
+
+    # Largest accepted request body / meeting recording upload
+    meeting_upload_max_bytes: int = 1024 * 1024 * 1024
+    # Recall recordings are streamed to a temp file (services/media_download.py)
+    recording_download_concurrency: int = 2
+    recording_download_max_attempts: int = 5
+    # Longest gap between received chunks, not a limit on the whole download
+    recording_download_read_timeout: float = 60.0
+    # Recordings are reduced to mono 16 kHz Opus speech before upload (needs ffmpeg)
+    audio_preprocess_enabled: bool = True
+    audio_preprocess_workers: int = 2
+    audio_preprocess_timeout_seconds: float = 600.0
+    audio_bitrate_kbps: int = 24
+    audio_trim_silence: bool = False
+    # Extracted audio, keyed by the recording's content hash; unset = system temp dir
+    audio_cache_dir: Optional[str] = None
+    audio_cache_max_bytes: int = 2 * 1024 * 1024 * 1024
+    # Longer recordings are analyzed as overlapping segments, concurrently, then merged
+    meeting_segment_seconds: float = 900.0
+    meeting_segment_overlap_seconds: float = 60.0
+    meeting_segment_concurrency: int = 4
+    # Analyses waiting to be polled (public.meeting_analysis_results)
+    analysis_result_ttl_hours: int = 24
+    analysis_result_max_per_user: int = 20
+
     # PostgreSQL
     postgresql_host: str = "localhost"
     postgresql_port: int = 5432
@@ -55,6 +130,20 @@ class Settings(BaseSettings):
     ] = ""
     postgresql_database: str = "postgres"
 
+    # Connection pools (shared by the psycopg2 and asyncio pools)
+    db_pool_min_size: int = 1
+    db_pool_max_size: int = 10
+    db_pool_timeout: float = 10.0
+    db_pool_max_waiting: int = 100
+    # Debug: warn about connections held longer than this (ms) or never returned
+    db_leak_detection_ms: Optional[int] = None
+    # Prepare hot statements server-side; unset = on, except behind the
+    # transaction-mode pooler (port 6543) which cannot keep them
+    db_prepared_statements: Optional[bool] = None
+    # After a write, the same client reads from the primary for this long
+    # (only relevant when POSTGRESQL_REPLICA_URL is set)
+    db_read_your_writes_seconds: float = 5.0
+
     _env_file = _REPO_ROOT / ".env.local"
     model_config = SettingsConfigDict(
         env_file=str(_env_file) if _env_file.exists() else None,
@@ -2,14 +2,11 @@ import hashlib
 import hmac
 from github import Auth, Github, GithubIntegration
 from config import settings
+from services.github_tokens import app_jwt, installation_token_sync
 
 
 def get_github_integration() -> GithubIntegration:
-    auth = Auth.AppAuth(
-        app_id=settings.gh_app_id,
-        private_key=settings.gh_app_private_key,
-    )
-    return GithubIntegration(auth=auth)
+    return GithubIntegration(auth=Auth.AppAuthToken(app_jwt()))
 
 
 def get_github_client(installation_id: int | None = None) -> Github:
@@ -17,9 +14,7 @@ def get_github_client(installation_id: int | None = None) -> Github:
     if iid is None:
         raise ValueError("No installation_id provided and GITHUB_APP_INSTALLATION_ID is not set.")
     
-    gi = get_github_integration()
-    installation = gi.get_installation(iid)
-    return installation.get_github_for_installation()
+    return Github(auth=Auth.Token(installation_token_sync(iid)))
 
 
 def verify_webhook_signature(payload: bytes, signature_header: str | None) -> bool:
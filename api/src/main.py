@@ -1,5 +1,6 @@
 import sys
 import asyncio
+import secrets
 from contextlib import asynccontextmanager
 from pathlib import Path
 from routers import auth, github, meetings, tasks, telegram
@@ -7,9 +8,19 @@ from routers import auth, github, meetings, tasks, telegram
 sys.path.insert(0, str(Path(__file__).parent))
 
 import uvicorn
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from services.database.database import router as db_router, create_pool, close_pool
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from services.database.database import router as db_router, create_pool, close_pool, create_async_pool, close_async_pool, apply_schemas
+from services.database.pool_monitor import RequestScopeMiddleware
+from services.database.read_routing import ReadYourWritesMiddleware
+from services.http_clients import open_http_clients, close_http_clients
+from services.audio_preprocess import shutdown_audio_pool
+from services.executors import LoopLagMonitor, shutdown_executor
+from services.uploads import RequestSizeLimitMiddleware
+from services.webhook_handlers import process_github_event
+from services.webhook_queue import WebhookWorkerPool
+from config import settings
 from services.database import users as _db_users
 from services.database import projects as _db_projects
 from services.database import buckets as _db_buckets
@@ -20,17 +31,33 @@ from services.database import activities as _db_activities
 from services.database import meetings as _db_meetings
 
 if sys.platform == 'win32':
-    asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
+    # psycopg's async connections cannot run on the Proactor loop.
+    asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Create the DB pool on startup and close it on shutdown."""
+    """Create the DB pools, outbound HTTP clients and webhook workers on startup and stop them on shutdown."""
+    loop_lag = LoopLagMonitor(settings.loop_lag_interval_seconds, settings.loop_lag_warn_seconds)
+    loop_lag.start()
     create_pool()
+    apply_schemas()
+    await create_async_pool()
+    await open_http_clients()
+    webhook_workers = WebhookWorkerPool(process_github_event, settings.webhook_workers)
+    webhook_workers.start()
     yield
+    await webhook_workers.stop()
+    shutdown_executor()
+    shutdown_audio_pool()
+    await close_http_clients()
+    await close_async_pool()
     close_pool()
+    await loop_lag.stop()
 
 app = FastAPI(title="Lunaris API", version="0.1.0", lifespan=lifespan)
 
+# Inside CORS, so a 413 still carries the CORS headers the browser needs to read it
+app.add_middleware(RequestSizeLimitMiddleware, max_bytes=settings.meeting_upload_max_bytes)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:5173", "http://localhost:8000"],
@@ -38,11 +65,29 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(ReadYourWritesMiddleware)
+app.add_middleware(RequestScopeMiddleware)
 
 @app.get("/")
 def read_root():
     return {"Message": "FastAPI is running!"}
 
+_LOOPBACK = {"127.0.0.1", "::1", "localhost"}
+
+def require_metrics_access(request: Request):
+    """With METRICS_TOKEN set, scrapers must send it as a bearer token; otherwise only loopback clients are served."""
+    if settings.metrics_token:
+        supplied = request.headers.get("authorization", "").removeprefix("Bearer ").strip()
+        if not secrets.compare_digest(supplied.encode(), settings.metrics_token.encode()):
+            raise HTTPException(status_code=401, detail="Invalid metrics token")
+    elif request.client is None or request.client.host not in _LOOPBACK:
+        raise HTTPException(status_code=403, detail="Metrics are only served to local clients")
+
+@app.get("/metrics", include_in_schema=False, dependencies=[Depends(require_metrics_access)])
+def metrics():
+    """Internal Prometheus scrape endpoint (pool saturation, caches, queues)."""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
 app.include_router(auth.router)
 app.include_router(github.router)
 app.include_router(db_router)
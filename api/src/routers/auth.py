@@ -1,7 +1,6 @@
 import secrets
 from urllib.parse import urlencode
 
-import httpx
 from fastapi import APIRouter, Request, HTTPException, Depends
 from fastapi.responses import JSONResponse, RedirectResponse
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
@@ -10,6 +9,8 @@ from pydantic import BaseModel
 from config import settings
 from services.database.users import DatabaseUser, get_or_create_user
 from services.database.database import SafeId
+from services.token_cache import InvalidToken, github_token_cache
+from services.http_clients import http_client
 from starlette.concurrency import run_in_threadpool
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
@@ -30,11 +31,7 @@ class AuthMeResponse(BaseModel):
     public_repos: int | None = None
     followers: int | None = None
     db_user: DatabaseUser | None = None
-    
-http_client = httpx.AsyncClient(
-    timeout=httpx.Timeout(15.0, connect=5.0), 
-    limits=httpx.Limits(max_connections=100)
-)
+
 
 async def get_current_user(
     request: Request,
@@ -45,6 +42,7 @@ async def get_current_user(
       1. Authorization: Bearer <token> header  (API / mobile clients)
       2. gh_token HTTP-only cookie             (browser clients)
     Raises 401 if no token is present or the token is rejected by GitHub.
+    Resolved profiles are cached per token (see `services.token_cache`).
     """
     token: str | None = None
 
@@ -56,16 +54,25 @@ async def get_current_user(
     if not token:
         raise HTTPException(status_code=401, detail="Not authenticated")
 
-    async with httpx.AsyncClient() as http:
-        resp = await http.get(
-            "https://api.github.com/user",
-            headers={
-                "Authorization": f"Bearer {token}",
-                "Accept": "application/vnd.github+json",
-            },
-            timeout=10,
-        )
+    try:
+        return await github_token_cache.get(token, _fetch_github_user)
+    except InvalidToken:
+        raise HTTPException(status_code=401, detail="Invalid or expired access token")
+
+
+async def _fetch_github_user(token: str) -> dict:
+    resp = await http_client("github").get(
+        "https://api.github.com/user",
+        headers={
+            "Authorization": f"Bearer {token}",
+            "Accept": "application/vnd.github+json",
+        },
+        timeout=10,
+    )
+    if resp.status_code == 401:
+        raise InvalidToken()
     if resp.status_code != 200:
+        # Rate limits and GitHub outages are not cached; the next request retries
         raise HTTPException(status_code=401, detail="Invalid or expired access token")
     return resp.json()
 
@@ -116,18 +123,17 @@ async def auth_callback(code: str, state: str):
 
 
     # Exchange authorization code for access token
-    async with httpx.AsyncClient() as http:
-        token_resp = await http.post(
-            "https://github.com/login/oauth/access_token",
-            json={
-                "client_id": client_id,
-                "client_secret": client_secret,
-                "code": code,
-                "redirect_uri": redirect_uri,
-            },
-            headers={"Accept": "application/json"},
-            timeout=10,
-        )
+    token_resp = await http_client("github").post(
+        "https://github.com/login/oauth/access_token",
+        json={
+            "client_id": client_id,
+            "client_secret": client_secret,
+            "code": code,
+            "redirect_uri": redirect_uri,
+        },
+        headers={"Accept": "application/json"},
+        timeout=10,
+    )
 
     if token_resp.status_code != 200:
         raise HTTPException(status_code=502, detail="GitHub token exchange failed")
@@ -142,15 +148,14 @@ async def auth_callback(code: str, state: str):
     access_token = token_data["access_token"]
 
     # Fetch the authenticated user's profile
-    async with httpx.AsyncClient() as http:
-        user_resp = await http.get(
-            "https://api.github.com/user",
-            headers={
-                "Authorization": f"Bearer {access_token}",
-                "Accept": "application/vnd.github+json",
-            },
-            timeout=10,
-        )
+    user_resp = await http_client("github").get(
+        "https://api.github.com/user",
+        headers={
+            "Authorization": f"Bearer {access_token}",
+            "Accept": "application/vnd.github+json",
+        },
+        timeout=10,
+    )
 
     user = user_resp.json() if user_resp.status_code == 200 else {}
     
@@ -217,11 +222,14 @@ async def sync_logged_in_user(current_user: dict = Depends(get_current_user)):
     )
 
 @router.post("/logout")
-async def auth_logout():
+async def auth_logout(request: Request):
     """
     Clear the auth cookie, effectively signing the user out.
     The frontend redirects to the login page after calling this endpoint.
     """
+    token = request.cookies.get(AUTH_COOKIE)
+    if token:
+        github_token_cache.invalidate(token)
     response = JSONResponse({"logged_out": True})
     response.delete_cookie(key=AUTH_COOKIE, httponly=True, samesite="lax")
     return response
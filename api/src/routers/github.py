@@ -1,11 +1,12 @@
 import json
-import httpx
 import logging
-from fastapi import APIRouter, Request, HTTPException, Header, BackgroundTasks, Depends
+from fastapi import APIRouter, Request, HTTPException, Header, Depends
 from routers.auth import get_current_user
 from github_app import get_github_client, get_github_integration, verify_webhook_signature
 from services.pr_evaluator import process_pr_evaluation
 from services.webhook_handlers import handle_pr_closed, handle_pr_opened
+from services.http_clients import http_client
+from services.webhook_queue import HANDLED_EVENTS, enqueue_webhook_event
 
 router = APIRouter(tags=["GitHub App"])
 logger = logging.getLogger("uvicorn.error")
@@ -60,22 +61,24 @@ async def verify_signature(
         logger.error("Invalid JSON payload received.")
         raise HTTPException(status_code=400, detail="Invalid JSON payload")
 
-@router.post("/github/webhook")
+@router.post("/github/webhook", status_code=202)
 async def github_webhook(
-    request: Request,
-    background_tasks: BackgroundTasks,
     payload: dict = Depends(verify_signature),
     x_github_event: str | None = Header(default=None),
+    x_github_delivery: str | None = Header(default=None),
 ):
     """
     Receive and verify GitHub webhook payloads.
-    Only processes events whose signature matches the webhook secret.
+    Only events whose signature matches the webhook secret are queued; the
+    queue workers (services.webhook_queue) run them after we reply 202.
     """
     event = x_github_event or "unknown"
-    
-    from services.webhook_handlers import process_github_event
-    background_tasks.add_task(process_github_event, payload, event)
-    
+    if event not in HANDLED_EVENTS:
+        return {"status": "ignored"}
+
+    event_id = await enqueue_webhook_event(event, payload, x_github_delivery)
+    if event_id is None:
+        return {"status": "duplicate"}
     return {"status": "accepted"}
 
 @router.get("/github/users/search")
@@ -85,12 +88,12 @@ async def search_github_users(query: str, current_user: dict = Depends(get_curre
     if len(normalized_query) < 2:
         return {"items": []}
 
-    async with httpx.AsyncClient(timeout=10.0) as http:
-        response = await http.get(
-            "https://api.github.com/search/users",
-            params={"q": f"{normalized_query} in:login", "per_page": 8},
-            headers={"Accept": "application/vnd.github+json"},
-        )
+    response = await http_client("github").get(
+        "https://api.github.com/search/users",
+        params={"q": f"{normalized_query} in:login", "per_page": 8},
+        headers={"Accept": "application/vnd.github+json"},
+        timeout=10.0,
+    )
 
     if response.status_code != 200:
         raise HTTPException(status_code=502, detail="Failed to query GitHub usernames")
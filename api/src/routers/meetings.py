@@ -1,21 +1,30 @@
 import asyncio
 import json
+import os
 import secrets
+import tempfile
+from contextlib import ExitStack
 import re
-from typing import List, Optional
+from typing import BinaryIO, List, Optional
 import fastapi
 from fastapi import APIRouter, HTTPException, UploadFile, File, Request, BackgroundTasks, Depends
-import httpx
 import psycopg2
-import psycopg2.extras
+import psycopg2.errors
 from pydantic import BaseModel
-from google import genai
 from google.genai import types
 
 from config import settings
 from routers.auth import get_current_user
-from services.database.database import _get_conn, _put_conn
+from services.database.database import db_cursor
 from services.database.id_generator import _generator
+from services.http_clients import http_client
+from services.llm_gateway import Priority, llm_gateway
+from services.gemini_files import delete_media, media_part, upload_media
+from services.media_download import download_recording
+from services.audio_preprocess import AUDIO_MIME_TYPE, speech_audio, split_audio
+from services.meeting_analysis import merge_analyses
+from services.analysis_results import pop_result, push_result
+from services.uploads import spooled_size
 
 from services.database.alerts import DatabaseAlert, db_create_alert
 
@@ -45,8 +54,6 @@ async def _create_draft_approval_alert(user_uuid: str, project_id: int, meeting_
         print(f"Failed to create alert: {e}")
         return -1
 
-TEMP_ANALYSIS_RESULTS = {}  # Temporary in-memory storage for results
-
 
 # ==========================================
 # MODELS
@@ -91,7 +98,6 @@ async def create_meeting_record(meeting: dict):
 # KONFIGURASI AI
 # ==========================================
 MODEL_ID = "gemini-2.5-flash"
-client = genai.Client(api_key=settings.gemini_api_key)
 
 GEMINI_SYSTEM_PROMPT = """
 Role: Expert Project Manager dan AI Transcriber.
@@ -220,10 +226,9 @@ async def get_meetings(project_id: int, current_user: dict = Depends(get_current
 @router.get("/meetings/poll-analysis")
 async def poll_analysis_results(current_user: dict = Depends(get_current_user)):
     user_uuid = str(current_user.get("id"))
-    results = TEMP_ANALYSIS_RESULTS.get(user_uuid, [])
-    if results:
-         # Return and clear the result for this user
-         payload = results.pop(0)
+    # Return and clear the newest result for this user, whichever worker produced it
+    payload = await pop_result(user_uuid)
+    if payload is not None:
          return payload
     return {"status": "pending"}
 
@@ -247,6 +252,73 @@ async def create_meeting(request: MeetingSyncRequest, current_user: dict = Depen
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+async def _analyze_upload(stream: BinaryIO, mime_type: str, display_name: Optional[str], caller: str, priority: Priority, temperature: float, note: Optional[str] = None) -> dict:
+    uploaded = await upload_media(stream, mime_type, display_name=display_name)
+    try:
+        response = await llm_gateway.generate_content(
+            caller,
+            model=MODEL_ID,
+            contents=[GEMINI_SYSTEM_PROMPT, *([note] if note else []), media_part(uploaded)],
+            config=types.GenerateContentConfig(
+                response_mime_type="application/json",
+                temperature=temperature
+            ),
+            priority=priority,
+        )
+    finally:
+        await delete_media(uploaded)
+    return await _parse_gemini_response(response)
+
+async def _analyze_segments(segments: list[tuple[float, float, str]], display_name: Optional[str], caller: str, priority: Priority, temperature: float) -> dict:
+    """Analyze overlapping audio segments concurrently, then merge them into one result."""
+    slots = asyncio.Semaphore(settings.meeting_segment_concurrency)
+    total = len(segments)
+
+    async def analyze(i: int, start: float, end: float, audio: BinaryIO) -> Optional[dict]:
+        note = (
+            f"Ini adalah bagian {i} dari {total} rekaman meeting yang lebih panjang (menit {start / 60:.0f}-{end / 60:.0f}). "
+            f"Bagian yang berdekatan tumpang tindih sekitar {settings.meeting_segment_overlap_seconds:.0f} detik. "
+            "Analisis hanya isi bagian ini; judul_meeting tetap untuk keseluruhan meeting."
+        )
+        async with slots:
+            try:
+                return await _analyze_upload(audio, AUDIO_MIME_TYPE, f"{display_name} ({i}/{total})", caller, priority, temperature, note)
+            except Exception as exc:
+                print(f"Gemini analysis of part {i}/{total} failed: {exc}")
+                return None
+
+    print(f"🧩 Menganalisis rekaman dalam {total} bagian secara paralel...")
+    with ExitStack() as stack:
+        # Opened up front: a segment still waiting for a slot stays readable even if the cache prunes it
+        files = [stack.enter_context(open(path, "rb")) for _, _, path in segments]
+        results = await asyncio.gather(*(
+            analyze(i, start, end, audio) for i, ((start, end, _), audio) in enumerate(zip(segments, files), 1)
+        ))
+    merged = merge_analyses(list(results))
+    if merged is None:
+        raise RuntimeError(f"None of the {total} parts of the recording could be analyzed")
+    return merged
+
+async def _analyze_recording(stream: BinaryIO, mime_type: str, display_name: Optional[str], caller: str, priority: Priority, temperature: float, path: Optional[str] = None) -> dict:
+    """
+    Analyze a meeting recording. Only its speech track is uploaded when ffmpeg
+    can extract it, and long meetings are analyzed as overlapping segments
+    so wall-clock time depends on the concurrency limit, not the length.
+    """
+    audio_path = await speech_audio(path or stream)
+    segments = await split_audio(audio_path) if audio_path else []
+    if len(segments) > 1:
+        return await _analyze_segments(segments, display_name, caller, priority, temperature)
+    if audio_path is not None:
+        try:
+            with open(audio_path, "rb") as audio:
+                return await _analyze_upload(audio, AUDIO_MIME_TYPE, display_name, caller, priority, temperature)
+        except FileNotFoundError:
+            # Evicted from the audio cache in the meantime
+            pass
+    stream.seek(0)
+    return await _analyze_upload(stream, mime_type, display_name, caller, priority, temperature)
+
 @router.post("/analyze-meeting", tags=["AI"])
 async def analyze_meeting_endpoint(
     project_id: int = fastapi.Form(...),
@@ -259,35 +331,23 @@ async def analyze_meeting_endpoint(
     if not project_id:
         raise HTTPException(status_code=400, detail="project_id form field is required.")
 
-    try:
-        input_bytes = await file.read()
-        mime_type = file.content_type
+    # Starlette has already spooled the upload to a temp file; check its size without reading it
+    spooled_size(file, settings.meeting_upload_max_bytes)
 
+    try:
         try:
-            # For audio/video, it's safer to use the File API if file is large, 
-            # but for now let's at least switch to async call
-            response = await client.aio.models.generate_content(
-                model=MODEL_ID,
-                contents=[
-                    GEMINI_SYSTEM_PROMPT,
-                    types.Part.from_bytes(data=input_bytes, mime_type=mime_type)
-                ],
-                config=types.GenerateContentConfig(
-                    response_mime_type="application/json",
-                    temperature=0.2
-                )
+            # Streamed from the spooled file through the resumable File API,
+            # so the recording is never held in memory
+            analysis_result = await _analyze_recording(
+                file.file, file.content_type, file.filename, "meeting_upload", Priority.INTERACTIVE, 0.2
             )
+        except ValueError as exc:
+            print(f"Gemini JSON parse failed: {exc}")
+            return _fallback_analysis_payload("invalid-json")
         except Exception as exc:
             print(f"Gemini request failed: {exc}")
-            # If it's a connection error, it might be due to size.
             return _fallback_analysis_payload(f"api-error: {str(exc)[:50]}")
 
-        try:
-            analysis_result = await _parse_gemini_response(response)
-        except Exception as exc:
-            print(f"Gemini JSON parse failed: {exc}")
-            return _fallback_analysis_payload("invalid-json")
-
         mom_data = analysis_result.get("mom", {})
         title = mom_data.get("judul_meeting") or "Meeting Tanpa Judul"
         proposed_tasks = _build_proposed_tasks(analysis_result.get("action_items", []))
@@ -372,9 +432,8 @@ async def invite_meeting_bot(
         "Content-Type": "application/json"
     }
     
-    async with httpx.AsyncClient() as client_http:
-        url = "https://ap-northeast-1.recall.ai/api/v1/bot/"
-        response = await client_http.post(url, json=payload, headers=headers)
+    url = "https://ap-northeast-1.recall.ai/api/v1/bot/"
+    response = await http_client("recall").post(url, json=payload, headers=headers)
         
     if response.status_code != 201:
         error_detail = response.text
@@ -394,46 +453,42 @@ async def process_video_in_background(bot_id: str, user_uuid: str, project_id: i
     }
     
     try:
-        async with httpx.AsyncClient() as client_http:
-            api_url = f"https://ap-northeast-1.recall.ai/api/v1/bot/{bot_id}"
-            bot_res = await client_http.get(api_url, headers=headers)
-            
-            if bot_res.status_code != 200:
-                print(f"❌ [BACKGROUND] Gagal mengambil data bot: {bot_res.text}")
-                return
-            
-            bot_detail = bot_res.json()
-            video_url = None
-            recordings = bot_detail.get("recordings", [])
-            
-            if recordings:
-                media = recordings[0].get("media_shortcuts", {})
-                video_mixed = media.get("video_mixed", {})
-                if video_mixed and video_mixed.get("data"):
-                    video_url = video_mixed["data"].get("download_url")
-            
-            if not video_url:
-                print("⚠️ [BACKGROUND] Video URL kosong di data bot.")
-                return
-                
-            print(f"🎥 [BACKGROUND] Video URL ditemukan! Mendownload...")
-            video_res = await client_http.get(video_url, timeout=120.0)
-            
-        print("🤖 [BACKGROUND] Video didownload, mengirim ke Gemini...")
+        client_http = http_client("recall")
+        api_url = f"https://ap-northeast-1.recall.ai/api/v1/bot/{bot_id}"
+        bot_res = await client_http.get(api_url, headers=headers)
         
-        response = await client.aio.models.generate_content(
-            model=MODEL_ID,
-            contents=[
-                GEMINI_SYSTEM_PROMPT,
-                types.Part.from_bytes(data=video_res.content, mime_type="video/mp4")
-            ],
-            config=types.GenerateContentConfig(
-                response_mime_type="application/json",
-                temperature=0.1
-            )
-        )
+        if bot_res.status_code != 200:
+            print(f"❌ [BACKGROUND] Gagal mengambil data bot: {bot_res.text}")
+            return
         
-        analysis_result = await _parse_gemini_response(response)
+        bot_detail = bot_res.json()
+        video_url = None
+        recordings = bot_detail.get("recordings", [])
+        
+        if recordings:
+            media = recordings[0].get("media_shortcuts", {})
+            video_mixed = media.get("video_mixed", {})
+            if video_mixed and video_mixed.get("data"):
+                video_url = video_mixed["data"].get("download_url")
+        
+        if not video_url:
+            print("⚠️ [BACKGROUND] Video URL kosong di data bot.")
+            return
+            
+        print(f"🎥 [BACKGROUND] Video URL ditemukan! Mendownload...")
+        # Streamed to disk and on to the File API, so long meetings never sit in memory.
+        # Closed before ffmpeg opens it by path: Windows refuses a second open of a delete-on-close file
+        video_file = tempfile.NamedTemporaryFile(suffix=".mp4", delete=False)
+        try:
+            with video_file:
+                size = await download_recording(video_url, video_file)
+            print(f"🤖 [BACKGROUND] Video didownload ({size // (1024 * 1024)} MB), mengirim ke Gemini...")
+            with open(video_file.name, "rb") as video:
+                analysis_result = await _analyze_recording(
+                    video, "video/mp4", f"recall-{bot_id}", "meeting_recording", Priority.BACKGROUND, 0.1, path=video_file.name
+                )
+        finally:
+            os.unlink(video_file.name)
         print("✅ [BACKGROUND] ANALISIS SELESAI!")
         
         # Prepare proposed tasks
@@ -460,10 +515,8 @@ async def process_video_in_background(bot_id: str, user_uuid: str, project_id: i
         
        
         
-        # Store in-memory for now
-        if user_uuid not in TEMP_ANALYSIS_RESULTS:
-            TEMP_ANALYSIS_RESULTS[user_uuid] = []
-        TEMP_ANALYSIS_RESULTS[user_uuid].insert(0, full_payload)
+        # Queued in Postgres so a poll on any worker picks it up
+        await push_result(user_uuid, full_payload)
         
         print("💾 [BACKGROUND] Menyiapkan payload untuk DB Postgres...")
         
@@ -540,68 +593,55 @@ def confirm_meeting_tasks(
     if not body.tasks:
         raise HTTPException(status_code=400, detail="No tasks provided")
 
-    conn = _get_conn()
-    cur = None
     try:
-        cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-
-        # 1. Batch-insert tasks
-        for task in body.tasks:
-            task_id = _generator.generate()
-            mapping = {
-                "id": task_id,
-                "project_id": task.project_id,
-                "bucket_id": task.bucket_id,
-                "title": task.title,
-                "description": task.description,
-                "type": task.type or "OTHER",
-                "weight": task.weight if task.weight is not None else 3,
-            }
-            columns = [k for k, v in mapping.items() if v is not None]
-            placeholders = ["%s"] * len(columns)
-            params = [mapping[k] for k in columns]
-
-            sql = (
-                f"INSERT INTO public.tasks ({', '.join(columns)}) "
-                f"VALUES ({', '.join(placeholders)});"
-            )
-            cur.execute(sql, params)
+        with db_cursor(commit=True) as cur:
+            # 1. Batch-insert tasks
+            for task in body.tasks:
+                task_id = _generator.generate()
+                mapping = {
+                    "id": task_id,
+                    "project_id": task.project_id,
+                    "bucket_id": task.bucket_id,
+                    "title": task.title,
+                    "description": task.description,
+                    "type": task.type or "OTHER",
+                    "weight": task.weight if task.weight is not None else 3,
+                }
+                columns = [k for k, v in mapping.items() if v is not None]
+                placeholders = ["%s"] * len(columns)
+                params = [mapping[k] for k in columns]
+
+                sql = (
+                    f"INSERT INTO public.tasks ({', '.join(columns)}) "
+                    f"VALUES ({', '.join(placeholders)});"
+                )
+                cur.execute(sql, params)
 
-        # 2. Resolve the alert
-        cur.execute(
-            "UPDATE public.alerts SET is_resolved = true, updated_at = NOW() "
-            "WHERE id = %s;",
-            (body.alert_id,),
-        )
+            # 2. Resolve the alert
+            cur.execute(
+                "UPDATE public.alerts SET is_resolved = true, updated_at = NOW() "
+                "WHERE id = %s;",
+                (body.alert_id,),
+            )
 
-        conn.commit()
         return {"status": "success", "inserted": len(body.tasks)}
 
     except psycopg2.errors.ForeignKeyViolation as e:
-        conn.rollback()
         raise HTTPException(
             status_code=422,
             detail=f"Constraint violation (foreign key): {e.pgerror or str(e)}",
         )
     except psycopg2.errors.UniqueViolation as e:
-        conn.rollback()
         raise HTTPException(
             status_code=422,
             detail=f"Constraint violation (unique): {e.pgerror or str(e)}",
         )
     except psycopg2.IntegrityError as e:
-        conn.rollback()
         raise HTTPException(
             status_code=422,
             detail=f"Integrity error: {e.pgerror or str(e)}",
         )
     except HTTPException:
-        conn.rollback()
         raise
     except Exception as e:
-        conn.rollback()
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        if cur is not None:
-            cur.close()
-        _put_conn(conn)
\ No newline at end of file
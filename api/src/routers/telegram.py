@@ -1,11 +1,11 @@
 from fastapi import APIRouter, Request, HTTPException
-import httpx
 
 # Pastikan import settings kamu sesuai dengan lokasi filenya
 # misal: from app.config import settings
 from config import settings 
 
 from services.telegram_service import send_telegram_message
+from services.http_clients import http_client
 
 router = APIRouter(prefix="/telegram", tags=["Telegram Notification"])
 
@@ -59,28 +59,27 @@ async def get_telegram_chat_id():
         
     url = f"{TELEGRAM_API_URL}/getUpdates"
     
-    async with httpx.AsyncClient() as client:
-        response = await client.get(url)
-        data = response.json()
+    response = await http_client("telegram").get(url)
+    data = response.json()
+    
+    if data.get("ok") and data.get("result"):
+        # Ambil pesan paling terakhir yang masuk ke bot
+        last_message = data["result"][-1]
         
-        if data.get("ok") and data.get("result"):
-            # Ambil pesan paling terakhir yang masuk ke bot
-            last_message = data["result"][-1]
+        if "message" in last_message:
+            chat_id = last_message["message"]["chat"]["id"]
+            username = last_message["message"]["from"].get("username", "Unknown")
+            text = last_message["message"].get("text", "")
+            
+            return {
+                "status": "success",
+                "message": "Pesan terakhir ditemukan!",
+                "telegram_username": username,
+                "chat_id": chat_id,
+                "text_received": text
+            }
             
-            if "message" in last_message:
-                chat_id = last_message["message"]["chat"]["id"]
-                username = last_message["message"]["from"].get("username", "Unknown")
-                text = last_message["message"].get("text", "")
-                
-                return {
-                    "status": "success",
-                    "message": "Pesan terakhir ditemukan!",
-                    "telegram_username": username,
-                    "chat_id": chat_id,
-                    "text_received": text
-                }
-                
-        return {
-            "status": "waiting", 
-            "message": "Belum ada pesan baru. Coba kirim pesan ke Bot Telegram kamu sekarang!"
-        }
\ No newline at end of file
+    return {
+        "status": "waiting", 
+        "message": "Belum ada pesan baru. Coba kirim pesan ke Bot Telegram kamu sekarang!"
+    }
\ No newline at end of file
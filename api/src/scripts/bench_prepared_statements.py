@@ -0,0 +1,73 @@
+import sys
+import os
+import asyncio
+import argparse
+import statistics
+import time
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from config import settings
+from services.database.database import create_async_pool, close_async_pool, async_db_cursor
+from services.database.projects import db_get_project_board_data
+from services.database.tasks import db_get_task_by_id
+
+
+async def _pick_ids():
+    async with async_db_cursor() as cur:
+        await cur.execute("SELECT id, project_id FROM public.tasks ORDER BY id DESC LIMIT 1;")
+        row = await cur.fetchone()
+    if row is None:
+        raise SystemExit("No tasks in the database to benchmark against")
+    return row["id"], row["project_id"]
+
+
+async def _time_endpoint(name, call, iterations):
+    # Warm up so every pooled connection has seen (and prepared) the statements
+    for _ in range(10):
+        await call()
+
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        await call()
+        samples.append((time.perf_counter() - started) * 1000)
+
+    samples.sort()
+    p50 = statistics.median(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(f"  {name:<28} p50 {p50:7.2f} ms | p95 {p95:7.2f} ms | mean {statistics.fmean(samples):7.2f} ms")
+
+
+async def run(prepared: bool, iterations: int, task_id: int, project_id: int):
+    settings.db_prepared_statements = prepared
+    # A single connection keeps the comparison about planning, not pool churn
+    await create_async_pool(min_size=1, max_size=1)
+    try:
+        print(f"prepared statements {'on' if prepared else 'off'}:")
+        await _time_endpoint("GET /tasks/{task_id}", lambda: db_get_task_by_id(task_id), iterations)
+        await _time_endpoint("GET /projects/{id}/board", lambda: db_get_project_board_data(project_id), iterations)
+    finally:
+        await close_async_pool()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Compare endpoint latency with and without server-side prepared statements.")
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args()
+
+    await create_async_pool(min_size=1, max_size=1)
+    try:
+        task_id, project_id = await _pick_ids()
+    finally:
+        await close_async_pool()
+
+    await run(False, args.iterations, task_id, project_id)
+    await run(True, args.iterations, task_id, project_id)
+
+
+if __name__ == "__main__":
+    if sys.platform == "win32":
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    asyncio.run(main())
@@ -0,0 +1,97 @@
+import sys
+import os
+import argparse
+import statistics
+import time
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from services.database.database import create_pool, close_pool, apply_schemas, db_cursor
+from services.database.id_generator import _generator
+from services.spec_snapshot import SpecSnapshot
+from services.webhook_handlers import _INSERT_SPEC_TASKS
+
+
+def _tasks_md(items: int) -> str:
+    return "\n".join(f"- [{'x' if i % 3 == 0 else ' '}] Bench spec task {i}" for i in range(items))
+
+
+def _pick_target():
+    with db_cursor() as cur:
+        cur.execute("SELECT id, project_id FROM public.buckets ORDER BY id DESC LIMIT 1;")
+        row = cur.fetchone()
+    if row is None:
+        raise SystemExit("No buckets in the database to benchmark against")
+    return row["project_id"], row["id"]
+
+
+def per_row(cur, project_id, bucket_id, titles):
+    """The previous implementation: one SELECT and possibly one INSERT per title."""
+    created = 0
+    for title in titles:
+        cur.execute("SELECT id FROM public.tasks WHERE project_id = %s AND title = %s LIMIT 1;", (project_id, title))
+        if cur.fetchone():
+            continue
+        cur.execute(
+            "INSERT INTO public.tasks (id, project_id, bucket_id, lead_assignee_id, title, type, weight) VALUES (%s, %s, %s, %s, %s, 'CODE', 1);",
+            (_generator.generate(), project_id, bucket_id, None, title)
+        )
+        created += 1
+    return created
+
+
+def set_based(cur, project_id, bucket_id, titles):
+    titles = list(dict.fromkeys(titles))
+    task_ids = [_generator.generate() for _ in titles]
+    cur.execute("SELECT pg_advisory_xact_lock(%s);", (project_id,))
+    cur.execute(_INSERT_SPEC_TASKS, (project_id, bucket_id, None, task_ids, titles, project_id))
+    return cur.rowcount
+
+
+def _report(name, samples):
+    samples.sort()
+    p50 = statistics.median(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(f"  {name:<34} p50 {p50:8.2f} ms | p95 {p95:8.2f} ms")
+
+
+def run(name, strategy, project_id, bucket_id, titles, iterations):
+    first_sync, resync = [], []
+    for _ in range(iterations):
+        # Every iteration is rolled back, so the database is left untouched
+        with db_cursor() as cur:
+            started = time.perf_counter()
+            created = strategy(cur, project_id, bucket_id, titles)
+            first_sync.append((time.perf_counter() - started) * 1000)
+
+            started = time.perf_counter()
+            strategy(cur, project_id, bucket_id, titles)
+            resync.append((time.perf_counter() - started) * 1000)
+            cur.connection.rollback()
+    print(f"{name} ({created} tasks created per run):")
+    _report("first sync (all titles new)", first_sync)
+    _report("re-sync (no titles new)", resync)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-row and set-based insertion of spec tasks.")
+    parser.add_argument("--items", type=int, default=500)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    snapshot = SpecSnapshot("bench", {"openspec/changes/bench/tasks.md": _tasks_md(args.items)}, {})
+    titles = snapshot.task_titles()
+
+    create_pool(minconn=1, maxconn=1)
+    apply_schemas()
+    try:
+        project_id, bucket_id = _pick_target()
+        run("per-row SELECT + INSERT", per_row, project_id, bucket_id, titles, args.iterations)
+        run("unnest INSERT ... WHERE NOT EXISTS", set_based, project_id, bucket_id, titles, args.iterations)
+    finally:
+        close_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+import sys
+import os
+import argparse
+import asyncio
+import resource
+import stat
+import subprocess
+import tempfile
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+_CHUNK = 1024 * 1024
+# The resumable File API upload reads the file in chunks of this size
+_UPLOAD_CHUNK = 8 * 1024 * 1024
+_BOUNDARY = "benchboundary"
+
+# Stand-ins for ffmpeg/ffprobe: write a small .ogg to the last argument, report a short duration
+_FAKE_FFMPEG = '#!/bin/sh\nfor last; do :; done\nhead -c 65536 /dev/zero > "$last"\n'
+_FAKE_FFPROBE = "#!/bin/sh\necho 60.0\n"
+_ANALYSIS = '{"mom": {"judul_meeting": "Bench", "ringkasan_eksekutif": "", "poin_diskusi": [], "keputusan_final": []}, "action_items": []}'
+
+
+def _install_fake_ffmpeg(bin_dir: str):
+    for name, script in (("ffmpeg", _FAKE_FFMPEG), ("ffprobe", _FAKE_FFPROBE)):
+        path = os.path.join(bin_dir, name)
+        with open(path, "w") as f:
+            f.write(script)
+        os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC)
+    # Inherited by the spawned preprocessing workers
+    os.environ["PATH"] = bin_dir + os.pathsep + os.environ.get("PATH", "")
+
+
+def _app(mode: str, work_dir: str, max_bytes: int, preprocess: bool):
+    """The real meetings router, with Gemini, auth and the database stubbed out."""
+    from fastapi import FastAPI
+    from types import SimpleNamespace
+
+    from config import settings
+    from routers import meetings
+    from routers.auth import get_current_user
+    from services.uploads import RequestSizeLimitMiddleware
+
+    settings.meeting_upload_max_bytes = max_bytes
+    # The old path sent the recording itself, never an extracted audio track
+    settings.audio_preprocess_enabled = preprocess and mode != "inline"
+    settings.audio_cache_dir = os.path.join(work_dir, "audio-cache")
+
+    async def upload_media(stream, mime_type, display_name=None):
+        if mode == "inline":
+            # What analyze_meeting_endpoint used to do: the whole recording as inline bytes
+            return SimpleNamespace(size=len(stream.read()))
+        size = 0
+        while block := stream.read(_UPLOAD_CHUNK):
+            size += len(block)
+        return SimpleNamespace(size=size)
+
+    async def delete_media(uploaded):
+        pass
+
+    async def generate_content(caller, **kwargs):
+        return SimpleNamespace(text=_ANALYSIS)
+
+    async def create_meeting_record(meeting):
+        return None
+
+    async def create_alert(user_uuid, project_id, meeting_title):
+        return -1
+
+    meetings.upload_media = upload_media
+    meetings.delete_media = delete_media
+    meetings.media_part = lambda uploaded: None
+    meetings.llm_gateway.generate_content = generate_content
+    meetings.create_meeting_record = create_meeting_record
+    meetings._create_draft_approval_alert = create_alert
+
+    app = FastAPI()
+    app.add_middleware(RequestSizeLimitMiddleware, max_bytes=max_bytes)
+    app.include_router(meetings.router)
+    app.dependency_overrides[get_current_user] = lambda: {"id": "bench"}
+    return app
+
+
+async def _multipart(size_mb: int):
+    yield (
+        f"--{_BOUNDARY}\r\nContent-Disposition: form-data; name=\"project_id\"\r\n\r\n1\r\n"
+        f"--{_BOUNDARY}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"meeting.mp4\"\r\n"
+        "Content-Type: video/mp4\r\n\r\n"
+    ).encode()
+    block = os.urandom(_CHUNK)
+    for _ in range(size_mb):
+        yield block
+    yield f"\r\n--{_BOUNDARY}--\r\n".encode()
+
+
+async def _run_once(mode: str, size_mb: int, max_mb: int, preprocess: bool):
+    import httpx
+    from services.audio_preprocess import shutdown_audio_pool
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        _install_fake_ffmpeg(work_dir)
+        transport = httpx.ASGITransport(app=_app(mode, work_dir, max_mb * _CHUNK, preprocess))
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            response = await client.post(
+                "/analyze-meeting",
+                content=_multipart(size_mb),
+                headers={"Content-Type": f"multipart/form-data; boundary={_BOUNDARY}"},
+                timeout=None,
+            )
+        # Reaps the preprocessing workers so RUSAGE_CHILDREN covers them
+        shutdown_audio_pool()
+    # ru_maxrss is in KiB on Linux
+    server_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    workers_mb = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    print(f"{mode},{size_mb},{response.status_code},{server_mb:.0f},{workers_mb:.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Peak RSS of POST /analyze-meeting by recording size, with Gemini and ffmpeg stubbed."
+    )
+    parser.add_argument("--sizes", default="64,256,512", help="Recording sizes in MB")
+    parser.add_argument("--max-mb", type=int, default=1024, help="Upload limit in MB")
+    parser.add_argument("--no-preprocess", action="store_true", help="Skip speech_audio and upload the recording itself")
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "SIZE_MB"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        asyncio.run(_run_once(args.child[0], int(args.child[1]), args.max_mb, not args.no_preprocess))
+        return
+
+    # Each run gets a fresh process, since peak RSS never goes back down
+    print(f"{'mode':<8} {'size MB':>8} {'status':>7} {'server RSS MB':>14} {'worker RSS MB':>14}")
+    for mode in ("inline", "stream"):
+        for size_mb in (int(s) for s in args.sizes.split(",")):
+            command = [sys.executable, __file__, "--max-mb", str(args.max_mb), "--child", mode, str(size_mb)]
+            if args.no_preprocess:
+                command.append("--no-preprocess")
+            out = subprocess.run(command, capture_output=True, text=True, check=True).stdout.strip().splitlines()[-1]
+            _, size, status, server, workers = out.split(",")
+            print(f"{mode:<8} {size:>8} {status:>7} {server:>14} {workers:>14}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,13 @@
 import sys
 import os
-import psycopg2
-import psycopg2.extras
 
 # Add src to path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from services.database.database import _get_conn, _put_conn
+from services.database.database import db_cursor
 
 def check_task_status():
-    conn = _get_conn()
-    cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-    try:
+    with db_cursor() as cur:
         cur.execute("SELECT id, title, bucket_id, lead_assignee_id, branch_name, type FROM public.tasks ORDER BY id DESC LIMIT 10;")
         tasks = cur.fetchall()
         print("Last 10 tasks:")
@@ -23,10 +19,6 @@ def check_task_status():
         print("\nBuckets:")
         for b in buckets:
             print(f"ID: {b['id']} | State: {b['state']} | Name: {b['name']}")
-            
-    finally:
-        cur.close()
-        _put_conn(conn)
 
 if __name__ == "__main__":
     check_task_status()
@@ -0,0 +1,147 @@
+import sys
+import os
+import asyncio
+import json
+import time
+import unittest
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from google import genai
+from google.genai import errors as genai_errors
+from google.genai import types
+
+from services.llm_gateway import LLMGateway, Priority
+
+
+class FakeGeminiServer:
+    """
+    Minimal local stand-in for the generateContent endpoint. Answers after
+    `delay` seconds, fails the first `fail_first` requests with `fail_status`,
+    and records the prompt order and peak concurrency it saw.
+    """
+
+    def __init__(self, delay: float = 0.0, fail_first: int = 0, fail_status: int = 429):
+        self.delay = delay
+        self.fail_first = fail_first
+        self.fail_status = fail_status
+        self.requests = 0
+        self.prompts = []
+        self.active = 0
+        self.peak = 0
+        self._server = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}/"
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        headers = {}
+        await reader.readline()
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode().partition(":")
+            headers[name.strip().lower()] = value.strip()
+        body = json.loads(await reader.readexactly(int(headers.get("content-length", 0))) or b"{}")
+
+        self.requests += 1
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.active -= 1
+
+        if self.requests <= self.fail_first:
+            status = self.fail_status
+            payload = {"error": {"code": status, "message": "fake failure", "status": "UNAVAILABLE"}}
+        else:
+            status = 200
+            self.prompts.append(body["contents"][0]["parts"][0]["text"])
+            payload = {
+                "candidates": [{"content": {"role": "model", "parts": [{"text": "{\"ok\": true}"}]}}],
+                "usageMetadata": {"promptTokenCount": 12, "candidatesTokenCount": 3, "totalTokenCount": 15},
+            }
+        raw = json.dumps(payload).encode()
+        writer.write(
+            f"HTTP/1.1 {status} X\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(raw)}\r\nConnection: close\r\n\r\n".encode() + raw
+        )
+        await writer.drain()
+        writer.close()
+
+
+class TestLLMGateway(unittest.IsolatedAsyncioTestCase):
+    async def _gateway(self, server: FakeGeminiServer, **overrides) -> LLMGateway:
+        await server.start()
+        self.addAsyncCleanup(server.stop)
+        client = genai.Client(api_key="fake-key", http_options=types.HttpOptions(base_url=server.base_url))
+        options = dict(
+            max_concurrency=2,
+            requests_per_minute=0,
+            burst=1,
+            max_attempts=3,
+            retry_base_seconds=0.01,
+            retry_max_seconds=0.05,
+        )
+        options.update(overrides)
+        return LLMGateway(client_factory=lambda: client, **options)
+
+    async def _call(self, gateway: LLMGateway, prompt: str, priority: Priority = Priority.BACKGROUND):
+        return await gateway.generate_content("test", model="fake-model", contents=prompt, priority=priority)
+
+    async def test_concurrency_is_bounded(self):
+        server = FakeGeminiServer(delay=0.05)
+        gateway = await self._gateway(server, max_concurrency=3)
+        responses = await asyncio.gather(*(self._call(gateway, f"p{i}") for i in range(10)))
+        self.assertEqual(len(responses), 10)
+        self.assertLessEqual(server.peak, 3)
+        self.assertEqual(server.requests, 10)
+
+    async def test_transient_errors_are_retried(self):
+        server = FakeGeminiServer(fail_first=2, fail_status=503)
+        gateway = await self._gateway(server)
+        response = await self._call(gateway, "retry me")
+        self.assertEqual(response.text, "{\"ok\": true}")
+        self.assertEqual(server.requests, 3)
+
+    async def test_client_errors_are_not_retried(self):
+        server = FakeGeminiServer(fail_first=1, fail_status=400)
+        gateway = await self._gateway(server)
+        with self.assertRaises(genai_errors.APIError):
+            await self._call(gateway, "bad request")
+        self.assertEqual(server.requests, 1)
+
+    async def test_interactive_calls_jump_the_queue(self):
+        server = FakeGeminiServer(delay=0.05)
+        gateway = await self._gateway(server, max_concurrency=1)
+        first = asyncio.create_task(self._call(gateway, "running"))
+        await asyncio.sleep(0.01)
+        background = [asyncio.create_task(self._call(gateway, f"review-{i}")) for i in range(3)]
+        await asyncio.sleep(0.01)
+        interactive = asyncio.create_task(self._call(gateway, "upload", Priority.INTERACTIVE))
+        await asyncio.gather(first, interactive, *background)
+        self.assertEqual(server.prompts, ["running", "upload", "review-0", "review-1", "review-2"])
+
+    async def test_rate_limit_spaces_out_calls(self):
+        server = FakeGeminiServer()
+        # 20 calls per second, no burst: five calls need at least ~0.2s
+        gateway = await self._gateway(server, max_concurrency=5, requests_per_minute=1200, burst=1)
+        started = time.perf_counter()
+        await asyncio.gather(*(self._call(gateway, f"p{i}") for i in range(5)))
+        self.assertGreaterEqual(time.perf_counter() - started, 0.19)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import sys
+import os
+import unittest
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from services.meeting_analysis import merge_analyses
+
+
+def _part(title="Sprint Planning", summary="", points=(), decisions=(), items=()):
+    return {
+        "mom": {
+            "judul_meeting": title,
+            "ringkasan_eksekutif": summary,
+            "poin_diskusi": list(points),
+            "keputusan_final": list(decisions),
+        },
+        "action_items": list(items),
+    }
+
+
+class MergeAnalysesTest(unittest.TestCase):
+    def test_overlap_duplicates_are_dropped(self):
+        merged = merge_analyses([
+            _part(points=["Discussed the login page redesign", "Budget for Q3"], decisions=["Adopt PostgreSQL"]),
+            _part(points=["Discussed the login-page redesign.", "Hiring plan"], decisions=["Adopt PostgreSQL."]),
+        ])
+        self.assertEqual(merged["mom"]["poin_diskusi"], ["Discussed the login page redesign", "Budget for Q3", "Hiring plan"])
+        self.assertEqual(merged["mom"]["keputusan_final"], ["Adopt PostgreSQL"])
+
+    def test_differing_numbers_are_not_merged(self):
+        merged = merge_analyses([
+            _part(decisions=["Ship v2"], items=[{"task": "Release build 41"}]),
+            _part(decisions=["Ship v3"], items=[{"task": "Release build 42"}]),
+        ])
+        self.assertEqual(merged["mom"]["keputusan_final"], ["Ship v2", "Ship v3"])
+        self.assertEqual([i["task"] for i in merged["action_items"]], ["Release build 41", "Release build 42"])
+
+    def test_duplicate_tasks_fill_in_each_other(self):
+        merged = merge_analyses([
+            _part(items=[{"task": "Fix login bug", "pic": "", "priority": "medium", "due_date": "TBD"}]),
+            _part(items=[
+                {"task": "Fix the login bug", "pic": "Ana", "priority": "high", "due_date": "2026-11-01", "reason": "Blocks QA"},
+                {"task": "Write onboarding docs", "priority": "low"},
+            ]),
+        ])
+        self.assertEqual(merged["action_items"], [
+            {"task": "Fix login bug", "pic": "Ana", "priority": "high", "due_date": "2026-11-01", "reason": "Blocks QA"},
+            {"task": "Write onboarding docs", "priority": "low"},
+        ])
+
+    def test_lower_priority_duplicate_does_not_downgrade(self):
+        merged = merge_analyses([
+            _part(items=[{"task": "Rotate API keys", "priority": "high"}]),
+            _part(items=[{"task": "Rotate the API keys", "priority": "low"}]),
+        ])
+        self.assertEqual(merged["action_items"], [{"task": "Rotate API keys", "priority": "high"}])
+
+    def test_title_is_the_most_common(self):
+        merged = merge_analyses([
+            _part(title="Weekly Sync"),
+            _part(title="Sprint Planning"),
+            _part(title="Sprint Planning"),
+        ])
+        self.assertEqual(merged["mom"]["judul_meeting"], "Sprint Planning")
+
+    def test_failed_segment_is_counted_as_missing(self):
+        merged = merge_analyses([_part(summary="Bagian pertama."), None, _part(summary="Bagian ketiga.")])
+        self.assertEqual(
+            merged["mom"]["ringkasan_eksekutif"],
+            "Bagian pertama. Bagian ketiga. (1 dari 3 bagian rekaman tidak dapat dianalisis.)",
+        )
+
+    def test_nothing_analyzed(self):
+        self.assertIsNone(merge_analyses([None, None]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,18 +2,19 @@ import sys
 import os
 import asyncio
 import unittest
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 # Add src to path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from services.webhook_handlers import sync_github_tasks
+from services.webhook_handlers import _INSERT_SPEC_TASKS, _UPSERT_SPEC_DIGEST, sync_github_tasks
+from services.spec_snapshot import SpecSnapshot
 
 class TestWebhookSync(unittest.IsolatedAsyncioTestCase):
-    @patch("services.webhook_handlers.get_github_client")
-    @patch("services.webhook_handlers._get_conn")
-    @patch("services.webhook_handlers._put_conn")
-    async def test_sync_github_tasks(self, mock_put_conn, mock_get_conn, mock_get_github_client):
+    @patch("services.webhook_handlers.load_spec_snapshot", new_callable=AsyncMock)
+    @patch("services.webhook_handlers.installation_token", new_callable=AsyncMock)
+    @patch("services.webhook_handlers.db_cursor")
+    async def test_sync_github_tasks(self, mock_db_cursor, mock_installation_token, mock_load_spec_snapshot):
         # Mock payload
         payload = {
             "repository": {
@@ -23,46 +24,28 @@ class TestWebhookSync(unittest.IsolatedAsyncioTestCase):
             "installation": {"id": 12345}
         }
 
-        # Mock Github Client
-        mock_gh = MagicMock()
-        mock_get_github_client.return_value = mock_gh
-        mock_repo = MagicMock()
-        mock_gh.get_repo.return_value = mock_repo
+        mock_installation_token.return_value = "test-token"
 
-        # Mock openspec/changes contents
-        mock_dir = MagicMock()
-        mock_dir.type = "dir"
-        mock_dir.path = "openspec/changes/feature-1"
-        
-        mock_task_file = MagicMock()
-        mock_task_file.name = "tasks.md"
-        mock_task_file.decoded_content = b"- [ ] Task 1\n- [x] Task 2\n- [ ] Task 3"
-        
-        # Side effect for repo.get_contents
-        def get_contents_mock(path):
-            if path == "openspec/changes":
-                return [mock_dir]
-            if path == "openspec/changes/feature-1":
-                return [mock_task_file]
-            return []
-            
-        mock_repo.get_contents.side_effect = get_contents_mock
+        # Mock openspec/changes snapshot
+        mock_load_spec_snapshot.return_value = SpecSnapshot(
+            "tree-sha",
+            {"openspec/changes/feature-1/tasks.md": "- [ ] Task 1\n- [x] Task 2\n- [ ] Task 3"},
+            {"openspec/changes/feature-1/tasks.md": "blob-sha"},
+        )
 
         # Mock DB
-        mock_conn = MagicMock()
-        mock_get_conn.return_value = mock_conn
         mock_cur = MagicMock()
-        mock_conn.cursor.return_value = mock_cur
+        mock_db_cursor.return_value.__enter__.return_value = mock_cur
         
         # Simulate project NOT found (trigger Zero-Config)
         mock_cur.fetchone.side_effect = [
             None, # SELECT project
             {"id": "new-project-id"}, # RETURNING id from project INSERT
             {"id": "new-bucket-id"}, # RETURNING id from bucket INSERT
-            None, # SELECT task 1
-            None, # SELECT task 2
-            None  # SELECT task 3
+            {"id": "completed-bucket-id"}, # SELECT COMPLETED bucket for the checked task
         ]
+        mock_cur.fetchall.return_value = [] # No spec file synced before
+        mock_cur.rowcount = 3
 
         await sync_github_tasks(payload)
 
@@ -79,18 +62,20 @@ class TestWebhookSync(unittest.IsolatedAsyncioTestCase):
             (unittest.mock.ANY, unittest.mock.ANY, "AI Drafts", "DRAFT", True, 0)
         )
         
-        # 3. Tasks should be inserted
+        # 3. Tasks should be inserted in one statement
         mock_cur.execute.assert_any_call(
-            "INSERT INTO public.tasks (id, project_id, bucket_id, title, type, weight) VALUES (%s, %s, %s, %s, 'CODE', 1);",
-            (unittest.mock.ANY, unittest.mock.ANY, unittest.mock.ANY, "Task 1")
+            _INSERT_SPEC_TASKS,
+            (unittest.mock.ANY, unittest.mock.ANY, None, unittest.mock.ANY, ["Task 1", "Task 2", "Task 3"], unittest.mock.ANY)
         )
+        
+        # 4. The checked task moves to COMPLETED and the file digest is stored
         mock_cur.execute.assert_any_call(
-            "INSERT INTO public.tasks (id, project_id, bucket_id, title, type, weight) VALUES (%s, %s, %s, %s, 'CODE', 1);",
-            (unittest.mock.ANY, unittest.mock.ANY, unittest.mock.ANY, "Task 2")
+            unittest.mock.ANY,
+            ("completed-bucket-id", unittest.mock.ANY, ["Task 2"], "completed-bucket-id")
         )
         mock_cur.execute.assert_any_call(
-            "INSERT INTO public.tasks (id, project_id, bucket_id, title, type, weight) VALUES (%s, %s, %s, %s, 'CODE', 1);",
-            (unittest.mock.ANY, unittest.mock.ANY, unittest.mock.ANY, "Task 3")
+            _UPSERT_SPEC_DIGEST,
+            (unittest.mock.ANY, "openspec/changes/feature-1/tasks.md", "blob-sha", ["Task 2"])
         )
         
         print("Verification test PASSED!")
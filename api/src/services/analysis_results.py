@@ -0,0 +1,61 @@
+from typing import Optional
+
+from psycopg.types.json import Jsonb
+
+from config import settings
+from services.database.database import async_db_cursor, register_schema
+
+# Finished meeting analyses waiting for the user's next poll. In Postgres so
+# any worker can deliver what another worker produced.
+register_schema("""
+    CREATE TABLE IF NOT EXISTS public.meeting_analysis_results (
+        id BIGSERIAL PRIMARY KEY,
+        user_uuid TEXT NOT NULL,
+        payload JSONB NOT NULL,
+        created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+        expires_at TIMESTAMPTZ NOT NULL
+    );
+""")
+register_schema("""
+    CREATE INDEX IF NOT EXISTS meeting_analysis_results_user_idx
+        ON public.meeting_analysis_results (user_uuid, id DESC);
+""")
+register_schema("""
+    CREATE INDEX IF NOT EXISTS meeting_analysis_results_expires_idx
+        ON public.meeting_analysis_results (expires_at);
+""")
+
+
+async def push_result(user_uuid: str, payload: dict):
+    """Queue a result for `user_uuid`, dropping expired results and the user's oldest beyond the limit."""
+    async with async_db_cursor(commit=True) as cur:
+        await cur.execute(
+            "INSERT INTO public.meeting_analysis_results (user_uuid, payload, expires_at) "
+            "VALUES (%s, %s, NOW() + make_interval(hours => %s));",
+            (user_uuid, Jsonb(payload), settings.analysis_result_ttl_hours),
+        )
+        await cur.execute("DELETE FROM public.meeting_analysis_results WHERE expires_at <= NOW();")
+        await cur.execute(
+            "DELETE FROM public.meeting_analysis_results WHERE id IN ("
+            "  SELECT id FROM public.meeting_analysis_results WHERE user_uuid = %s ORDER BY id DESC OFFSET %s"
+            ");",
+            (user_uuid, settings.analysis_result_max_per_user),
+        )
+
+
+async def pop_result(user_uuid: str) -> Optional[dict]:
+    """
+    Remove and return the user's newest unexpired result, or None. Concurrent
+    polls, on any worker, never receive the same result twice.
+    """
+    async with async_db_cursor(commit=True) as cur:
+        await cur.execute(
+            "DELETE FROM public.meeting_analysis_results WHERE id = ("
+            "  SELECT id FROM public.meeting_analysis_results "
+            "  WHERE user_uuid = %s AND expires_at > NOW() "
+            "  ORDER BY id DESC LIMIT 1 FOR UPDATE SKIP LOCKED"
+            ") RETURNING payload;",
+            (user_uuid,),
+        )
+        row = await cur.fetchone()
+    return row["payload"] if row is not None else None
@@ -0,0 +1,264 @@
+import asyncio
+import hashlib
+import logging
+import multiprocessing
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import BinaryIO, Optional, Union
+
+from prometheus_client import Counter, Histogram
+
+from config import settings
+from services.executors import run_blocking
+
+logger = logging.getLogger("uvicorn.error")
+
+AUDIO_MIME_TYPE = "audio/ogg"
+# Bump when the ffmpeg arguments change so old cache entries are not reused
+_PIPELINE_VERSION = "1"
+_HASH_CHUNK = 1024 * 1024
+
+PREPROCESS_RESULTS = Counter("audio_preprocess_total", "Meeting media preprocessing runs, by outcome.", ["result"])
+PREPROCESS_SECONDS = Histogram(
+    "audio_preprocess_seconds",
+    "Time to hash a meeting recording and extract its speech audio.",
+    buckets=(0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600),
+)
+PREPROCESS_RATIO = Histogram(
+    "audio_preprocess_size_ratio",
+    "Extracted audio size divided by the original recording size.",
+    buckets=(0.005, 0.01, 0.02, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn, not fork: the parent has running threads and open pool connections
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.audio_preprocess_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def shutdown_audio_pool():
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def _cache_dir() -> Path:
+    return Path(settings.audio_cache_dir or os.path.join(tempfile.gettempdir(), "lunaris-audio"))
+
+
+def _ffmpeg_args(src: str, dest: str, bitrate_kbps: int, trim_silence: bool) -> list[str]:
+    # Gemini reduces audio to 16 kHz mono itself, so nothing the model uses is lost
+    args = ["ffmpeg", "-nostdin", "-hide_banner", "-loglevel", "error", "-y", "-i", src, "-vn", "-sn", "-dn"]
+    if trim_silence:
+        # Pauses longer than 2 s are cut down; short ones keep the speech rhythm
+        args += ["-af", "silenceremove=stop_periods=-1:stop_duration=2:stop_threshold=-45dB"]
+    args += ["-ac", "1", "-ar", "16000", "-c:a", "libopus", "-b:a", f"{bitrate_kbps}k", "-application", "voip", "-f", "ogg", dest]
+    return args
+
+
+def _prune(cache_dir: Path, max_bytes: int, in_use_seconds: float):
+    """
+    Drop least recently used audio until the cache fits. Files touched within
+    `in_use_seconds` may have just been handed to a request and are kept.
+    """
+    entries = []
+    for path in cache_dir.glob("*.ogg"):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    cutoff = time.time() - in_use_seconds
+    for mtime, size, path in sorted(entries):
+        if total <= max_bytes or mtime >= cutoff:
+            break
+        path.unlink(missing_ok=True)
+        total -= size
+
+
+def _extract(src: str, cache_dir: str, bitrate_kbps: int, trim_silence: bool, timeout: float, cache_max_bytes: int) -> tuple[str, str]:
+    """Runs in a worker process. Returns (result, audio path or error message)."""
+    digest = hashlib.sha256(f"{_PIPELINE_VERSION}:{bitrate_kbps}:{trim_silence}:".encode())
+    with open(src, "rb") as f:
+        while block := f.read(_HASH_CHUNK):
+            digest.update(block)
+
+    cache = Path(cache_dir)
+    cache.mkdir(parents=True, exist_ok=True)
+    dest = cache / f"{digest.hexdigest()}.ogg"
+    if dest.exists():
+        # Refresh the mtime so pruning drops the least recently used entries first
+        os.utime(dest)
+        return "hit", str(dest)
+
+    tmp = dest.with_name(f"{dest.name}.{os.getpid()}.tmp")
+    try:
+        proc = subprocess.run(
+            _ffmpeg_args(src, str(tmp), bitrate_kbps, trim_silence),
+            capture_output=True, timeout=timeout,
+        )
+        if proc.returncode != 0 or not tmp.exists() or tmp.stat().st_size == 0:
+            return "failed", proc.stderr.decode(errors="replace")[-500:] or f"ffmpeg exited with {proc.returncode}"
+        os.replace(tmp, dest)
+    except subprocess.TimeoutExpired:
+        return "failed", f"ffmpeg timed out after {timeout:.0f}s"
+    finally:
+        tmp.unlink(missing_ok=True)
+
+    _prune(cache, cache_max_bytes, in_use_seconds=timeout)
+    return "converted", str(dest)
+
+
+def _probe_duration(src: str, timeout: float) -> float:
+    proc = subprocess.run(
+        ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "default=noprint_wrappers=1:nokey=1", src],
+        capture_output=True, timeout=timeout, check=True,
+    )
+    return float(proc.stdout.strip())
+
+
+def _split(src: str, segment_seconds: float, overlap_seconds: float, timeout: float) -> list[tuple[float, float, str]]:
+    """Runs in a worker process. Cuts `src` into overlapping segments next to it, reusing earlier cuts."""
+    duration = _probe_duration(src, timeout)
+    os.utime(src)
+    if duration <= segment_seconds + overlap_seconds:
+        return [(0.0, duration, src)]
+
+    source = Path(src)
+    segments = []
+    start = 0.0
+    while start < duration:
+        end = min(start + segment_seconds + overlap_seconds, duration)
+        dest = source.with_name(f"{source.stem}.{start:.0f}-{end:.0f}.ogg")
+        if dest.exists():
+            # Marks the cut as in use, see `_prune`
+            os.utime(dest)
+        else:
+            tmp = dest.with_name(f"{dest.name}.{os.getpid()}.tmp")
+            try:
+                # Stream copy: Opus needs no re-encode, so cutting costs little more than the read
+                subprocess.run(
+                    ["ffmpeg", "-nostdin", "-hide_banner", "-loglevel", "error", "-y", "-ss", f"{start:.3f}", "-i", src,
+                     "-t", f"{end - start:.3f}", "-c", "copy", "-f", "ogg", str(tmp)],
+                    capture_output=True, timeout=timeout, check=True,
+                )
+                os.replace(tmp, dest)
+            finally:
+                tmp.unlink(missing_ok=True)
+        segments.append((start, end, str(dest)))
+        if end >= duration:
+            break
+        start += segment_seconds
+    return segments
+
+
+def _disk_path(stream: BinaryIO) -> Optional[str]:
+    """
+    A path the worker processes can open for data `stream` already holds on
+    disk: its own name, or on Linux the /proc entry of an anonymous temp file,
+    which is what a SpooledTemporaryFile keeps once it has rolled over. None
+    while the data is only in memory.
+    """
+    if isinstance(stream, tempfile.SpooledTemporaryFile):
+        if not stream._rolled:
+            return None
+        stream = stream._file
+    name = getattr(stream, "name", None)
+    if isinstance(name, str) and os.path.isfile(name):
+        stream.flush()
+        return name
+    if isinstance(name, int) and os.path.isdir(f"/proc/{os.getpid()}/fd"):
+        stream.flush()
+        return f"/proc/{os.getpid()}/fd/{name}"
+    return None
+
+
+def _spool_to_disk(stream: BinaryIO) -> str:
+    stream.seek(0)
+    with tempfile.NamedTemporaryFile(delete=False) as copy:
+        shutil.copyfileobj(stream, copy, _HASH_CHUNK)
+    stream.seek(0)
+    return copy.name
+
+
+async def speech_audio(source: Union[str, BinaryIO]) -> Optional[str]:
+    """
+    Path of a mono, 16 kHz Opus copy of the speech in a meeting recording
+    (a file path, or an open file such as an UploadFile's), for upload in place
+    of the video. Results are cached by content hash. Returns None when
+    preprocessing is disabled, ffmpeg is missing or conversion fails, in which
+    case the original should be sent. The returned file belongs to the cache.
+    """
+    if not settings.audio_preprocess_enabled:
+        return None
+    if shutil.which("ffmpeg") is None:
+        PREPROCESS_RESULTS.labels("skipped").inc()
+        logger.warning("ffmpeg not found; sending meeting recordings unprocessed")
+        return None
+
+    spooled = None
+    try:
+        if isinstance(source, str):
+            src = source
+        else:
+            src = _disk_path(source)
+            if src is None:
+                # Only small uploads are still in memory; ffmpeg needs a file
+                spooled = src = await run_blocking(_spool_to_disk, source)
+
+        loop = asyncio.get_running_loop()
+        with PREPROCESS_SECONDS.time():
+            result, value = await loop.run_in_executor(
+                _get_pool(), _extract, src, str(_cache_dir()), settings.audio_bitrate_kbps,
+                settings.audio_trim_silence, settings.audio_preprocess_timeout_seconds, settings.audio_cache_max_bytes,
+            )
+        PREPROCESS_RESULTS.labels(result).inc()
+        if result == "failed":
+            logger.warning(f"Audio extraction failed, sending the original recording: {value}")
+            return None
+        if result == "converted":
+            PREPROCESS_RATIO.observe(os.path.getsize(value) / max(os.path.getsize(src), 1))
+        return value
+    except Exception as e:
+        PREPROCESS_RESULTS.labels("failed").inc()
+        logger.warning(f"Audio extraction failed, sending the original recording: {e}")
+        return None
+    finally:
+        if spooled is not None:
+            os.unlink(spooled)
+
+
+async def split_audio(audio_path: str) -> list[tuple[float, float, str]]:
+    """
+    (start, end, path) of overlapping `meeting_segment_seconds` segments of an
+    extracted audio file, or a single entry for the whole file when it is short
+    enough. Returns an empty list when the audio cannot be cut.
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(
+            _get_pool(), _split, audio_path, settings.meeting_segment_seconds,
+            settings.meeting_segment_overlap_seconds, settings.audio_preprocess_timeout_seconds,
+        )
+    except Exception as e:
+        logger.warning(f"Could not split {audio_path} into segments: {e}")
+        return []
@@ -2,11 +2,8 @@ from pydantic import BaseModel
 from typing import Optional
 from datetime import datetime
 from fastapi import HTTPException
-import psycopg2
-import psycopg2.extras
 
-from services.database.database import _get_conn
-from services.database.database import _put_conn
+from services.database.database import db_cursor
 from services.database.database import router as db_router, SafeId
 from services.database.id_generator import _generator
 
@@ -25,42 +22,32 @@ class DatabaseActivity(BaseModel):
 # ---------------------------------------------------------------------------
 @db_router.post("/activities")
 def db_create_activity(activity: DatabaseActivity):
-    conn = _get_conn()
-    cur = None
-    try:
-        cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-
-        mapping = {
-            "id": _generator.generate(),
-            "project_id": activity.project_id,
-            "user_name": activity.user_name,
-            "action": activity.action,
-            "target": activity.target,
-        }
+    mapping = {
+        "id": _generator.generate(),
+        "project_id": activity.project_id,
+        "user_name": activity.user_name,
+        "action": activity.action,
+        "target": activity.target,
+    }
 
-        columns = [k for k, v in mapping.items() if v is not None]
-        placeholders = ["%s"] * len(columns)
-        params = [mapping[k] for k in columns]
+    columns = [k for k, v in mapping.items() if v is not None]
+    placeholders = ["%s"] * len(columns)
+    params = [mapping[k] for k in columns]
 
-        sql = (
-            f"INSERT INTO public.activities ({', '.join(columns)}) "
-            f"VALUES ({', '.join(placeholders)}) "
-            f"RETURNING id, project_id, user_name, action, target, created_at;"
-        )
+    sql = (
+        f"INSERT INTO public.activities ({', '.join(columns)}) "
+        f"VALUES ({', '.join(placeholders)}) "
+        f"RETURNING id, project_id, user_name, action, target, created_at;"
+    )
 
-        cur.execute(sql, params)
-        conn.commit()
-        return cur.fetchone()
+    try:
+        with db_cursor(commit=True) as cur:
+            cur.execute(sql, params)
+            return cur.fetchone()
     except HTTPException:
-        conn.rollback()
         raise
     except Exception as e:
-        conn.rollback()
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        if cur is not None:
-            cur.close()
-        _put_conn(conn)
 
 
 # ---------------------------------------------------------------------------
@@ -68,10 +55,7 @@ def db_create_activity(activity: DatabaseActivity):
 # ---------------------------------------------------------------------------
 @db_router.get("/projects/{project_id}/activities")
 def db_get_activities_by_project(project_id: int):
-    conn = _get_conn()
-    cur = None
-    try:
-        cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+    with db_cursor(readonly=True) as cur:
         cur.execute(
             "SELECT id, project_id, user_name, action, target, created_at "
             "FROM public.activities "
@@ -80,10 +64,6 @@ def db_get_activities_by_project(project_id: int):
             (project_id,),
         )
         return cur.fetchall()
-    finally:
-        if cur is not None:
-            cur.close()
-        _put_conn(conn)
 
 
 # ---------------------------------------------------------------------------
@@ -91,20 +71,13 @@ def db_get_activities_by_project(project_id: int):
 # ---------------------------------------------------------------------------
 @db_router.get("/activities/{activity_id}")
 def db_get_activity_by_id(activity_id: int):
-    conn = _get_conn()
-    cur = None
-    try:
-        cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+    with db_cursor(readonly=True) as cur:
         cur.execute(
             "SELECT id, project_id, user_name, action, target, created_at "
             "FROM public.activities WHERE id = %s LIMIT 1;",
             (activity_id,),
         )
         row = cur.fetchone()
-        if row is None:
-            raise HTTPException(status_code=404, detail="Activity not found")
-        return row
-    finally:
-        if cur is not None:
-            cur.close()
-        _put_conn(conn)
+    if row is None:
+        raise HTTPException(status_code=404, detail="Activity not found")
+    return row
@@ -1,18 +1,38 @@
 import hashlib
 import socket
 import tempfile
+import threading
 import psycopg2
+import psycopg2.extras
 import psycopg2.pool
+from contextlib import asynccontextmanager, contextmanager
+from psycopg import AsyncConnection, pq
+from psycopg.rows import dict_row
+from psycopg_pool import AsyncConnectionPool, PoolTimeout, TooManyRequests
 from config import settings
-from typing import Optional, Annotated, Any
+from typing import Optional, Annotated, Any, AsyncIterator, Iterator
 from pydantic import BeforeValidator, PlainSerializer
 from pathlib import Path
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException
+from services.database.pool_monitor import PoolMonitor
+from services.database.prepared import EXPLICIT_PREPARE_ONLY, connection_factory, prepared_statements_enabled
+from services.database.read_routing import recently_wrote
 
 router = APIRouter()
 
 _pool: Optional[psycopg2.pool.ThreadedConnectionPool] = None
+_pool_slots: Optional[threading.BoundedSemaphore] = None
+_async_pool: Optional[AsyncConnectionPool] = None
+_replica_pool: Optional[psycopg2.pool.ThreadedConnectionPool] = None
+_replica_slots: Optional[threading.BoundedSemaphore] = None
+_async_replica_pool: Optional[AsyncConnectionPool] = None
+_sync_monitor = PoolMonitor("sync")
+_async_monitor = PoolMonitor("async")
+_sync_replica_monitor = PoolMonitor("sync_replica")
+_async_replica_monitor = PoolMonitor("async_replica")
 _ssl_root_cert_path: Optional[str] = None
+# DDL for tables owned by the API itself (queues, caches); applied at startup
+_schemas: list[str] = []
 
 # Custom Pydantic type to ensure IDs are always serialized as strings
 # This prevents BigInt rounding issues in JavaScript/React.
@@ -140,35 +160,252 @@ def postgresql_dsn():
     return dsn
 
 
-def create_pool(minconn: int = 1, maxconn: int = 10):
-    """Create a threaded connection pool using the full Postgres URL from settings."""
-    global _pool
+def postgresql_replica_dsn() -> Optional[str]:
+    """DSN of the optional read replica, or None when reads all go to the primary."""
+    from urllib.parse import urlparse, parse_qsl, urlencode, urlunparse
+
+    url = getattr(settings, "postgresql_replica_url", None)
+    if not url:
+        return None
+    try:
+        parts = urlparse(url)
+        q = dict(parse_qsl(parts.query))
+        if "sslmode" not in q:
+            q["sslmode"] = "require"
+        ssl_root_cert = _get_ssl_root_cert_path()
+        if ssl_root_cert and "sslrootcert" not in q:
+            q["sslrootcert"] = ssl_root_cert
+        url = urlunparse(parts._replace(query=urlencode(q)))
+    except Exception:
+        pass
+    return url
+
+
+def _open_sync_pool(dsn: str, minconn: int, maxconn: int, monitor: PoolMonitor):
+    pool = psycopg2.pool.ThreadedConnectionPool(
+        minconn,
+        maxconn,
+        dsn=dsn,
+        connection_factory=connection_factory(dsn),
+    )
+    # psycopg2 raises PoolError as soon as every connection is checked out;
+    # the semaphore makes callers queue for a free slot instead.
+    slots = threading.BoundedSemaphore(maxconn)
+    monitor.configure(maxconn, lambda: len(pool._pool) if not pool.closed else 0)
+    return pool, slots
+
+
+def create_pool(minconn: Optional[int] = None, maxconn: Optional[int] = None):
+    """
+    Create a threaded connection pool using the full Postgres URL from settings,
+    plus a second pool on the read replica when `postgresql_replica_url` is set.
+    """
+    global _pool, _pool_slots, _replica_pool, _replica_slots
     if _pool is None:
+        minconn = minconn if minconn is not None else settings.db_pool_min_size
+        maxconn = maxconn if maxconn is not None else settings.db_pool_max_size
 
-        _pool = psycopg2.pool.ThreadedConnectionPool(
-            minconn,
-            maxconn,
-            dsn=postgresql_dsn(),
-        )
+        _pool, _pool_slots = _open_sync_pool(postgresql_dsn(), minconn, maxconn, _sync_monitor)
+        replica_dsn = postgresql_replica_dsn()
+        if replica_dsn and _replica_pool is None:
+            _replica_pool, _replica_slots = _open_sync_pool(replica_dsn, minconn, maxconn, _sync_replica_monitor)
     return _pool
 
 
 def close_pool():
     """Close all pooled connections."""
-    global _pool
+    global _pool, _pool_slots, _replica_pool, _replica_slots
     if _pool is not None:
+        _sync_monitor.report_unreturned()
         _pool.closeall()
         _pool = None
+        _pool_slots = None
+    if _replica_pool is not None:
+        _sync_replica_monitor.report_unreturned()
+        _replica_pool.closeall()
+        _replica_pool = None
+        _replica_slots = None
 
 
-def _get_conn():
-    global _pool
+def _get_conn(replica: bool = False):
     if _pool is None:
         create_pool()
-    return _pool.getconn()
-
-
-def _put_conn(conn):
-    global _pool
-    if _pool is not None:
-        _pool.putconn(conn)
+    if replica:
+        pool, slots, monitor = _replica_pool, _replica_slots, _sync_replica_monitor
+    else:
+        pool, slots, monitor = _pool, _pool_slots, _sync_monitor
+    with monitor.waiting() as wait:
+        if not slots.acquire(timeout=settings.db_pool_timeout):
+            monitor.exhausted()
+            raise HTTPException(status_code=503, detail="Database connection pool exhausted")
+        try:
+            conn = pool.getconn()
+        except Exception:
+            slots.release()
+            monitor.failed()
+            raise
+    monitor.acquired(conn, wait.elapsed)
+    return conn
+
+
+def _put_conn(conn, replica: bool = False):
+    if replica:
+        pool, slots, monitor = _replica_pool, _replica_slots, _sync_replica_monitor
+    else:
+        pool, slots, monitor = _pool, _pool_slots, _sync_monitor
+    if pool is not None:
+        monitor.released(conn)
+        pool.putconn(conn)
+        slots.release()
+
+
+async def _open_async_pool(dsn: str, min_size: int, max_size: int, monitor: PoolMonitor) -> AsyncConnectionPool:
+    pool = AsyncConnectionPool(
+        conninfo=dsn,
+        min_size=min_size,
+        max_size=max_size,
+        timeout=settings.db_pool_timeout,
+        max_waiting=settings.db_pool_max_waiting,
+        # Only statements run through `async_execute_prepared` are prepared, on
+        # first use; the Supabase pooler (transaction mode) cannot keep them.
+        kwargs={"row_factory": dict_row, "prepare_threshold": EXPLICIT_PREPARE_ONLY if prepared_statements_enabled(dsn) else None},
+        open=False,
+    )
+    await pool.open(wait=False)
+    monitor.configure(
+        pool.max_size,
+        lambda: pool.get_stats().get("pool_available", 0) if not pool.closed else 0,
+    )
+    return pool
+
+
+async def create_async_pool(min_size: Optional[int] = None, max_size: Optional[int] = None) -> AsyncConnectionPool:
+    """Create and open the asyncio connection pool(s) used by `async def` endpoints."""
+    global _async_pool, _async_replica_pool
+    if _async_pool is None:
+        min_size = min_size if min_size is not None else settings.db_pool_min_size
+        max_size = max_size if max_size is not None else settings.db_pool_max_size
+
+        _async_pool = await _open_async_pool(postgresql_dsn(), min_size, max_size, _async_monitor)
+        replica_dsn = postgresql_replica_dsn()
+        if replica_dsn and _async_replica_pool is None:
+            _async_replica_pool = await _open_async_pool(replica_dsn, min_size, max_size, _async_replica_monitor)
+    return _async_pool
+
+
+async def close_async_pool():
+    """Close the asyncio connection pool(s)."""
+    global _async_pool, _async_replica_pool
+    if _async_pool is not None:
+        _async_monitor.report_unreturned()
+        await _async_pool.close()
+        _async_pool = None
+    if _async_replica_pool is not None:
+        _async_replica_monitor.report_unreturned()
+        await _async_replica_pool.close()
+        _async_replica_pool = None
+
+
+async def _get_async_conn(replica: bool = False) -> AsyncConnection:
+    """Check out an async connection, waiting up to `db_pool_timeout` in the pool's queue."""
+    if _async_pool is None:
+        await create_async_pool()
+    if replica:
+        pool, monitor = _async_replica_pool, _async_replica_monitor
+    else:
+        pool, monitor = _async_pool, _async_monitor
+    with monitor.waiting() as wait:
+        try:
+            conn = await pool.getconn()
+        except (PoolTimeout, TooManyRequests) as e:
+            monitor.exhausted()
+            raise HTTPException(status_code=503, detail="Database connection pool exhausted") from e
+        except Exception:
+            monitor.failed()
+            raise
+    monitor.acquired(conn, wait.elapsed)
+    return conn
+
+
+async def _put_async_conn(conn: AsyncConnection, replica: bool = False):
+    if replica:
+        pool, monitor = _async_replica_pool, _async_replica_monitor
+    else:
+        pool, monitor = _async_pool, _async_monitor
+    monitor.released(conn)
+    if pool is None:
+        await conn.close()
+        return
+    # Read-only endpoints never commit; end their implicit transaction so the
+    # pool does not warn about connections returned mid-transaction.
+    if conn.info.transaction_status == pq.TransactionStatus.INTRANS:
+        await conn.rollback()
+    await pool.putconn(conn)
+
+
+def register_schema(ddl: str):
+    """Register idempotent DDL (`CREATE ... IF NOT EXISTS`) to run in `apply_schemas`."""
+    if ddl not in _schemas:
+        _schemas.append(ddl)
+
+
+def apply_schemas():
+    """Create the API-owned tables and indexes registered with `register_schema`."""
+    if not _schemas:
+        return
+    with db_cursor(commit=True) as cur:
+        for ddl in _schemas:
+            cur.execute(ddl)
+
+
+def _use_replica(readonly: bool) -> bool:
+    # A client that wrote within `db_read_your_writes_seconds` reads from the
+    # primary so replication lag cannot hide its own change.
+    return readonly and bool(settings.postgresql_replica_url) and not recently_wrote()
+
+
+@contextmanager
+def db_cursor(commit: bool = False, readonly: bool = False) -> Iterator[psycopg2.extras.RealDictCursor]:
+    """
+    Check out a pooled connection and yield a RealDictCursor on it.
+    Commits on a clean exit when `commit` is set, rolls back on any exception,
+    and always closes the cursor and returns the connection to the pool.
+    `readonly` blocks are served by the read replica when one is configured.
+    """
+    replica = _use_replica(readonly)
+    conn = _get_conn(replica)
+    cur = None
+    try:
+        cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        yield cur
+        if commit:
+            conn.commit()
+    except BaseException:
+        if not conn.closed:
+            conn.rollback()
+        raise
+    finally:
+        if cur is not None:
+            cur.close()
+        _put_conn(conn, replica)
+
+
+@asynccontextmanager
+async def async_db_cursor(commit: bool = False, readonly: bool = False) -> AsyncIterator[Any]:
+    """Async counterpart of `db_cursor` on the asyncio pool; rows are dicts."""
+    replica = _use_replica(readonly)
+    conn = await _get_async_conn(replica)
+    cur = None
+    try:
+        cur = conn.cursor()
+        yield cur
+        if commit:
+            await conn.commit()
+    except BaseException:
+        if not conn.closed:
+            await conn.rollback()
+        raise
+    finally:
+        if cur is not None:
+            await cur.close()
+        await _put_async_conn(conn, replica)
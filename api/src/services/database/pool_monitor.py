@@ -0,0 +1,218 @@
+import contextvars
+import logging
+import threading
+import time
+import traceback
+from typing import Any, Callable, Optional
+
+from prometheus_client import Counter, Gauge, Histogram
+
+from config import settings
+
+logger = logging.getLogger("uvicorn.error")
+
+# The ASGI scope of the request currently being served. Sync endpoints run in
+# Starlette's threadpool, which copies the context, so this is visible there too.
+_request_scope: contextvars.ContextVar[Optional[dict]] = contextvars.ContextVar("db_request_scope", default=None)
+
+_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+POOL_ACQUIRE_SECONDS = Histogram(
+    "db_pool_acquire_seconds",
+    "Time spent waiting for a pooled connection.",
+    ["pool"],
+    buckets=_LATENCY_BUCKETS,
+)
+POOL_HOLD_SECONDS = Histogram(
+    "db_pool_hold_seconds",
+    "Time a connection stays checked out, by request path.",
+    ["pool", "path"],
+    buckets=_LATENCY_BUCKETS,
+)
+POOL_EXHAUSTED = Counter(
+    "db_pool_exhausted_total",
+    "Acquire attempts that timed out or were rejected because the pool was full.",
+    ["pool"],
+)
+POOL_ACQUIRE_FAILURES = Counter(
+    "db_pool_acquire_failures_total",
+    "Acquire attempts that failed for reasons other than exhaustion.",
+    ["pool"],
+)
+POOL_IN_USE = Gauge("db_pool_connections_in_use", "Connections currently checked out.", ["pool"])
+POOL_IDLE = Gauge("db_pool_connections_idle", "Open connections sitting idle in the pool.", ["pool"])
+POOL_MAX = Gauge("db_pool_connections_max", "Configured maximum pool size.", ["pool"])
+POOL_WAITING = Gauge("db_pool_waiting_requests", "Callers currently queued for a connection.", ["pool"])
+POOL_LEAKS = Counter(
+    "db_pool_leak_warnings_total",
+    "Checkouts flagged by the leak detector (held past the threshold or never returned).",
+    ["pool"],
+)
+
+
+def current_request_scope() -> Optional[dict]:
+    """ASGI scope of the request being served, or None outside a request."""
+    return _request_scope.get()
+
+
+def current_request_path() -> str:
+    """Route template of the request being served, e.g. `/projects/{project_id}/board`."""
+    scope = _request_scope.get()
+    if scope is None:
+        return "background"
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class RequestScopeMiddleware:
+    """Pure ASGI middleware that exposes the request scope to the pool monitor."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = _request_scope.set(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_scope.reset(token)
+
+
+class _Checkout:
+    __slots__ = ("started", "path", "origin", "flagged")
+
+    def __init__(self, started: float, path: str, origin: Optional[str]):
+        self.started = started
+        self.path = path
+        self.origin = origin
+        self.flagged = False
+
+
+def _caller_origin() -> str:
+    """First stack frame outside the database plumbing, e.g. `tasks.py:42 in db_get_task_by_id`."""
+    for frame in reversed(traceback.extract_stack()[:-1]):
+        if frame.filename.endswith(("pool_monitor.py", "database/database.py", "contextlib.py")):
+            continue
+        return f"{frame.filename}:{frame.lineno} in {frame.name}"
+    return "unknown"
+
+
+class PoolMonitor:
+    """
+    Records checkout/return events for one connection pool.
+    When `db_leak_detection_ms` is set it also remembers where each connection
+    was checked out and warns about connections held past that threshold.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._checked_out: dict[int, _Checkout] = {}
+        self._waiting = 0
+        self._watchdog: Optional[threading.Thread] = None
+
+    def configure(self, max_size: int, idle: Callable[[], int]):
+        POOL_MAX.labels(self.name).set(max_size)
+        POOL_IDLE.labels(self.name).set_function(idle)
+        POOL_IN_USE.labels(self.name).set_function(lambda: len(self._checked_out))
+        POOL_WAITING.labels(self.name).set_function(lambda: self._waiting)
+
+    def waiting(self) -> "_Waiting":
+        return _Waiting(self)
+
+    def acquired(self, conn: Any, wait_seconds: float):
+        POOL_ACQUIRE_SECONDS.labels(self.name).observe(wait_seconds)
+        leak_ms = settings.db_leak_detection_ms
+        origin = _caller_origin() if leak_ms else None
+        with self._lock:
+            self._checked_out[id(conn)] = _Checkout(time.perf_counter(), current_request_path(), origin)
+        if leak_ms:
+            self._ensure_watchdog(leak_ms)
+
+    def released(self, conn: Any):
+        with self._lock:
+            entry = self._checked_out.pop(id(conn), None)
+        if entry is None:
+            return
+        held = time.perf_counter() - entry.started
+        POOL_HOLD_SECONDS.labels(self.name, entry.path).observe(held)
+        leak_ms = settings.db_leak_detection_ms
+        if leak_ms and held * 1000 > leak_ms and not entry.flagged:
+            POOL_LEAKS.labels(self.name).inc()
+            logger.warning(
+                "[%s pool] connection held for %.0f ms (threshold %d ms), checked out at %s (%s)",
+                self.name, held * 1000, leak_ms, entry.origin, entry.path,
+            )
+
+    def report_unreturned(self):
+        """Log every connection still checked out, e.g. when the pool is closed."""
+        with self._lock:
+            entries = list(self._checked_out.values())
+        now = time.perf_counter()
+        for entry in entries:
+            POOL_LEAKS.labels(self.name).inc()
+            logger.warning(
+                "[%s pool] connection never returned after %.0f ms, checked out at %s (%s)",
+                self.name, (now - entry.started) * 1000, entry.origin or "unknown", entry.path,
+            )
+
+    def _ensure_watchdog(self, leak_ms: int):
+        if self._watchdog is not None:
+            return
+        with self._lock:
+            if self._watchdog is not None:
+                return
+            self._watchdog = threading.Thread(
+                target=self._watch, args=(leak_ms,), name=f"db-leak-watchdog-{self.name}", daemon=True
+            )
+        self._watchdog.start()
+
+    def _watch(self, leak_ms: int):
+        # Flags connections that are still out, so a checkout that is never
+        # returned shows up without waiting for it to come back.
+        interval = max(leak_ms / 1000, 0.5)
+        while True:
+            time.sleep(interval)
+            now = time.perf_counter()
+            stale: list[_Checkout] = []
+            with self._lock:
+                for entry in self._checked_out.values():
+                    if not entry.flagged and (now - entry.started) * 1000 > leak_ms:
+                        entry.flagged = True
+                        stale.append(entry)
+            for entry in stale:
+                POOL_LEAKS.labels(self.name).inc()
+                logger.warning(
+                    "[%s pool] connection still checked out after %.0f ms, checked out at %s (%s)",
+                    self.name, (now - entry.started) * 1000, entry.origin, entry.path,
+                )
+
+    def exhausted(self):
+        POOL_EXHAUSTED.labels(self.name).inc()
+
+    def failed(self):
+        POOL_ACQUIRE_FAILURES.labels(self.name).inc()
+
+
+class _Waiting:
+    def __init__(self, monitor: PoolMonitor):
+        self._monitor = monitor
+        self._started = 0.0
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._started
+
+    def __enter__(self):
+        with self._monitor._lock:
+            self._monitor._waiting += 1
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        with self._monitor._lock:
+            self._monitor._waiting -= 1
+        return False
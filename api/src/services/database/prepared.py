@@ -0,0 +1,97 @@
+import re
+from typing import Any, Optional, Sequence
+from urllib.parse import urlparse
+
+import psycopg2
+import psycopg2.errors
+import psycopg2.extensions
+
+from config import settings
+
+# name -> SQL text with psycopg %s placeholders
+_STATEMENTS: dict[str, str] = {}
+
+# Supabase's transaction-mode pooler hands each transaction to a different
+# server session, so named statements prepared on one are missing on the next.
+_TRANSACTION_POOLER_PORT = 6543
+
+# psycopg auto-prepares any query run `prepare_threshold` times on a connection.
+# Out of reach, only `async_execute_prepared` (prepare=True) prepares; None
+# would turn explicit preparation off as well.
+EXPLICIT_PREPARE_ONLY = 2**31 - 1
+
+
+class PreparingConnection(psycopg2.extensions.connection):
+    """psycopg2 connection that remembers which named statements it has prepared."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared_statements: set[str] = set()
+
+
+def prepared_statements_enabled(dsn: str) -> bool:
+    """Whether pools connecting to `dsn` should prepare statements server-side."""
+    if settings.db_prepared_statements is not None:
+        return settings.db_prepared_statements
+    return urlparse(dsn).port != _TRANSACTION_POOLER_PORT
+
+
+def connection_factory(dsn: str) -> type:
+    """psycopg2 connection class for a pool on `dsn`; plain connections never prepare."""
+    return PreparingConnection if prepared_statements_enabled(dsn) else psycopg2.extensions.connection
+
+
+def prepared_statement(name: str, sql: str) -> str:
+    """Register a hot statement under `name` and return the name for use with `execute_prepared`."""
+    existing = _STATEMENTS.get(name)
+    if existing is not None and existing != sql:
+        raise ValueError(f"Prepared statement {name!r} is already registered with different SQL")
+    _STATEMENTS[name] = sql
+    return name
+
+
+def _to_positional(sql: str) -> str:
+    """Rewrite psycopg `%s` placeholders to the `$n` form PREPARE expects."""
+    counter = 0
+
+    def _replace(match: re.Match) -> str:
+        nonlocal counter
+        if match.group(0) == "%%":
+            return "%"
+        counter += 1
+        return f"${counter}"
+
+    return re.sub(r"%%|%s", _replace, sql).rstrip().rstrip(";")
+
+
+def execute_prepared(cur, name: str, params: Optional[Sequence[Any]] = None):
+    """
+    Run a registered statement on a psycopg2 cursor. The statement is prepared
+    the first time a pooled connection sees it and executed by name afterwards.
+    """
+    sql = _STATEMENTS[name]
+    params = tuple(params or ())
+    prepared = getattr(cur.connection, "prepared_statements", None)
+    if not isinstance(prepared, set):
+        cur.execute(sql, params)
+        return
+
+    if name not in prepared:
+        cur.execute(f"PREPARE {name} AS {_to_positional(sql)}")
+        prepared.add(name)
+
+    try:
+        if params:
+            cur.execute(f"EXECUTE {name} ({', '.join(['%s'] * len(params))})", params)
+        else:
+            cur.execute(f"EXECUTE {name}")
+    except psycopg2.errors.InvalidSqlStatementName:
+        # The server session lost the statement (e.g. it was reset); prepare
+        # again on the next call once the caller has rolled back.
+        prepared.discard(name)
+        raise
+
+
+async def async_execute_prepared(cur, name: str, params: Optional[Sequence[Any]] = None):
+    """Async counterpart of `execute_prepared`; psycopg keeps the per-connection statement cache."""
+    await cur.execute(_STATEMENTS[name], params, prepare=cur.connection.prepare_threshold is not None)
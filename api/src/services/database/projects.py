@@ -5,15 +5,13 @@ from fastapi import HTTPException, Depends
 from routers.auth import get_current_user_optional
 from routers.auth import get_current_user
 from services.database.users import get_or_create_user
-import psycopg2
-import psycopg2.extras
 
-from services.database.database import _get_conn
-from services.database.database import _put_conn
+from services.database.database import db_cursor, async_db_cursor
 from services.database.database import router as db_router, SafeId
 from services.database.id_generator import _generator
 from services.database.buckets import DatabaseBucket
 from services.database.tasks import DatabaseTask
+from services.database.prepared import prepared_statement, async_execute_prepared
 
 class DatabaseProject(BaseModel):
     id: Optional[SafeId] = None
@@ -30,79 +28,59 @@ class BoardResponse(BaseModel):
 
 @db_router.post("/projects")
 def db_create_project(project: DatabaseProject, current_user: dict | None = Depends(get_current_user_optional)):
-    conn = _get_conn()
-    cur = None
-    try:
-        cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-
-        mapping = {
-            "id": _generator.generate(),
-            "name": project.name,
-            "gh_repo_url": project.gh_repo_url,
-            "description": project.description,
-        }
-
-        columns = []
-        placeholders = []
-        params = []
-        for k, v in mapping.items():
-            if v is not None:
-                columns.append(k)
-                placeholders.append("%s")
-                params.append(v)
-
-        if not columns:
-            raise HTTPException(status_code=400, detail="No data provided for insert")
-        
-        cols_sql = ", ".join(columns)
-        vals_sql = ", ".join(placeholders)
-        sql = f"INSERT INTO public.projects ({cols_sql}) VALUES ({vals_sql}) RETURNING id, name, gh_repo_url, description, created_at, updated_at;"
-
-        cur.execute(sql, params)
-        row = cur.fetchone()
-        if row is None:
-            conn.rollback()
-            raise HTTPException(status_code=500, detail="Failed to create project")
-        
-        # Initialize default "AI Drafts" bucket
-        project_id = row["id"]
-        bucket_id = _generator.generate()
-        cur.execute(
-            "INSERT INTO public.buckets (id, project_id, name, state, is_system_locked, order_idx) "
-            "VALUES (%s, %s, %s, %s, %s, %s);",
-            (bucket_id, project_id, "AI Drafts", "DRAFT", True, 0)
-        )
+    mapping = {
+        "id": _generator.generate(),
+        "name": project.name,
+        "gh_repo_url": project.gh_repo_url,
+        "description": project.description,
+    }
+
+    columns = []
+    placeholders = []
+    params = []
+    for k, v in mapping.items():
+        if v is not None:
+            columns.append(k)
+            placeholders.append("%s")
+            params.append(v)
+
+    if not columns:
+        raise HTTPException(status_code=400, detail="No data provided for insert")
+    
+    cols_sql = ", ".join(columns)
+    vals_sql = ", ".join(placeholders)
+    sql = f"INSERT INTO public.projects ({cols_sql}) VALUES ({vals_sql}) RETURNING id, name, gh_repo_url, description, created_at, updated_at;"
 
-        conn.commit()
+    try:
+        with db_cursor(commit=True) as cur:
+            cur.execute(sql, params)
+            row = cur.fetchone()
+            if row is None:
+                raise HTTPException(status_code=500, detail="Failed to create project")
+            
+            # Initialize default "AI Drafts" bucket
+            project_id = row["id"]
+            bucket_id = _generator.generate()
+            cur.execute(
+                "INSERT INTO public.buckets (id, project_id, name, state, is_system_locked, order_idx) "
+                "VALUES (%s, %s, %s, %s, %s, %s);",
+                (bucket_id, project_id, "AI Drafts", "DRAFT", True, 0)
+            )
         return row
     except HTTPException:
-        conn.rollback()
         raise
     except Exception as e:
-        conn.rollback()
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        if cur is not None:
-            cur.close()
-        _put_conn(conn)
 
 
 
 @db_router.get("/projects")
-def db_get_projects():
-    conn = _get_conn()
-    cur = None
-    try:
-        cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-        cur.execute(
+async def db_get_projects():
+    async with async_db_cursor() as cur:
+        await cur.execute(
             "SELECT id, name, gh_repo_url, description, created_at, updated_at FROM public.projects;"
         )
-        rows = cur.fetchall()
-        return rows
-    finally:
-        if cur is not None:
-            cur.close()
-        _put_conn(conn)
+        return await cur.fetchall()
 
 
 @db_router.get("/projects/mine")
@@ -111,16 +89,15 @@ def db_get_projects_for_current_user(current_user: dict = Depends(get_current_us
     Ensures a DB user record exists for the GitHub user via `get_or_create_user` and then
     looks up project_member rows to find project ids and returns those projects.
     """
-    conn = _get_conn()
-    cur = None
-    try:
-        db_user = get_or_create_user(int(current_user.get("id", 0) or 0), current_user.get("email"), current_user.get("login"), current_user.get("name"))
-        if not db_user:
-            raise HTTPException(status_code=404, detail="DB user not found")
+    # Resolve the DB user before checking out our own connection so the
+    # request never holds two pool slots at once.
+    db_user = get_or_create_user(int(current_user.get("id", 0) or 0), current_user.get("email"), current_user.get("login"), current_user.get("name"))
+    if not db_user:
+        raise HTTPException(status_code=404, detail="DB user not found")
 
-        db_user_id = db_user.get("id")
+    db_user_id = db_user.get("id")
 
-        cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+    with db_cursor() as cur:
         cur.execute(
             "SELECT project_id FROM public.project_member WHERE user_id = %s",
             (db_user_id,)
@@ -135,198 +112,159 @@ def db_get_projects_for_current_user(current_user: dict = Depends(get_current_us
             "SELECT id, name, gh_repo_url, description, created_at, updated_at FROM public.projects WHERE id = ANY(%s);",
             (project_ids,)
         )
-        projects = cur.fetchall()
-        return projects
-    finally:
-        if cur is not None:
-            cur.close()
-        _put_conn(conn)
+        return cur.fetchall()
 
 
 @db_router.get("/projects/{project_id}")
-def db_get_project_by_id(project_id: int):
-    conn = _get_conn()
-    cur = None
-    try:
-        cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-        cur.execute(
+async def db_get_project_by_id(project_id: int):
+    async with async_db_cursor() as cur:
+        await cur.execute(
             "SELECT id, name, gh_repo_url, description, created_at, updated_at FROM public.projects WHERE id = %s LIMIT 1;",
             (project_id,),
         )
-        row = cur.fetchone()
-        if row is None:
-            raise HTTPException(status_code=404, detail="Project not found")
-        return row
-    finally:
-        if cur is not None:
-            cur.close()
-        _put_conn(conn)
+        row = await cur.fetchone()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return row
 
 
 @db_router.put("/projects/{project_id}")
 def db_update_project(project_id: int, project_data: DatabaseProject):
-    conn = _get_conn()
-    cur = None
-    try:
-        cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-        
-        update_data = project_data.dict(exclude_unset=True)
-        # Exclude fields that should not be updated manually
-        for field in ["id", "created_at", "updated_at"]:
-            update_data.pop(field, None)
-            
-        if not update_data:
-            raise HTTPException(status_code=400, detail="No data provided for update")
-        
-        set_clause = ", ".join([f"{k} = %s" for k in update_data.keys()])
-        params = list(update_data.values())
-        params.append(project_id)
-        
-        sql = f"UPDATE public.projects SET {set_clause}, updated_at = NOW() WHERE id = %s RETURNING id, name, gh_repo_url, description, created_at, updated_at;"
+    update_data = project_data.dict(exclude_unset=True)
+    # Exclude fields that should not be updated manually
+    for field in ["id", "created_at", "updated_at"]:
+        update_data.pop(field, None)
         
+    if not update_data:
+        raise HTTPException(status_code=400, detail="No data provided for update")
+    
+    set_clause = ", ".join([f"{k} = %s" for k in update_data.keys()])
+    params = list(update_data.values())
+    params.append(project_id)
+    
+    sql = f"UPDATE public.projects SET {set_clause}, updated_at = NOW() WHERE id = %s RETURNING id, name, gh_repo_url, description, created_at, updated_at;"
+    
+    with db_cursor(commit=True) as cur:
         cur.execute(sql, params)
-        conn.commit()
         row = cur.fetchone()
-        if row is None:
-            raise HTTPException(status_code=404, detail="Project not found")
-        return row
-    finally:
-        if cur is not None:
-            cur.close()
-        _put_conn(conn)
+    if row is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return row
 
 
 @db_router.delete("/projects/{project_id}")
 def db_delete_project(project_id: int):
     """Delete a project and its associated members."""
-    conn = _get_conn()
-    cur = None
-    try:
-        cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-        
+    with db_cursor(commit=True) as cur:
         # Hard delete the project and all its members
         cur.execute("DELETE FROM public.project_member WHERE project_id = %s;", (project_id,))
         cur.execute("DELETE FROM public.projects WHERE id = %s RETURNING id;", (project_id,))
         row = cur.fetchone()
         if row is None:
-            conn.rollback()
             raise HTTPException(status_code=404, detail="Project not found")
-        conn.commit()
-        return {"id": project_id, "status": "deleted"}
-    finally:
-        if cur is not None:
-            cur.close()
-        _put_conn(conn)
+    return {"id": project_id, "status": "deleted"}
 
 
 # ---------------------------------------------------------------------------
 # GET /projects/{project_id}/board  — Kanban Data Contract
 # Returns ONLY the fields the UI needs. No description, no branch_name.
 # ---------------------------------------------------------------------------
-@db_router.get("/projects/{project_id}/board", response_model=BoardResponse)
-def db_get_project_board_data(project_id: int):
-    conn = _get_conn()
-    cur = None
-    try:
-        cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+_BOARD_BUCKETS = prepared_statement(
+    "board_buckets",
+    "SELECT id, name, state, order_idx, is_system_locked "
+    "FROM public.buckets WHERE project_id = %s "
+    "ORDER BY order_idx ASC;",
+)
+_BOARD_TASKS = prepared_statement(
+    "board_tasks",
+    "SELECT id, bucket_id, title, type, weight, "
+    "lead_assignee_id, suggested_assignee_id, last_activity_at, order_idx "
+    "FROM public.tasks WHERE project_id = %s "
+    "ORDER BY order_idx ASC;",
+)
 
-        cur.execute(
-            "SELECT id, name, state, order_idx, is_system_locked "
-            "FROM public.buckets WHERE project_id = %s "
-            "ORDER BY order_idx ASC;",
-            (project_id,)
-        )
-        buckets = cur.fetchall()
 
-        cur.execute(
-            "SELECT id, bucket_id, title, type, weight, "
-            "lead_assignee_id, suggested_assignee_id, last_activity_at, order_idx "
-            "FROM public.tasks WHERE project_id = %s "
-            "ORDER BY order_idx ASC;",
-            (project_id,)
-        )
-        tasks = cur.fetchall()
+@db_router.get("/projects/{project_id}/board", response_model=BoardResponse)
+async def db_get_project_board_data(project_id: int):
+    async with async_db_cursor(readonly=True) as cur:
+        await async_execute_prepared(cur, _BOARD_BUCKETS, (project_id,))
+        buckets = await cur.fetchall()
 
-        return {
-            "buckets": [DatabaseBucket(**b) for b in buckets],
-            "tasks": [DatabaseTask(**t) for t in tasks]
-        }
-    finally:
-        if cur is not None:
-            cur.close()
-        _put_conn(conn)
+        await async_execute_prepared(cur, _BOARD_TASKS, (project_id,))
+        tasks = await cur.fetchall()
+
+    return {
+        "buckets": [DatabaseBucket(**b) for b in buckets],
+        "tasks": [DatabaseTask(**t) for t in tasks]
+    }
 
 
 # ---------------------------------------------------------------------------
 # GET /projects/{project_id}/dashboard  — Command Center Data Contract
 # ---------------------------------------------------------------------------
-@db_router.get("/projects/{project_id}/dashboard")
-def db_get_project_dashboard_data(project_id: int):
-    conn = _get_conn()
-    cur = None
-    try:
-        cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+# Members — join to get alias from users
+_DASHBOARD_MEMBERS = prepared_statement(
+    "dashboard_members",
+    "SELECT pm.user_id, u.display_name AS alias, pm.role, pm.kpi_score, pm.current_load "
+    "FROM public.project_member pm "
+    "JOIN public.users u ON pm.user_id = u.id "
+    "WHERE pm.project_id = %s;",
+)
+# Activity — last 20 entries
+_DASHBOARD_ACTIVITIES = prepared_statement(
+    "dashboard_activities",
+    "SELECT id, user_name, action, target, created_at "
+    "FROM public.activities WHERE project_id = %s "
+    "ORDER BY created_at DESC LIMIT 20;",
+)
+# Metrics — calculated from task distribution
+_DASHBOARD_PROGRESS = prepared_statement(
+    "dashboard_progress",
+    "SELECT "
+    "  COUNT(*) FILTER (WHERE b.state = 'COMPLETED') AS completed, "
+    "  COUNT(*) AS total "
+    "FROM public.tasks t "
+    "JOIN public.buckets b ON t.bucket_id = b.id "
+    "WHERE t.project_id = %s;",
+)
 
-        # Members — join to get alias from users
-        cur.execute(
-            "SELECT pm.user_id, u.display_name AS alias, pm.role, pm.kpi_score, pm.current_load "
-            "FROM public.project_member pm "
-            "JOIN public.users u ON pm.user_id = u.id "
-            "WHERE pm.project_id = %s;",
-            (project_id,)
-        )
-        members = cur.fetchall()
-        # Cast Decimal to float for JSON serialization safety
-        for m in members:
-            if m["kpi_score"] is not None:
-                m["kpi_score"] = float(m["kpi_score"])
-            if m["current_load"] is not None:
-                m["current_load"] = float(m["current_load"])
-
-        # Activity — last 20 entries
-        cur.execute(
-            "SELECT id, user_name, action, target, created_at "
-            "FROM public.activities WHERE project_id = %s "
-            "ORDER BY created_at DESC LIMIT 20;",
-            (project_id,)
-        )
-        activities = cur.fetchall()
 
-        # Metrics — calculated from task distribution
-        cur.execute(
-            "SELECT "
-            "  COUNT(*) FILTER (WHERE b.state = 'COMPLETED') AS completed, "
-            "  COUNT(*) AS total "
-            "FROM public.tasks t "
-            "JOIN public.buckets b ON t.bucket_id = b.id "
-            "WHERE t.project_id = %s;",
-            (project_id,)
-        )
-        row = cur.fetchone()
-        completed = row["completed"] if row else 0
-        total = row["total"] if row else 1
-        progress = round((completed / max(total, 1)) * 100)
-
-        metrics = [
-            {
-                "label": "Task Completion",
-                "value": f"{completed}/{total}",
-                "progress": progress,
-                "status": "ON_TRACK" if progress >= 50 else "AT_RISK",
-                "target_label": "100% by deadline",
-            }
-        ]
-
-        from services.database.users import DatabaseUser
-        return {
-            "members": members, # members already handled with floats above, but could map to a PM model if needed
-            "metrics": metrics,
-            "activity": activities
+@db_router.get("/projects/{project_id}/dashboard")
+async def db_get_project_dashboard_data(project_id: int):
+    async with async_db_cursor(readonly=True) as cur:
+        await async_execute_prepared(cur, _DASHBOARD_MEMBERS, (project_id,))
+        members = await cur.fetchall()
+
+        await async_execute_prepared(cur, _DASHBOARD_ACTIVITIES, (project_id,))
+        activities = await cur.fetchall()
+
+        await async_execute_prepared(cur, _DASHBOARD_PROGRESS, (project_id,))
+        row = await cur.fetchone()
+
+    # Cast Decimal to float for JSON serialization safety
+    for m in members:
+        if m["kpi_score"] is not None:
+            m["kpi_score"] = float(m["kpi_score"])
+        if m["current_load"] is not None:
+            m["current_load"] = float(m["current_load"])
+
+    completed = row["completed"] if row else 0
+    total = row["total"] if row else 1
+    progress = round((completed / max(total, 1)) * 100)
+
+    metrics = [
+        {
+            "label": "Task Completion",
+            "value": f"{completed}/{total}",
+            "progress": progress,
+            "status": "ON_TRACK" if progress >= 50 else "AT_RISK",
+            "target_label": "100% by deadline",
         }
-    finally:
-        if cur is not None:
-            cur.close()
-        _put_conn(conn)
-
+    ]
 
+    return {
+        "members": members, # members already handled with floats above, but could map to a PM model if needed
+        "metrics": metrics,
+        "activity": activities
+    }
 
@@ -0,0 +1,66 @@
+import time
+from http.cookies import SimpleCookie
+
+from config import settings
+from services.database.pool_monitor import current_request_scope
+
+# Set on responses to writes; while it is valid the client's reads skip the replica.
+WROTE_AT_COOKIE = "lunaris_wrote_until"
+
+_SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+def _cookie(scope: dict, name: str):
+    for key, value in scope.get("headers") or []:
+        if key == b"cookie":
+            morsel = SimpleCookie(value.decode("latin-1")).get(name)
+            if morsel is not None:
+                return morsel.value
+    return None
+
+
+def recently_wrote() -> bool:
+    """True when the current request comes from a client still inside its read-your-writes window."""
+    scope = current_request_scope()
+    if scope is None:
+        return False
+    if scope.get("method") not in _SAFE_METHODS:
+        return True
+    value = _cookie(scope, WROTE_AT_COOKIE)
+    if value is None:
+        return False
+    try:
+        return float(value) > time.time()
+    except ValueError:
+        return False
+
+
+class ReadYourWritesMiddleware:
+    """
+    Pure ASGI middleware that marks clients after a successful write, so their
+    reads go to the primary until the replica has had time to catch up.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope.get("method") in _SAFE_METHODS
+            or not settings.postgresql_replica_url
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                window = settings.db_read_your_writes_seconds
+                cookie = (
+                    f"{WROTE_AT_COOKIE}={time.time() + window:.3f}; "
+                    f"Max-Age={int(window) + 1}; Path=/; HttpOnly; SameSite=Lax"
+                )
+                message = {**message, "headers": [*message.get("headers", []), (b"set-cookie", cookie.encode("latin-1"))]}
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
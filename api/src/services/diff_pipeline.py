@@ -0,0 +1,169 @@
+import re
+from collections import Counter as Tally
+from typing import Optional
+
+from prometheus_client import Counter, Histogram
+
+# Files whose diffs say nothing about whether a contract was fulfilled
+_LOCKFILES = {
+    "package-lock.json", "npm-shrinkwrap.json", "yarn.lock", "pnpm-lock.yaml", "bun.lockb",
+    "poetry.lock", "pipfile.lock", "uv.lock", "pdm.lock", "cargo.lock", "go.sum",
+    "composer.lock", "gemfile.lock", "podfile.lock", "packages.lock.json", "flake.lock",
+}
+_GENERATED = re.compile(
+    r"(^|/)(dist|build|out|coverage|vendor|node_modules|__pycache__|\.next|\.nuxt)/"
+    r"|\.min\.(js|css)$|\.map$|\.snap$|_pb2(_grpc)?\.pyi?$|\.pb\.go$|\.generated\.|\.g\.dart$"
+)
+_DIFF_HEADER = re.compile(r"^diff --git a/(.+?) b/(.+)$", re.MULTILINE)
+_WORD = re.compile(r"[a-z0-9]+")
+_STOPWORDS = {
+    "the", "and", "for", "with", "that", "this", "from", "into", "are", "will", "should", "must",
+    "not", "all", "can", "use", "add", "new", "src", "app", "api", "lib", "test", "tests", "index",
+    "main", "md", "py", "js", "ts", "tsx", "jsx", "json", "yaml", "yml", "tasks", "design", "openspec",
+    "changes", "file", "files",
+}
+
+DIFF_BYTES = Histogram(
+    "pr_diff_bytes",
+    "Size of PR diffs before and after stripping lockfile, generated and binary hunks.",
+    ["stage"],
+    buckets=(1e3, 1e4, 5e4, 1e5, 2.5e5, 5e5, 1e6, 5e6),
+)
+DIFF_FILES_DROPPED = Counter("pr_diff_files_dropped_total", "PR diff files left out of evaluation, by reason.", ["reason"])
+
+
+class FileDiff:
+    __slots__ = ("path", "text")
+
+    def __init__(self, path: str, text: str):
+        self.path = path
+        self.text = text
+
+
+def split_diff(diff_text: str) -> list[FileDiff]:
+    """Split a unified git diff into one FileDiff per `diff --git` section."""
+    headers = list(_DIFF_HEADER.finditer(diff_text))
+    if not headers:
+        return [FileDiff("", diff_text)] if diff_text.strip() else []
+    files = []
+    for i, header in enumerate(headers):
+        end = headers[i + 1].start() if i + 1 < len(headers) else len(diff_text)
+        files.append(FileDiff(header.group(2), diff_text[header.start():end]))
+    return files
+
+
+def _noise_reason(file: FileDiff) -> Optional[str]:
+    name = file.path.rsplit("/", 1)[-1].lower()
+    if name in _LOCKFILES:
+        return "lockfile"
+    if _GENERATED.search(file.path.lower()):
+        return "generated"
+    head = file.text[:2000]
+    if "\nGIT binary patch\n" in head or re.search(r"^Binary files .* differ$", head, re.MULTILINE):
+        return "binary"
+    return None
+
+
+def prepare_diff(diff_text: str) -> list[FileDiff]:
+    """The files of `diff_text` worth reviewing: lockfiles, generated and binary diffs are dropped."""
+    kept = []
+    for file in split_diff(diff_text):
+        reason = _noise_reason(file)
+        if reason is None:
+            kept.append(file)
+        else:
+            DIFF_FILES_DROPPED.labels(reason).inc()
+    DIFF_BYTES.labels("raw").observe(len(diff_text))
+    DIFF_BYTES.labels("prepared").observe(sum(len(f.text) for f in kept))
+    return kept
+
+
+def _words(text: str) -> set[str]:
+    return {w for w in _WORD.findall(text.lower()) if len(w) > 2 and w not in _STOPWORDS}
+
+
+def rank_contracts(contracts: dict[str, str], files: list[FileDiff]) -> list[tuple[str, float]]:
+    """
+    Score each change folder (name -> concatenated tasks.md/design.md) by word
+    overlap with the changed paths and the diff's added lines. Words in the
+    folder name count more than words in its documents. Best first.
+    """
+    path_words = Tally(w for f in files for w in _words(f.path.replace("_", " ").replace("-", " ")))
+    added = " ".join(line[1:] for f in files for line in f.text.splitlines() if line.startswith("+") and not line.startswith("+++"))
+    diff_words = _words(added) | set(path_words)
+
+    ranked = []
+    for name, text in contracts.items():
+        name_words = _words(name.replace("_", " ").replace("-", " "))
+        doc_words = _words(text)
+        score = 3.0 * sum(path_words[w] for w in name_words) + len(name_words & diff_words)
+        score += len(doc_words & set(path_words)) + 0.1 * len(doc_words & diff_words)
+        ranked.append((name, score))
+    ranked.sort(key=lambda item: item[1], reverse=True)
+    return ranked
+
+
+def select_contracts(contracts: dict[str, str], files: list[FileDiff]) -> list[str]:
+    """
+    The change folder(s) to send with the diff: the best match when it clearly
+    leads, the tied leaders otherwise, and every folder when nothing matches.
+    """
+    ranked = rank_contracts(contracts, files)
+    if not ranked or ranked[0][1] <= 0:
+        return list(contracts)
+    best = ranked[0][1]
+    return [name for name, score in ranked if score >= best * 0.8]
+
+
+def chunk_files(files: list[FileDiff], max_chars: int) -> list[str]:
+    """
+    Pack file diffs into chunks of at most `max_chars`, keeping files whole
+    where possible. A single oversized file is split between hunks.
+    """
+    pieces = []
+    for file in files:
+        if len(file.text) <= max_chars:
+            pieces.append(file.text)
+            continue
+        header, *hunks = re.split(r"(?m)^(?=@@ )", file.text)
+        current = header
+        for hunk in hunks:
+            if len(current) + len(hunk) > max_chars and current != header:
+                pieces.append(current)
+                current = header
+            # A single hunk larger than a chunk is cut short rather than dropped
+            current += hunk[:max(max_chars - len(header), max_chars // 2)]
+        pieces.append(current)
+
+    chunks, current = [], ""
+    for piece in pieces:
+        if current and len(current) + len(piece) > max_chars:
+            chunks.append(current)
+            current = ""
+        current += piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def merge_verdicts(results: list[Optional[dict]], contract: str) -> dict:
+    """
+    Combine per-chunk verdicts: PASS only when every chunk was evaluated and
+    passed. Chunks that could not be evaluated are reported, never assumed fine.
+    """
+    evaluated = [r for r in results if r is not None]
+    failed = [r for r in evaluated if r.get("verdict") != "PASS"]
+    missing = len(results) - len(evaluated)
+
+    identified = Tally(r.get("identified_contract") for r in evaluated if r.get("identified_contract"))
+    sections = [
+        f"### Part {i}/{len(results)}\n{r.get('feedback', 'No feedback provided.')}"
+        for i, r in enumerate(results, 1) if r is not None
+    ]
+    if missing:
+        sections.append(f"⚠️ {missing} of {len(results)} parts of the diff could not be evaluated.")
+    return {
+        "identified_contract": identified.most_common(1)[0][0] if identified else contract,
+        "verdict": "PASS" if not failed and not missing else "FAIL",
+        "feedback": "\n\n".join(sections),
+    }
@@ -0,0 +1,101 @@
+import asyncio
+import contextvars
+import functools
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, TypeVar
+
+from prometheus_client import Gauge, Histogram
+
+from config import settings
+
+logger = logging.getLogger("uvicorn.error")
+
+T = TypeVar("T")
+
+BLOCKING_CALLS_IN_FLIGHT = Gauge(
+    "blocking_executor_calls",
+    "Blocking calls submitted to the executor, queued or running.",
+)
+LOOP_LAG_SECONDS = Histogram(
+    "event_loop_lag_seconds",
+    "How late the event loop woke up a timer, i.e. how long something blocked it.",
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+
+# Dedicated to our own blocking calls so they neither starve nor are starved by
+# the threadpool Starlette runs sync routes in
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.blocking_executor_workers,
+                thread_name_prefix="blocking",
+            )
+        return _executor
+
+
+async def run_blocking(fn: Callable[..., T], *args, **kwargs) -> T:
+    """
+    Run a blocking call (PyGithub, psycopg2) on the bounded executor and await
+    its result, keeping the event loop free. Context variables, such as the
+    request scope used by the pool monitor, are carried into the thread.
+    """
+    loop = asyncio.get_running_loop()
+    call = functools.partial(contextvars.copy_context().run, fn, *args, **kwargs)
+    BLOCKING_CALLS_IN_FLIGHT.inc()
+    try:
+        return await loop.run_in_executor(_get_executor(), call)
+    finally:
+        BLOCKING_CALLS_IN_FLIGHT.dec()
+
+
+def shutdown_executor():
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True)
+
+
+class LoopLagMonitor:
+    """
+    Sleeps `interval` seconds in a loop and measures how late it wakes up. Any
+    lateness is time some callback held the loop without yielding; above
+    `warn_after` it is logged. Run with PYTHONASYNCIODEBUG=1 to also have
+    asyncio name the slow callback.
+    """
+
+    def __init__(self, interval: float, warn_after: float):
+        self.interval = interval
+        self.warn_after = warn_after
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        loop = asyncio.get_running_loop()
+        # In debug mode asyncio itself names the offending callback
+        loop.slow_callback_duration = self.warn_after
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def _run(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - started - self.interval)
+            LOOP_LAG_SECONDS.observe(lag)
+            if lag >= self.warn_after:
+                logger.warning(f"Event loop blocked for {lag * 1000:.0f} ms")
@@ -0,0 +1,52 @@
+import asyncio
+import logging
+from typing import BinaryIO, Optional
+
+from google.genai import types
+
+from services.http_clients import gemini_client
+
+logger = logging.getLogger("uvicorn.error")
+
+# Video is transcoded by Gemini after upload and cannot be referenced until ACTIVE
+_PROCESSING_POLL_SECONDS = 2.0
+_PROCESSING_TIMEOUT_SECONDS = 600.0
+
+
+async def upload_media(stream: BinaryIO, mime_type: str, display_name: Optional[str] = None) -> types.File:
+    """
+    Upload a recording to the Gemini File API from an open file object. The
+    SDK uses the resumable protocol and sends it in chunks, so memory use does
+    not grow with the recording. Returns once the file is ready to reference.
+    """
+    client = gemini_client()
+    uploaded = await client.aio.files.upload(
+        file=stream,
+        config=types.UploadFileConfig(mime_type=mime_type, display_name=display_name),
+    )
+
+    waited = 0.0
+    while uploaded.state == types.FileState.PROCESSING:
+        if waited >= _PROCESSING_TIMEOUT_SECONDS:
+            await delete_media(uploaded)
+            raise TimeoutError(f"Gemini is still processing {uploaded.name} after {waited:.0f}s")
+        await asyncio.sleep(_PROCESSING_POLL_SECONDS)
+        waited += _PROCESSING_POLL_SECONDS
+        uploaded = await client.aio.files.get(name=uploaded.name)
+
+    if uploaded.state == types.FileState.FAILED:
+        await delete_media(uploaded)
+        raise RuntimeError(f"Gemini could not process {uploaded.name}: {uploaded.error}")
+    return uploaded
+
+
+def media_part(uploaded: types.File) -> types.Part:
+    return types.Part.from_uri(file_uri=uploaded.uri, mime_type=uploaded.mime_type)
+
+
+async def delete_media(uploaded: types.File):
+    """Delete an uploaded file now instead of letting it sit until Gemini expires it (48 h)."""
+    try:
+        await gemini_client().aio.files.delete(name=uploaded.name)
+    except Exception as e:
+        logger.warning(f"Failed to delete Gemini file {uploaded.name}: {e}")
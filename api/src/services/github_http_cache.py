@@ -0,0 +1,213 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import secrets
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+import httpx
+from prometheus_client import Counter, Gauge
+
+from config import settings
+from services.http_clients import http_client
+
+logger = logging.getLogger("uvicorn.error")
+
+GITHUB_CACHE_REQUESTS = Counter(
+    "github_http_cache_requests_total",
+    "GitHub REST GETs through the conditional-request cache, by result "
+    "(not_modified, modified, miss, uncacheable).",
+    ["result"],
+)
+GITHUB_CACHE_BYTES = Gauge("github_http_cache_bytes", "Response bytes held in the in-memory GitHub cache.")
+
+# Headers worth replaying from a cached response
+_KEPT_HEADERS = ("content-type", "etag", "last-modified", "link")
+
+
+class _Entry:
+    __slots__ = ("etag", "last_modified", "headers", "body")
+
+    def __init__(self, etag: Optional[str], last_modified: Optional[str], headers: dict, body: bytes):
+        self.etag = etag
+        self.last_modified = last_modified
+        self.headers = headers
+        self.body = body
+
+    @property
+    def size(self) -> int:
+        return len(self.body)
+
+
+class GitHubResponseCache:
+    """
+    Byte-bounded LRU of GitHub GET responses carrying an ETag or Last-Modified.
+    With `disk_dir` set, entries are also written to disk so a restart
+    revalidates (304, free against the rate limit) instead of re-downloading.
+    """
+
+    def __init__(self, max_bytes: int, disk_dir: Optional[str] = None, disk_max_bytes: int = 0):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._disk_dir = Path(disk_dir) if disk_dir else None
+        self._disk_max_bytes = disk_max_bytes
+        # Bytes of bodies on disk; scanned once, then kept up to date by writes
+        self._disk_bytes: Optional[int] = None
+        self._disk_lock = threading.Lock()
+        if self._disk_dir is not None:
+            self._disk_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def key(url: str, params: Optional[dict], accept: Optional[str]) -> str:
+        raw = json.dumps([url, sorted((params or {}).items()), accept or ""], default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[_Entry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+        entry = self._read_disk(key)
+        if entry is not None:
+            self._put_memory(key, entry)
+        return entry
+
+    def put(self, key: str, entry: _Entry):
+        if entry.size > self.max_bytes:
+            return
+        self._put_memory(key, entry)
+        self._write_disk(key, entry)
+
+    def _put_memory(self, key: str, entry: _Entry):
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous.size
+            self._entries[key] = entry
+            self._bytes += entry.size
+            while self._bytes > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+            GITHUB_CACHE_BYTES.set(self._bytes)
+
+    def _read_disk(self, key: str) -> Optional[_Entry]:
+        if self._disk_dir is None:
+            return None
+        meta_path = self._disk_dir / f"{key}.json"
+        body_path = self._disk_dir / f"{key}.body"
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            body = body_path.read_bytes()
+        except (OSError, ValueError):
+            return None
+        return _Entry(meta.get("etag"), meta.get("last_modified"), meta.get("headers", {}), body)
+
+    def _write_disk(self, key: str, entry: _Entry):
+        if self._disk_dir is None:
+            return
+        body_path = self._disk_dir / f"{key}.body"
+        # Unique per write, so two workers storing the same key never write into each other's file
+        suffix = f"{os.getpid()}.{secrets.token_hex(4)}.tmp"
+        tmp = None
+        try:
+            try:
+                previous = body_path.stat().st_size
+            except FileNotFoundError:
+                previous = 0
+            # Body first and via rename, so a crash never leaves metadata pointing at a partial body
+            tmp = self._disk_dir / f"{key}.body.{suffix}"
+            tmp.write_bytes(entry.body)
+            os.replace(tmp, body_path)
+            tmp = self._disk_dir / f"{key}.json.{suffix}"
+            tmp.write_text(
+                json.dumps({"etag": entry.etag, "last_modified": entry.last_modified, "headers": entry.headers}),
+                encoding="utf-8",
+            )
+            os.replace(tmp, self._disk_dir / f"{key}.json")
+            self._track_disk(entry.size - previous)
+        except OSError as e:
+            if tmp is not None:
+                tmp.unlink(missing_ok=True)
+            logger.warning(f"GitHub cache disk write failed: {e}")
+
+    def _track_disk(self, delta: int):
+        if not self._disk_max_bytes:
+            return
+        with self._disk_lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = sum(size for _, size, _ in self._scan_disk())
+            else:
+                self._disk_bytes += delta
+            if self._disk_bytes > self._disk_max_bytes:
+                self._disk_bytes = self._prune_disk()
+
+    def _scan_disk(self) -> list:
+        bodies = []
+        for path in self._disk_dir.glob("*.body"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            bodies.append((stat.st_mtime, stat.st_size, path))
+        return bodies
+
+    def _prune_disk(self) -> int:
+        """Delete the oldest bodies until the directory fits; returns the bytes left."""
+        bodies = self._scan_disk()
+        total = sum(size for _, size, _ in bodies)
+        for _, size, path in sorted(bodies):
+            if total <= self._disk_max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            path.with_suffix(".json").unlink(missing_ok=True)
+            total -= size
+        return total
+
+github_response_cache = GitHubResponseCache(
+    max_bytes=settings.github_cache_max_bytes,
+    disk_dir=settings.github_cache_dir,
+    disk_max_bytes=settings.github_cache_disk_max_bytes,
+)
+
+
+async def github_get(url: str, headers: dict, params: Optional[dict] = None) -> httpx.Response:
+    """
+    GET a GitHub REST URL through the conditional-request cache. A 304 is
+    turned back into the cached 200 response, so callers never see it.
+    """
+    accept = headers.get("Accept")
+    key = GitHubResponseCache.key(url, params, accept)
+    entry = await asyncio.to_thread(github_response_cache.get, key)
+
+    request_headers = dict(headers)
+    if entry is not None:
+        if entry.etag:
+            request_headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            request_headers["If-Modified-Since"] = entry.last_modified
+
+    response = await http_client("github").get(url, headers=request_headers, params=params)
+
+    if response.status_code == 304 and entry is not None:
+        GITHUB_CACHE_REQUESTS.labels("not_modified").inc()
+        return httpx.Response(200, headers=entry.headers, content=entry.body, request=response.request)
+
+    etag = response.headers.get("etag")
+    last_modified = response.headers.get("last-modified")
+    if response.status_code != 200 or not (etag or last_modified):
+        GITHUB_CACHE_REQUESTS.labels("uncacheable").inc()
+        return response
+
+    GITHUB_CACHE_REQUESTS.labels("modified" if entry is not None else "miss").inc()
+    kept = {name: response.headers[name] for name in _KEPT_HEADERS if name in response.headers}
+    await asyncio.to_thread(
+        github_response_cache.put, key, _Entry(etag, last_modified, kept, response.content)
+    )
+    return response
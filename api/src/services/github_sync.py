@@ -1,9 +1,9 @@
 import logging
 import re
 from github import Github, Auth
-from services.database.database import _get_conn, _put_conn
-import psycopg2.extras
+from services.database.database import db_cursor
 from github_app import get_github_client
+from services.executors import run_blocking
 
 logger = logging.getLogger("uvicorn.error")
 
@@ -13,46 +13,53 @@ def slugify(text: str) -> str:
     text = re.sub(r'[^a-z0-9]+', '-', text)
     return text.strip('-')
 
-def sync_task_to_github_branch(task_id: int, new_bucket_id: int):
-    conn = _get_conn()
-    cur = None
+async def sync_task_to_github_branch(task_id: int, new_bucket_id: int):
+    """
+    Create the feature branch for a CODE task moved to ONGOING. PyGithub and
+    psycopg2 both block, so the work runs on the bounded executor rather than
+    on the event loop or Starlette's request threadpool.
+    """
+    await run_blocking(_create_task_branch, task_id, new_bucket_id)
+
+def _create_task_branch(task_id: int, new_bucket_id: int):
     try:
-        cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-        
-        # 1. Look up the new_bucket_id in public.buckets and verify state == 'ONGOING'
-        cur.execute("SELECT state FROM public.buckets WHERE id = %s LIMIT 1;", (new_bucket_id,))
-        bucket_row = cur.fetchone()
-        if not bucket_row or bucket_row["state"] != "ONGOING":
-            return
-            
-        # 2. Look up the task. Verify type == 'CODE'. If branch_name exists, exit.
-        cur.execute("SELECT id, project_id, lead_assignee_id, type, branch_name, title FROM public.tasks WHERE id = %s LIMIT 1;", (task_id,))
-        task_row = cur.fetchone()
-        if not task_row:
-            return
-            
-        if task_row["type"] != "CODE":
-            return
+        # The connection is only held for the lookups and the final update,
+        # not while waiting on the GitHub API.
+        with db_cursor() as cur:
+            # 1. Look up the new_bucket_id in public.buckets and verify state == 'ONGOING'
+            cur.execute("SELECT state FROM public.buckets WHERE id = %s LIMIT 1;", (new_bucket_id,))
+            bucket_row = cur.fetchone()
+            if not bucket_row or bucket_row["state"] != "ONGOING":
+                return
+                
+            # 2. Look up the task. Verify type == 'CODE'. If branch_name exists, exit.
+            cur.execute("SELECT id, project_id, lead_assignee_id, type, branch_name, title FROM public.tasks WHERE id = %s LIMIT 1;", (task_id,))
+            task_row = cur.fetchone()
+            if not task_row:
+                return
+                
+            if task_row["type"] != "CODE":
+                return
+                
+            if task_row["branch_name"]:
+                return  # Branch already exists
+                
+            lead_assignee_id = task_row["lead_assignee_id"]
+            # Allow falling back to Github App integration if we don't have lead assignee
             
-        if task_row["branch_name"]:
-            return  # Branch already exists
+            gh_access_token = None
+            if lead_assignee_id:
+                cur.execute("SELECT gh_access_token FROM public.users WHERE id = %s LIMIT 1;", (lead_assignee_id,))
+                user_row = cur.fetchone()
+                if user_row:
+                    gh_access_token = user_row["gh_access_token"]
             
-        lead_assignee_id = task_row["lead_assignee_id"]
-        # Allow falling back to Github App integration if we don't have lead assignee
-        
-        gh_access_token = None
-        if lead_assignee_id:
-            cur.execute("SELECT gh_access_token FROM public.users WHERE id = %s LIMIT 1;", (lead_assignee_id,))
-            user_row = cur.fetchone()
-            if user_row:
-                gh_access_token = user_row["gh_access_token"]
-        
-        # 3. Fetch project's gh_repo_url
-        cur.execute("SELECT gh_repo_url FROM public.projects WHERE id = %s LIMIT 1;", (task_row["project_id"],))
-        project_row = cur.fetchone()
-        if not project_row or not project_row.get("gh_repo_url"):
-            logger.warning(f"Project for task {task_id} has no gh_repo_url. Cannot sync to GitHub.")
-            return
+            # 3. Fetch project's gh_repo_url
+            cur.execute("SELECT gh_repo_url FROM public.projects WHERE id = %s LIMIT 1;", (task_row["project_id"],))
+            project_row = cur.fetchone()
+            if not project_row or not project_row.get("gh_repo_url"):
+                logger.warning(f"Project for task {task_id} has no gh_repo_url. Cannot sync to GitHub.")
+                return
             
         # Assume first URL in the array
         repo_url = project_row["gh_repo_url"][0]
@@ -92,19 +99,14 @@ def sync_task_to_github_branch(task_id: int, new_bucket_id: int):
             logger.info(f"Successfully created branch {branch_name} for task {task_id}")
             
             # Update database
-            cur.execute(
-                "UPDATE public.tasks SET branch_name = %s, last_activity_at = NOW() WHERE id = %s;",
-                (branch_name, task_id)
-            )
-            conn.commit()
+            with db_cursor(commit=True) as cur:
+                cur.execute(
+                    "UPDATE public.tasks SET branch_name = %s, last_activity_at = NOW() WHERE id = %s;",
+                    (branch_name, task_id)
+                )
             
         except Exception as e:
             logger.error(f"Failed to create github branch {branch_name} for task {task_id}: {e}")
-            conn.rollback()
     
     except Exception as e:
         logger.error(f"Unhandled error in sync_task_to_github_branch: {e}")
-    finally:
-        if cur is not None:
-            cur.close()
-        _put_conn(conn)
@@ -0,0 +1,119 @@
+import asyncio
+import threading
+import time
+from datetime import datetime
+from typing import Optional
+
+import httpx
+import jwt
+
+from config import settings
+from services.http_clients import http_client
+
+# GitHub rejects app JWTs valid for more than 10 minutes; iat is backdated
+# to tolerate clock drift between us and GitHub.
+_JWT_LIFETIME_SECONDS = 9 * 60
+_JWT_CLOCK_DRIFT_SECONDS = 60
+# Refresh this long before expiry so no caller ever gets a token about to lapse
+_REFRESH_MARGIN_SECONDS = 5 * 60
+
+_lock = threading.Lock()
+_app_jwt: Optional[tuple[str, float]] = None
+# installation_id -> (token, expires_at as epoch seconds)
+_installation_tokens: dict[int, tuple[str, float]] = {}
+_async_refreshes: dict[int, asyncio.Task] = {}
+_sync_refresh_locks: dict[int, threading.Lock] = {}
+
+
+def app_jwt() -> str:
+    """RS256 JWT identifying the GitHub App, reused until shortly before it expires."""
+    global _app_jwt
+    now = time.time()
+    with _lock:
+        if _app_jwt is not None and _app_jwt[1] - now > _JWT_CLOCK_DRIFT_SECONDS:
+            return _app_jwt[0]
+        if not settings.gh_app_id or not settings.gh_app_private_key:
+            raise ValueError("GitHub credentials missing from environment.")
+        issued_at = int(now) - _JWT_CLOCK_DRIFT_SECONDS
+        expires_at = int(now) + _JWT_LIFETIME_SECONDS
+        token = jwt.encode(
+            {"iat": issued_at, "exp": expires_at, "iss": str(settings.gh_app_id)},
+            settings.gh_app_private_key.replace("\\n", "\n"),
+            algorithm="RS256",
+        )
+        _app_jwt = (token, expires_at)
+        return token
+
+
+def _cached(installation_id: int) -> Optional[str]:
+    with _lock:
+        entry = _installation_tokens.get(installation_id)
+    if entry is not None and entry[1] - time.time() > _REFRESH_MARGIN_SECONDS:
+        return entry[0]
+    return None
+
+
+def _store(installation_id: int, data: dict) -> str:
+    expires_at = datetime.fromisoformat(data["expires_at"].replace("Z", "+00:00")).timestamp()
+    with _lock:
+        _installation_tokens[installation_id] = (data["token"], expires_at)
+    return data["token"]
+
+
+def _access_tokens_request(installation_id: int) -> dict:
+    return {
+        "url": f"https://api.github.com/app/installations/{installation_id}/access_tokens",
+        "headers": {
+            "Authorization": f"Bearer {app_jwt()}",
+            "Accept": "application/vnd.github.v3+json",
+        },
+    }
+
+
+async def _refresh(installation_id: int) -> str:
+    request = _access_tokens_request(installation_id)
+    response = await http_client("github").post(request["url"], headers=request["headers"])
+    response.raise_for_status()
+    return _store(installation_id, response.json())
+
+
+async def installation_token(installation_id: int) -> str:
+    """
+    Installation access token for `installation_id`, cached until five minutes
+    before GitHub expires it. Concurrent callers share a single refresh.
+    """
+    token = _cached(installation_id)
+    if token is not None:
+        return token
+
+    task = _async_refreshes.get(installation_id)
+    if task is None:
+        task = asyncio.ensure_future(_refresh(installation_id))
+        _async_refreshes[installation_id] = task
+        task.add_done_callback(lambda _: _async_refreshes.pop(installation_id, None))
+    return await asyncio.shield(task)
+
+
+def installation_token_sync(installation_id: int) -> str:
+    """Blocking counterpart of `installation_token` for PyGithub callers."""
+    token = _cached(installation_id)
+    if token is not None:
+        return token
+
+    with _lock:
+        refresh_lock = _sync_refresh_locks.setdefault(installation_id, threading.Lock())
+    with refresh_lock:
+        # Another thread may have refreshed while we waited for the lock
+        token = _cached(installation_id)
+        if token is not None:
+            return token
+        request = _access_tokens_request(installation_id)
+        response = httpx.post(request["url"], headers=request["headers"], timeout=15.0)
+        response.raise_for_status()
+        return _store(installation_id, response.json())
+
+
+def invalidate_installation_token(installation_id: int):
+    """Drop a cached token GitHub has rejected (e.g. the app was reinstalled)."""
+    with _lock:
+        _installation_tokens.pop(installation_id, None)
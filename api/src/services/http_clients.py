@@ -0,0 +1,81 @@
+import logging
+from typing import Optional
+
+import httpx
+from google import genai
+from google.genai import types
+
+from config import settings
+
+logger = logging.getLogger("uvicorn.error")
+
+# One keep-alive pool per upstream, so a slow Recall download cannot starve
+# GitHub auth checks of connections (and vice versa).
+_UPSTREAMS: dict[str, dict] = {
+    "github": {
+        "timeout": httpx.Timeout(15.0, connect=5.0),
+        "limits": httpx.Limits(max_connections=50, max_keepalive_connections=20, keepalive_expiry=60.0),
+    },
+    "telegram": {
+        "timeout": httpx.Timeout(30.0, connect=5.0),
+        "limits": httpx.Limits(max_connections=10, max_keepalive_connections=5, keepalive_expiry=60.0),
+    },
+    "recall": {
+        # Recordings are downloaded through this client; callers pass a longer read timeout
+        "timeout": httpx.Timeout(30.0, connect=5.0),
+        "limits": httpx.Limits(max_connections=10, max_keepalive_connections=5, keepalive_expiry=60.0),
+    },
+    "gemini": {
+        # Video analysis can take minutes; the per-request limit is `_GEMINI_TIMEOUT_MS`
+        "timeout": httpx.Timeout(300.0, connect=10.0),
+        "limits": httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=120.0),
+    },
+}
+
+_GEMINI_TIMEOUT_MS = 300_000
+
+_clients: dict[str, httpx.AsyncClient] = {}
+_gemini: Optional[genai.Client] = None
+
+
+def http_client(upstream: str) -> httpx.AsyncClient:
+    """Shared HTTP/2 client for `upstream` ("github", "telegram", "recall" or "gemini")."""
+    client = _clients.get(upstream)
+    if client is None or client.is_closed:
+        # Normally created in `open_http_clients`; scripts and tests get one lazily
+        client = httpx.AsyncClient(http2=True, **_UPSTREAMS[upstream])
+        _clients[upstream] = client
+    return client
+
+
+def gemini_client() -> genai.Client:
+    """Shared Gemini client whose async calls go through the pooled "gemini" connection pool."""
+    global _gemini
+    if _gemini is None:
+        _gemini = genai.Client(
+            api_key=settings.gemini_api_key,
+            http_options=types.HttpOptions(
+                timeout=_GEMINI_TIMEOUT_MS,
+                httpx_async_client=http_client("gemini"),
+            ),
+        )
+    return _gemini
+
+
+async def open_http_clients():
+    """Create every upstream client up front (called from `main.lifespan`)."""
+    for upstream in _UPSTREAMS:
+        http_client(upstream)
+
+
+async def close_http_clients():
+    """Close all pooled clients (called from `main.lifespan` on shutdown)."""
+    global _gemini
+    _gemini = None
+    clients = list(_clients.items())
+    _clients.clear()
+    for upstream, client in clients:
+        try:
+            await client.aclose()
+        except Exception as e:
+            logger.warning(f"Failed to close {upstream} HTTP client: {e}")
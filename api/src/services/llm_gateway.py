@@ -0,0 +1,205 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import random
+import time
+from enum import IntEnum
+from typing import Any, Callable, Optional
+
+import httpx
+from google import genai
+from google.genai import errors as genai_errors
+from prometheus_client import Counter, Gauge, Histogram
+
+from config import settings
+from services.http_clients import gemini_client
+
+logger = logging.getLogger("uvicorn.error")
+
+LLM_REQUEST_SECONDS = Histogram(
+    "llm_request_seconds",
+    "Gemini calls through the gateway, from submission to result (queueing and retries included).",
+    ["caller", "outcome"],
+    buckets=(0.5, 1.0, 2.5, 5.0, 10.0, 15.0, 30.0, 60.0, 120.0, 300.0),
+)
+LLM_QUEUE_SECONDS = Histogram(
+    "llm_queue_seconds",
+    "Time an attempt waited for a concurrency slot and a rate-limit token.",
+    ["caller"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+LLM_TOKENS = Counter(
+    "llm_tokens_total",
+    "Tokens billed for Gemini calls, by caller and kind (prompt, output).",
+    ["caller", "kind"],
+)
+LLM_RETRIES = Counter("llm_retries_total", "Gemini attempts retried after a transient error.", ["caller"])
+LLM_WAITING = Gauge("llm_waiting", "Gemini calls waiting for a concurrency slot.", ["priority"])
+LLM_IN_FLIGHT = Gauge("llm_in_flight", "Gemini calls currently in flight.")
+
+# Provider statuses worth another attempt: timeouts, rate limits, overload
+_RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+
+class Priority(IntEnum):
+    # Lower runs first
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+class _PrioritySlots:
+    """Semaphore that hands freed slots to the highest-priority waiter, FIFO within a priority."""
+
+    def __init__(self, size: int):
+        self._free = size
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._order = itertools.count()
+
+    async def acquire(self, priority: Priority):
+        if self._free > 0 and not self._waiters:
+            self._free -= 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._order), waiter))
+        LLM_WAITING.labels(priority.name.lower()).inc()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            # A slot handed over just as we were cancelled must not be lost
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+        finally:
+            LLM_WAITING.labels(priority.name.lower()).dec()
+
+    def release(self):
+        while self._waiters:
+            _, _, waiter = heapq.heappop(self._waiters)
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._free += 1
+
+
+class _TokenBucket:
+    """Allows `rate` calls per second on average with bursts of up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def take(self):
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+def _retryable(exc: BaseException) -> bool:
+    if isinstance(exc, genai_errors.APIError):
+        return exc.code in _RETRYABLE_STATUS
+    return isinstance(exc, (httpx.TransportError, asyncio.TimeoutError))
+
+
+class LLMGateway:
+    """
+    Single path to Gemini. Calls share `max_concurrency` slots, handed out by
+    priority (interactive uploads before background reviews), and a token
+    bucket of `requests_per_minute`. Transient failures are retried with
+    full-jitter exponential backoff; the slot is released while backing off.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        requests_per_minute: float,
+        burst: int,
+        max_attempts: int,
+        retry_base_seconds: float,
+        retry_max_seconds: float,
+        client_factory: Callable[[], genai.Client] = gemini_client,
+    ):
+        self.max_attempts = max(1, max_attempts)
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self._slots = _PrioritySlots(max_concurrency)
+        self._bucket = _TokenBucket(requests_per_minute / 60.0, burst)
+        self._client_factory = client_factory
+
+    async def generate_content(
+        self,
+        caller: str,
+        *,
+        model: str,
+        contents: Any,
+        config: Any = None,
+        priority: Priority = Priority.BACKGROUND,
+        timeout: Optional[float] = None,
+    ):
+        """
+        `client.aio.models.generate_content` through the gateway. `caller`
+        labels the metrics; `timeout` bounds each attempt once it is running,
+        not the time spent queued.
+        """
+        client = self._client_factory()
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            for attempt in range(1, self.max_attempts + 1):
+                queued = time.perf_counter()
+                await self._slots.acquire(priority)
+                try:
+                    await self._bucket.take()
+                    LLM_QUEUE_SECONDS.labels(caller).observe(time.perf_counter() - queued)
+                    LLM_IN_FLIGHT.inc()
+                    try:
+                        call = client.aio.models.generate_content(model=model, contents=contents, config=config)
+                        response = await (asyncio.wait_for(call, timeout) if timeout else call)
+                    finally:
+                        LLM_IN_FLIGHT.dec()
+                except Exception as e:
+                    if attempt == self.max_attempts or not _retryable(e):
+                        raise
+                    delay = random.uniform(0, min(self.retry_max_seconds, self.retry_base_seconds * 2 ** (attempt - 1)))
+                    logger.warning(f"Gemini call for {caller} failed ({e!r}); retrying in {delay:.1f}s")
+                    LLM_RETRIES.labels(caller).inc()
+                else:
+                    outcome = "ok"
+                    _record_usage(caller, response)
+                    return response
+                finally:
+                    self._slots.release()
+                await asyncio.sleep(delay)
+        finally:
+            LLM_REQUEST_SECONDS.labels(caller, outcome).observe(time.perf_counter() - started)
+
+
+def _record_usage(caller: str, response):
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return
+    if usage.prompt_token_count:
+        LLM_TOKENS.labels(caller, "prompt").inc(usage.prompt_token_count)
+    if usage.candidates_token_count:
+        LLM_TOKENS.labels(caller, "output").inc(usage.candidates_token_count)
+
+
+llm_gateway = LLMGateway(
+    max_concurrency=settings.llm_max_concurrency,
+    requests_per_minute=settings.llm_requests_per_minute,
+    burst=settings.llm_burst,
+    max_attempts=settings.llm_max_attempts,
+    retry_base_seconds=settings.llm_retry_base_seconds,
+    retry_max_seconds=settings.llm_retry_max_seconds,
+)
@@ -0,0 +1,102 @@
+import asyncio
+import hashlib
+import logging
+import re
+from typing import BinaryIO, Optional
+
+import httpx
+from prometheus_client import Counter
+
+from config import settings
+from services.http_clients import http_client
+
+logger = logging.getLogger("uvicorn.error")
+
+_CHUNK = 1024 * 1024
+# S3-style ETag of a single-part upload: the hex MD5 of the object
+_MD5_ETAG = re.compile(r'^"?([0-9a-f]{32})"?$')
+_CONTENT_RANGE = re.compile(r"^bytes (\d+)-\d+/(\d+|\*)$")
+
+DOWNLOAD_RETRIES = Counter("recording_download_retries_total", "Recording downloads resumed after a failure, by how they resumed.", ["mode"])
+
+_slots: Optional[asyncio.Semaphore] = None
+
+
+def _download_slots() -> asyncio.Semaphore:
+    global _slots
+    if _slots is None:
+        _slots = asyncio.Semaphore(settings.recording_download_concurrency)
+    return _slots
+
+
+class DownloadError(Exception):
+    pass
+
+
+async def download_recording(url: str, dest: BinaryIO, headers: Optional[dict] = None) -> int:
+    """
+    Stream `url` into `dest` in chunks and return the number of bytes written.
+    A dropped connection resumes with a Range request from the last byte on
+    disk. The length is checked against the server's, and the MD5 against the
+    ETag when it is a plain one. At most `recording_download_concurrency`
+    downloads run at a time.
+    """
+    async with _download_slots():
+        return await _download(url, dest, headers or {})
+
+
+async def _download(url: str, dest: BinaryIO, headers: dict) -> int:
+    client = http_client("recall")
+    timeout = httpx.Timeout(settings.recording_download_read_timeout, connect=10.0)
+    written, total, etag = 0, None, None
+    digest = hashlib.md5()
+
+    for attempt in range(1, settings.recording_download_max_attempts + 1):
+        request_headers = dict(headers)
+        if written:
+            request_headers["Range"] = f"bytes={written}-"
+            if etag:
+                # A changed object restarts from 0 instead of being spliced
+                request_headers["If-Range"] = etag
+        try:
+            async with client.stream("GET", url, headers=request_headers, timeout=timeout) as res:
+                if res.status_code == 206 and written:
+                    match = _CONTENT_RANGE.match(res.headers.get("content-range", ""))
+                    if not match or int(match.group(1)) != written:
+                        raise DownloadError(f"Unexpected Content-Range {res.headers.get('content-range')!r}")
+                    DOWNLOAD_RETRIES.labels("resumed").inc()
+                elif res.status_code == 200:
+                    if written:
+                        DOWNLOAD_RETRIES.labels("restarted").inc()
+                    dest.seek(0)
+                    dest.truncate()
+                    written, digest = 0, hashlib.md5()
+                    length = res.headers.get("content-length")
+                    total = int(length) if length and length.isdigit() else None
+                    etag = res.headers.get("etag")
+                else:
+                    raise DownloadError(f"HTTP {res.status_code} downloading recording")
+
+                async for chunk in res.aiter_bytes(_CHUNK):
+                    dest.write(chunk)
+                    digest.update(chunk)
+                    written += len(chunk)
+        except (httpx.TransportError, DownloadError) as e:
+            if attempt == settings.recording_download_max_attempts:
+                raise DownloadError(f"Recording download failed after {attempt} attempts: {e}") from e
+            logger.warning(f"Recording download interrupted at {written} bytes (attempt {attempt}): {e}")
+            await asyncio.sleep(min(2 ** attempt, 30))
+            continue
+
+        if total is not None and written != total:
+            if attempt == settings.recording_download_max_attempts:
+                raise DownloadError(f"Recording truncated: {written} of {total} bytes")
+            logger.warning(f"Recording download ended early at {written} of {total} bytes, resuming")
+            continue
+        break
+
+    dest.flush()
+    match = _MD5_ETAG.match(etag or "")
+    if match and digest.hexdigest() != match.group(1):
+        raise DownloadError(f"Recording checksum mismatch: md5 {digest.hexdigest()} != ETag {match.group(1)}")
+    return written
@@ -0,0 +1,89 @@
+import re
+from collections import Counter as Tally
+from difflib import SequenceMatcher
+from typing import Optional
+
+_WORD = re.compile(r"\w+")
+_NUMBER = re.compile(r"\d+")
+# Segments overlap, so the same point or task is usually reported twice in slightly different words
+_SIMILAR = 0.85
+_PRIORITY_RANK = {"high": 0, "medium": 1, "low": 2}
+
+
+def _normalize(text: str) -> str:
+    return " ".join(_WORD.findall(str(text).lower()))
+
+
+def _similar(a: str, b: str) -> bool:
+    if a == b:
+        return True
+    # "Ship v2" and "Ship v3" are different decisions however alike they read
+    if set(_NUMBER.findall(a)) != set(_NUMBER.findall(b)):
+        return False
+    return SequenceMatcher(None, a, b).ratio() >= _SIMILAR
+
+
+def _merge_points(lists: list[list]) -> list[str]:
+    kept, seen = [], []
+    for items in lists:
+        for item in items or []:
+            key = _normalize(item)
+            if key and not any(_similar(key, other) for other in seen):
+                kept.append(item)
+                seen.append(key)
+    return kept
+
+
+def _fill(kept: dict, item: dict):
+    """Complete a kept action item with what a duplicate from another segment knows."""
+    for field in ("pic", "reason", "description"):
+        if not kept.get(field) and item.get(field):
+            kept[field] = item[field]
+    if kept.get("due_date") in (None, "", "TBD") and item.get("due_date") not in (None, "", "TBD"):
+        kept["due_date"] = item["due_date"]
+    if _PRIORITY_RANK.get(item.get("priority"), 1) < _PRIORITY_RANK.get(kept.get("priority"), 1):
+        kept["priority"] = item["priority"]
+
+
+def _merge_action_items(lists: list[list]) -> list[dict]:
+    kept, seen = [], []
+    for items in lists:
+        for item in items or []:
+            key = _normalize(item.get("task", ""))
+            match = next((i for i, other in enumerate(seen) if key and _similar(key, other)), None)
+            if match is None:
+                kept.append(dict(item))
+                seen.append(key)
+            else:
+                _fill(kept[match], item)
+    return kept
+
+
+def merge_analyses(parts: list[Optional[dict]]) -> Optional[dict]:
+    """
+    Reduce per-segment analyses, in recording order, into one. Discussion
+    points, decisions and action items are concatenated with near-duplicates
+    from the overlaps removed; the title is the one most segments agree on.
+    Segments that could not be analyzed are noted in the summary. None if no
+    segment was analyzed.
+    """
+    analyzed = [p for p in parts if p]
+    if not analyzed:
+        return None
+    moms = [p.get("mom") or {} for p in analyzed]
+
+    titles = Tally(m["judul_meeting"] for m in moms if m.get("judul_meeting"))
+    summaries = [m["ringkasan_eksekutif"].strip() for m in moms if m.get("ringkasan_eksekutif")]
+    missing = len(parts) - len(analyzed)
+    if missing:
+        summaries.append(f"({missing} dari {len(parts)} bagian rekaman tidak dapat dianalisis.)")
+
+    return {
+        "mom": {
+            "judul_meeting": titles.most_common(1)[0][0] if titles else "",
+            "ringkasan_eksekutif": " ".join(summaries),
+            "poin_diskusi": _merge_points([m.get("poin_diskusi") for m in moms]),
+            "keputusan_final": _merge_points([m.get("keputusan_final") for m in moms]),
+        },
+        "action_items": _merge_action_items([p.get("action_items") for p in analyzed]),
+    }
@@ -0,0 +1,106 @@
+import hashlib
+import logging
+from typing import Optional
+
+from prometheus_client import Counter
+from psycopg.types.json import Jsonb
+
+from config import settings
+from services.database.database import async_db_cursor, register_schema
+
+logger = logging.getLogger("uvicorn.error")
+
+# Model verdicts keyed by a hash of everything that shaped them
+register_schema("""
+    CREATE TABLE IF NOT EXISTS public.pr_evaluation_cache (
+        key TEXT PRIMARY KEY,
+        model TEXT NOT NULL,
+        result JSONB NOT NULL,
+        created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+        last_used_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+        expires_at TIMESTAMPTZ NOT NULL
+    );
+""")
+register_schema("""
+    CREATE INDEX IF NOT EXISTS pr_evaluation_cache_last_used_idx
+        ON public.pr_evaluation_cache (last_used_at);
+""")
+# The evaluation behind each pull request's latest review comment ("owner/repo#number");
+# NULL when the latest comment was the demo fallback
+register_schema("""
+    CREATE TABLE IF NOT EXISTS public.pr_evaluation_posts (
+        pr_ref TEXT PRIMARY KEY,
+        cache_key TEXT,
+        posted_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+    );
+""")
+
+PR_EVALUATION_CACHE = Counter(
+    "pr_evaluation_cache_lookups_total",
+    "PR evaluation cache lookups, by result (hit, miss).",
+    ["result"],
+)
+
+
+def evaluation_key(diff_text: str, contracts: str, model: str, *shaping: str) -> str:
+    """
+    Content address of one evaluation. `shaping` is everything else that
+    affects the verdict (prompt templates, chunking parameters), so changing
+    any of it invalidates earlier verdicts.
+    """
+    digest = hashlib.sha256()
+    for part in (model, *shaping, contracts, diff_text):
+        digest.update(part.encode("utf-8"))
+        # Separator, so moving text from one part into the next changes the key
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+async def get_cached_evaluation(key: str) -> Optional[dict]:
+    """The cached verdict for `key`, or None when missing or expired."""
+    async with async_db_cursor(commit=True) as cur:
+        await cur.execute(
+            "UPDATE public.pr_evaluation_cache SET last_used_at = NOW() "
+            "WHERE key = %s AND expires_at > NOW() "
+            "RETURNING result;",
+            (key,),
+        )
+        row = await cur.fetchone()
+    PR_EVALUATION_CACHE.labels("hit" if row is not None else "miss").inc()
+    return row["result"] if row is not None else None
+
+
+async def store_evaluation(key: str, model: str, result: dict):
+    """Cache a live model verdict, then trim expired and least recently used entries."""
+    async with async_db_cursor(commit=True) as cur:
+        await cur.execute(
+            "INSERT INTO public.pr_evaluation_cache (key, model, result, expires_at) "
+            "VALUES (%s, %s, %s, NOW() + make_interval(hours => %s)) "
+            "ON CONFLICT (key) DO UPDATE SET result = EXCLUDED.result, expires_at = EXCLUDED.expires_at, "
+            "last_used_at = NOW();",
+            (key, model, Jsonb(result), settings.pr_eval_cache_ttl_hours),
+        )
+        await cur.execute("DELETE FROM public.pr_evaluation_cache WHERE expires_at <= NOW();")
+        await cur.execute(
+            "DELETE FROM public.pr_evaluation_cache WHERE key IN ("
+            "  SELECT key FROM public.pr_evaluation_cache ORDER BY last_used_at DESC OFFSET %s"
+            ");",
+            (settings.pr_eval_cache_max_entries,),
+        )
+
+
+async def last_posted_key(pr_ref: str) -> Optional[str]:
+    """Key of the evaluation the PR's latest review comment shows, if any."""
+    async with async_db_cursor() as cur:
+        await cur.execute("SELECT cache_key FROM public.pr_evaluation_posts WHERE pr_ref = %s;", (pr_ref,))
+        row = await cur.fetchone()
+    return row["cache_key"] if row is not None else None
+
+
+async def record_posted(pr_ref: str, key: Optional[str]):
+    async with async_db_cursor(commit=True) as cur:
+        await cur.execute(
+            "INSERT INTO public.pr_evaluation_posts (pr_ref, cache_key) VALUES (%s, %s) "
+            "ON CONFLICT (pr_ref) DO UPDATE SET cache_key = EXCLUDED.cache_key, posted_at = NOW();",
+            (pr_ref, key),
+        )
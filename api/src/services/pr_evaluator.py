@@ -1,14 +1,19 @@
-import time
-import jwt
 import httpx
 import json
 import asyncio
 import logging
-from google import genai
+from typing import Optional
 from google.genai import types
 from pydantic import BaseModel, Field
 
 from config import settings
+from services.http_clients import gemini_client, http_client as pooled_http_client
+from services.github_tokens import installation_token, invalidate_installation_token
+from services.github_http_cache import github_get
+from services.spec_snapshot import load_spec_snapshot
+from services.llm_gateway import Priority, llm_gateway
+from services.diff_pipeline import chunk_files, merge_verdicts, prepare_diff, select_contracts
+from services.pr_evaluation_cache import evaluation_key, get_cached_evaluation, last_posted_key, record_posted, store_evaluation
 
 logger = logging.getLogger("uvicorn.error")
 
@@ -23,156 +28,218 @@ DEMO_FALLBACK = {
     "feedback": "I have reviewed the Git Diff against the provided contract. \n\n* **Security:** No vulnerabilities detected.\n* **Logic:** All acceptance criteria in `tasks.md` have been met.\n* **Design:** Implementation aligns perfectly with `design.md`.\n\nGreat work! This is ready to merge."
 }
 
-GITHUB_APP_ID = settings.gh_app_id
-GITHUB_PRIVATE_KEY = settings.gh_app_private_key.replace("\\n", "\n")
-
-try:
-    ai_client = genai.Client(api_key=settings.gemini_api_key)
-except Exception as e:
-    logger.error(f"Failed to initialize Gemini Client. Check GEMINI_API_KEY: {e}")
-    ai_client = None
-
-def generate_app_jwt() -> str:
-    if not GITHUB_APP_ID or not GITHUB_PRIVATE_KEY:
-        raise ValueError("GitHub credentials missing from environment.")
-    payload = {
-        "iat": int(time.time()),
-        "exp": int(time.time()) + (10 * 60),
-        "iss": str(GITHUB_APP_ID)
-    }
-    return jwt.encode(payload, GITHUB_PRIVATE_KEY, algorithm="RS256")
-
-async def get_installation_token(installation_id: int, http_client: httpx.AsyncClient) -> str:
-    headers = {
-        "Authorization": f"Bearer {generate_app_jwt()}",
-        "Accept": "application/vnd.github.v3+json"
-    }
-    response = await http_client.post(
-        f"https://api.github.com/app/installations/{installation_id}/access_tokens",
-        headers=headers
-    )
-    response.raise_for_status()
-    return response.json()["token"]
+MODEL_ID = "gemini-2.5-flash"
 
-async def process_pr_evaluation(repo_full_name: str, pr_number: int, installation_id: int):
+SYSTEM_INSTRUCTION = """
+            You are a strict, senior DevOps and Security code reviewer. 
+            You will be given a list of contracts from the 'openspec/changes/' directory.
+            
+            STEP 1: Analyze the Git Diff. Deduce which specific contract from the list the developer is attempting to fulfill.
+            STEP 2: Completely ignore all other contracts.
+            STEP 3: Evaluate the Git Diff STRICTLY against the tasks and designs of the identified contract.
+            If the code does not completely fulfill the targeted tasks, you must FAIL the review.
+            """
+
+USER_PROMPT = "REPOSITORY: {repo}\n\nALL REPOSITORY CONTRACTS:\n{contracts}\n\n---\nCODE CHANGES (Git Diff):\n{diff}\n\nEvaluate."
+PART_NOTE = (
+    "\n\nNOTE: This is part {part} of {total} of the pull request's diff, split by file. "
+    "Judge only whether these files correctly implement their share of the contract; "
+    "tasks that other parts may cover must not cause a FAIL."
+)
+
+async def _evaluate_live(repo_full_name: str, combined_contracts: str, diff_text: str, part: Optional[tuple[int, int]] = None) -> Optional[dict]:
+    """Ask Gemini for a verdict on `diff_text` (one `part` of a chunked diff); None when the call fails or times out."""
+    try:
+        user_prompt = USER_PROMPT.format(repo=repo_full_name, contracts=combined_contracts, diff=diff_text)
+        if part is not None:
+            user_prompt += PART_NOTE.format(part=part[0], total=part[1])
+        
+        # We add a strict timeout. In a live demo, you don't want the audience waiting 30 seconds.
+        # It bounds each attempt; time queued behind other Gemini calls does not count.
+        ai_response = await llm_gateway.generate_content(
+            "pr_review",
+            model=MODEL_ID,
+            contents=user_prompt,
+            config=types.GenerateContentConfig(
+                system_instruction=SYSTEM_INSTRUCTION,
+                response_mime_type="application/json",
+                response_schema=PREvaluation,
+                temperature=0.1
+            ),
+            priority=Priority.BACKGROUND,
+            timeout=15.0 # If an attempt takes longer than 15s, retry, then trigger the fallback
+        )
+        
+        result_dict = json.loads(ai_response.text)
+        logger.info("✅ Live AI evaluation successful.")
+        return result_dict
+
+    except asyncio.TimeoutError:
+        logger.error("⚠️ AI took too long. Triggering Demo Fallback.")
+    except Exception as e:
+        logger.error(f"⚠️ AI Call failed ({str(e)}). Triggering Demo Fallback.")
+    return None
+
+async def _evaluate_chunked(repo_full_name: str, combined_contracts: str, files: list, contract: str) -> tuple[Optional[dict], bool]:
+    """
+    Evaluate a prepared diff, in concurrent per-file chunks when it is too large
+    for one prompt. Returns the (merged) verdict, or None if nothing could be
+    evaluated, and whether every part was evaluated.
+    """
+    chunks = chunk_files(files, settings.pr_eval_chunk_chars)
+    if len(chunks) == 1:
+        result = await _evaluate_live(repo_full_name, combined_contracts, chunks[0])
+        return result, result is not None
+
+    skipped = max(0, len(chunks) - settings.pr_eval_max_chunks)
+    if skipped:
+        logger.warning(f"Diff needs {len(chunks)} parts; evaluating the first {settings.pr_eval_max_chunks}")
+        chunks = chunks[:settings.pr_eval_max_chunks]
+    total = len(chunks) + skipped
+    logger.info(f"🧩 Evaluating diff in {len(chunks)} parts concurrently")
+    results = await asyncio.gather(*(
+        _evaluate_live(repo_full_name, combined_contracts, chunk, (i, total))
+        for i, chunk in enumerate(chunks, 1)
+    ))
+    results = list(results) + [None] * skipped
+    if not any(results):
+        return None, False
+    return merge_verdicts(results, contract), all(results)
+
+async def _is_current(repo_full_name: str, pr_number: int, head_sha: Optional[str], auth_headers: dict) -> bool:
+    """Whether the PR is still open at `head_sha`; a newer push or a close makes this run stale."""
+    if not head_sha:
+        return True
+    resp = await github_get(
+        f"https://api.github.com/repos/{repo_full_name}/pulls/{pr_number}",
+        headers={**auth_headers, "Accept": "application/vnd.github+json"}
+    )
+    resp.raise_for_status()
+    pr = resp.json()
+    if pr.get("state") != "open" or pr.get("head", {}).get("sha") != head_sha:
+        logger.info(f"⏭️ PR #{pr_number} is {pr.get('state')} at {pr.get('head', {}).get('sha')}, not open at {head_sha}; dropping stale evaluation")
+        return False
+    return True
+
+async def process_pr_evaluation(repo_full_name: str, pr_number: int, installation_id: int, spec_ref: Optional[str] = None, head_sha: Optional[str] = None):
     logger.info(f"🚀 Starting background evaluation for PR #{pr_number} on {repo_full_name}")
     
-    if not ai_client:
-        logger.error("❌ Aborting: Gemini Client not initialized.")
+    try:
+        gemini_client()
+    except Exception as e:
+        logger.error(f"❌ Aborting: Gemini Client not initialized. Check GEMINI_API_KEY: {e}")
         return
 
     try:
-        async with httpx.AsyncClient(timeout=30.0) as http_client:
-            # 1. Authenticate
-            token = await get_installation_token(installation_id, http_client)
-            auth_headers = {
-                "Authorization": f"token {token}",
-                "X-GitHub-Api-Version": "2022-11-28"
-            }
-
-            # 2. Fetch the raw Git Diff
-            logger.info("📂 Fetching PR diff...")
-            diff_resp = await http_client.get(
-                f"https://api.github.com/repos/{repo_full_name}/pulls/{pr_number}",
-                headers={**auth_headers, "Accept": "application/vnd.github.v3.diff"}
-            )
-            diff_resp.raise_for_status()
-            diff_text = diff_resp.text
-
-            # 3. Sweep openspec/changes for ALL tasks.md and design.md files
-            logger.info("Sweeping openspec/changes/ directory...")
-            changes_url = f"https://api.github.com/repos/{repo_full_name}/contents/openspec/changes"
-            changes_resp = await http_client.get(changes_url, headers=auth_headers)
-            
-            combined_contracts = "No contracts found in repository."
-            if changes_resp.status_code == 200:
-                folders = changes_resp.json()
-                
-                async def fetch_file(path: str):
-                    resp = await http_client.get(
-                        f"https://api.github.com/repos/{repo_full_name}/contents/{path}",
-                        headers={**auth_headers, "Accept": "application/vnd.github.v3.raw"}
-                    )
-                    return f"--- FILE: {path} ---\n{resp.text}\n" if resp.status_code == 200 else ""
-
-                download_tasks = []
-                for item in folders:
-                    if item.get("type") == "dir":
-                        folder_path = item["path"]
-                        download_tasks.append(fetch_file(f"{folder_path}/tasks.md"))
-                        download_tasks.append(fetch_file(f"{folder_path}/design.md"))
-                
-                fetched_files = await asyncio.gather(*download_tasks)
-                valid_files = [f for f in fetched_files if f]
-                if valid_files:
-                    combined_contracts = "\n".join(valid_files)
-                    logger.info(f"✅ Found and loaded {len(valid_files)} specification files.")
-                else:
-                    logger.warning("⚠️ No tasks.md or design.md files found in the folders.")
-
-            # 4. Evaluate using Gemini (With JSON Schema Constraint & Demo Fallback)
+        http_client = pooled_http_client("github")
+        # 1. Authenticate
+        token = await installation_token(installation_id)
+        auth_headers = {
+            "Authorization": f"token {token}",
+            "X-GitHub-Api-Version": "2022-11-28"
+        }
+
+        # A debounced push may run after a newer push or after the PR was closed
+        if not await _is_current(repo_full_name, pr_number, head_sha, auth_headers):
+            return
+
+        # 2. Fetch the raw Git Diff
+        logger.info("📂 Fetching PR diff...")
+        diff_resp = await github_get(
+            f"https://api.github.com/repos/{repo_full_name}/pulls/{pr_number}",
+            headers={**auth_headers, "Accept": "application/vnd.github.v3.diff"}
+        )
+        diff_resp.raise_for_status()
+
+        # Lockfiles, generated and binary diffs say nothing about the contract
+        files = prepare_diff(diff_resp.text)
+        if not files:
+            logger.info(f"PR #{pr_number} only changes lockfiles, generated or binary files; nothing to evaluate")
+            return
+        diff_text = "".join(f.text for f in files)
+
+        # 3. Load the tasks.md and design.md files under openspec/changes and keep
+        # only the contract(s) the changed files point at
+        logger.info("Loading openspec/changes/ snapshot...")
+        combined_contracts = "No contracts found in repository."
+        selected = []
+        snapshot = await load_spec_snapshot(repo_full_name, spec_ref, auth_headers)
+        if snapshot is not None:
+            if snapshot.files:
+                selected = select_contracts(snapshot.changes(), files)
+                combined_contracts = snapshot.contracts_text(selected)
+                logger.info(f"✅ Found {len(snapshot.files)} specification files; sending {', '.join(selected)}.")
+            else:
+                logger.warning("⚠️ No tasks.md or design.md files found in the folders.")
+
+        # 4. Reuse the verdict if this exact diff and contract set was evaluated before
+        # (reopened PR, redelivered webhook, rebase that left the diff unchanged)
+        cache_key = evaluation_key(
+            diff_text, combined_contracts, MODEL_ID, SYSTEM_INSTRUCTION, USER_PROMPT, PART_NOTE,
+            f"chunk_chars={settings.pr_eval_chunk_chars};max_chunks={settings.pr_eval_max_chunks}",
+        )
+        pr_ref = f"{repo_full_name}#{pr_number}"
+        try:
+            cached = await get_cached_evaluation(cache_key)
+            # Only skip when the PR's latest comment is this verdict; after A -> B -> A, A is posted again
+            if cached is not None and await last_posted_key(pr_ref) == cache_key:
+                logger.info(f"♻️ PR #{pr_number} already shows this evaluation; skipping comment")
+                return
+        except Exception as e:
+            logger.warning(f"PR evaluation cache unavailable, evaluating live: {e}")
+            cached = None
+
+        if cached is not None:
+            logger.info("♻️ Reusing cached evaluation; Gemini not called.")
+            result_dict = cached
+        else:
+            # 5. Evaluate using Gemini (With JSON Schema Constraint & Demo Fallback)
             logger.info("🧠 Sending data to Gemini 2.0 Flash...")
-            
-            # Default to the fallback in case the try block completely fails
-            result_dict = DEMO_FALLBACK 
-            
-            try:
-                system_instruction = """
-                You are a strict, senior DevOps and Security code reviewer. 
-                You will be given a list of contracts from the 'openspec/changes/' directory.
-                
-                STEP 1: Analyze the Git Diff. Deduce which specific contract from the list the developer is attempting to fulfill.
-                STEP 2: Completely ignore all other contracts.
-                STEP 3: Evaluate the Git Diff STRICTLY against the tasks and designs of the identified contract.
-                If the code does not completely fulfill the targeted tasks, you must FAIL the review.
-                """
-                
-                user_prompt = f"REPOSITORY: {repo_full_name}\n\nALL REPOSITORY CONTRACTS:\n{combined_contracts}\n\n---\nCODE CHANGES (Git Diff):\n{diff_text}\n\nEvaluate."
-                
-                # We add a strict timeout. In a live demo, you don't want the audience waiting 30 seconds.
-                ai_response = await asyncio.wait_for(
-                    ai_client.aio.models.generate_content(
-                        model='gemini-2.5-flash',
-                        contents=user_prompt,
-                        config=types.GenerateContentConfig(
-                            system_instruction=system_instruction,
-                            response_mime_type="application/json",
-                            response_schema=PREvaluation,
-                            temperature=0.1
-                        )
-                    ),
-                    timeout=15.0 # If it takes longer than 15s, trigger the fallback
-                )
-                
-                # If it succeeds, overwrite the fallback with the REAL AI response
-                result_dict = json.loads(ai_response.text)
-                logger.info("✅ Live AI evaluation successful.")
-
-            except asyncio.TimeoutError:
-                logger.error("⚠️ AI took too long. Triggering Demo Fallback.")
-            except Exception as e:
-                logger.error(f"⚠️ AI Call failed ({str(e)}). Triggering Demo Fallback.")
-
-            # 5. Parse JSON and Post the Markdown Result back to GitHub
-            # (This will use either the real AI response OR the fallback)
-            logger.info("📝 Formatting and posting evaluation to GitHub...")
-            
-            verdict = result_dict.get("verdict", "FAIL")
-            identified = result_dict.get("identified_contract", "Unknown")
-            feedback = result_dict.get("feedback", "No feedback provided.")
-            
-            status_icon = "✅" if verdict == "PASS" else "❌"
-            github_comment = f"## {status_icon} SpecOps AI Review\n**Targeted Contract:** `{identified}`\n**Verdict:** `{verdict}`\n\n{feedback}"
-            
-            post_resp = await http_client.post(
-                f"https://api.github.com/repos/{repo_full_name}/issues/{pr_number}/comments",
-                headers=auth_headers,
-                json={"body": github_comment}
+            result_dict, complete = await _evaluate_chunked(
+                repo_full_name, combined_contracts, files, selected[0] if selected else "Unknown"
             )
-            post_resp.raise_for_status()
-            logger.info(f"✅ Successfully evaluated and commented on PR #{pr_number}")
+            if result_dict is None:
+                result_dict = DEMO_FALLBACK
+            elif complete:
+                # Only real verdicts are cached; a fallback must never be replayed
+                try:
+                    await store_evaluation(cache_key, MODEL_ID, result_dict)
+                except Exception as e:
+                    logger.warning(f"Could not cache PR evaluation: {e}")
+
+        # 6. Parse JSON and Post the Markdown Result back to GitHub
+        # (This will use either the real AI response OR the fallback)
+        logger.info("📝 Formatting and posting evaluation to GitHub...")
+        
+        verdict = result_dict.get("verdict", "FAIL")
+        identified = result_dict.get("identified_contract", "Unknown")
+        feedback = result_dict.get("feedback", "No feedback provided.")
+        
+        status_icon = "✅" if verdict == "PASS" else "❌"
+        github_comment = f"## {status_icon} SpecOps AI Review\n**Targeted Contract:** `{identified}`\n**Verdict:** `{verdict}`\n\n{feedback}"
+        
+        # The head may have moved while Gemini was working
+        if not await _is_current(repo_full_name, pr_number, head_sha, auth_headers):
+            return
+
+        post_resp = await http_client.post(
+            f"https://api.github.com/repos/{repo_full_name}/issues/{pr_number}/comments",
+            headers=auth_headers,
+            json={"body": github_comment}
+        )
+        post_resp.raise_for_status()
+        logger.info(f"✅ Successfully evaluated and commented on PR #{pr_number}")
+        try:
+            await record_posted(pr_ref, cache_key if result_dict is not DEMO_FALLBACK else None)
+        except Exception as e:
+            logger.warning(f"Could not record posted evaluation for {pr_ref}: {e}")
 
     except httpx.HTTPError as he:
+        if isinstance(he, httpx.HTTPStatusError) and he.response.status_code == 401:
+            invalidate_installation_token(installation_id)
         logger.error(f"⚠️ Network Error processing PR #{pr_number}: {str(he)}")
+        # Re-raised so the webhook queue retries the event
+        raise
     except Exception as e:
-        logger.error(f"⚠️ Fatal Error processing PR #{pr_number}: {str(e)}", exc_info=True)
\ No newline at end of file
+        logger.error(f"⚠️ Fatal Error processing PR #{pr_number}: {str(e)}", exc_info=True)
+        raise
\ No newline at end of file
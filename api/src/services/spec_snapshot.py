@@ -0,0 +1,208 @@
+import asyncio
+import logging
+import re
+from collections import OrderedDict
+from typing import Optional
+
+from prometheus_client import Counter
+
+from services.github_http_cache import github_get
+
+logger = logging.getLogger("uvicorn.error")
+
+SPEC_ROOT = "openspec/changes"
+SPEC_FILES = ("tasks.md", "design.md")
+
+_COMMIT_SHA = re.compile(r"^[0-9a-f]{40}$")
+_TASK_LINE = re.compile(r"^- \[([ xX])\] (.*)$")
+_SPEC_TASKS_PATH = re.compile(r"^openspec/changes/[^/]+/tasks\.md$")
+_BLOB_CONCURRENCY = 8
+_MEMO_SIZE = 256
+
+SPEC_SNAPSHOT_LOADS = Counter(
+    "spec_snapshot_loads_total",
+    "Spec snapshot loads, by how much had to be fetched (commit_memo, tree_memo, fetched).",
+    ["result"],
+)
+
+
+class SpecSnapshot:
+    """Contents of every openspec/changes/<change>/{tasks,design}.md at one tree."""
+
+    def __init__(self, tree_sha: str, files: dict[str, str], blob_shas: dict[str, str]):
+        self.tree_sha = tree_sha
+        # path -> text, ordered by change folder, tasks.md before design.md
+        self.files = files
+        self.blob_shas = blob_shas
+
+    def task_files(self) -> list[str]:
+        return [path for path in self.files if path.endswith("/tasks.md")]
+
+    def checklist(self, path: str) -> list[tuple[str, bool]]:
+        """(title, checked) for every `- [ ]` / `- [x]` line of one tasks.md file."""
+        items = []
+        for line in self.files.get(path, "").splitlines():
+            match = _TASK_LINE.match(line)
+            if match:
+                items.append((match.group(2).strip(), match.group(1) != " "))
+        return items
+
+    def task_titles(self) -> list[str]:
+        """Titles of every `- [ ]` / `- [x]` line across all tasks.md files."""
+        return [title for path in self.task_files() for title, _ in self.checklist(path)]
+
+    @staticmethod
+    def change_name(path: str) -> str:
+        return path[len(SPEC_ROOT) + 1:].split("/", 1)[0]
+
+    def changes(self) -> dict[str, str]:
+        """Change folder name -> its tasks.md and design.md text."""
+        grouped: dict[str, str] = {}
+        for path, text in self.files.items():
+            name = self.change_name(path)
+            grouped[name] = grouped.get(name, "") + text + "\n"
+        return grouped
+
+    def contracts_text(self, changes: Optional[list[str]] = None) -> str:
+        """All spec files, or only those of the given change folders."""
+        return "\n".join(
+            f"--- FILE: {path} ---\n{text}\n" for path, text in self.files.items()
+            if changes is None or self.change_name(path) in changes
+        )
+
+
+# tree SHA of openspec/changes -> parsed snapshot; commit SHA -> that tree SHA
+_by_tree: "OrderedDict[str, SpecSnapshot]" = OrderedDict()
+_tree_by_commit: "OrderedDict[str, Optional[str]]" = OrderedDict()
+
+
+def _remember(memo: OrderedDict, key: str, value):
+    memo[key] = value
+    memo.move_to_end(key)
+    while len(memo) > _MEMO_SIZE:
+        memo.popitem(last=False)
+
+
+def _spec_entries(tree: list[dict], prefix: str = "") -> tuple[Optional[str], dict[str, str]]:
+    """From a recursive tree listing, the openspec/changes tree SHA and the spec file blob SHAs."""
+    changes_sha = None
+    blobs: dict[str, str] = {}
+    for entry in tree:
+        path = prefix + entry["path"]
+        if entry["type"] == "tree" and path == SPEC_ROOT:
+            changes_sha = entry["sha"]
+        elif entry["type"] == "blob" and path.startswith(SPEC_ROOT + "/"):
+            parts = path[len(SPEC_ROOT) + 1:].split("/")
+            if len(parts) == 2 and parts[1] in SPEC_FILES:
+                blobs[path] = entry["sha"]
+    return changes_sha, blobs
+
+
+async def _changes_tree(base_url: str, ref: str, headers: dict) -> tuple[Optional[str], dict[str, str]]:
+    resp = await github_get(f"{base_url}/git/trees/{ref}", headers=headers, params={"recursive": "1"})
+    if resp.status_code in (404, 409):
+        # Unknown ref or empty repository
+        return None, {}
+    resp.raise_for_status()
+    data = resp.json()
+    if not data.get("truncated"):
+        return _spec_entries(data.get("tree", []))
+
+    # Very large repository: walk down to openspec/changes and list only that subtree
+    sha = data["sha"]
+    for name in SPEC_ROOT.split("/"):
+        resp = await github_get(f"{base_url}/git/trees/{sha}", headers=headers)
+        resp.raise_for_status()
+        sha = next((e["sha"] for e in resp.json().get("tree", []) if e["path"] == name and e["type"] == "tree"), None)
+        if sha is None:
+            return None, {}
+    resp = await github_get(f"{base_url}/git/trees/{sha}", headers=headers, params={"recursive": "1"})
+    resp.raise_for_status()
+    _, blobs = _spec_entries(resp.json().get("tree", []), prefix=SPEC_ROOT + "/")
+    return sha, blobs
+
+
+async def default_branch(repo_full_name: str, auth_headers: dict) -> str:
+    resp = await github_get(f"https://api.github.com/repos/{repo_full_name}", headers=auth_headers)
+    resp.raise_for_status()
+    return resp.json()["default_branch"]
+
+
+async def changed_spec_files(repo_full_name: str, pr_number: int, auth_headers: dict) -> Optional[set[str]]:
+    """
+    openspec/changes/*/tasks.md paths a pull request adds, edits, renames or
+    removes. None when the file list could not be read in full.
+    """
+    url = f"https://api.github.com/repos/{repo_full_name}/pulls/{pr_number}/files"
+    changed = set()
+    # GitHub lists at most 3000 files per pull request
+    for page in range(1, 31):
+        resp = await github_get(url, headers=auth_headers, params={"per_page": 100, "page": page})
+        if resp.status_code != 200:
+            return None
+        files = resp.json()
+        for entry in files:
+            for path in (entry.get("filename"), entry.get("previous_filename")):
+                if path and _SPEC_TASKS_PATH.match(path):
+                    changed.add(path)
+        if len(files) < 100:
+            return changed
+    return None
+
+
+async def load_spec_snapshot(repo_full_name: str, ref: Optional[str], auth_headers: dict) -> Optional[SpecSnapshot]:
+    """
+    Load the spec files of `repo_full_name` at `ref` (branch name or commit SHA;
+    None for the default branch) with one recursive tree request plus
+    concurrent blob fetches. Results are memoized by the openspec/changes tree
+    SHA, and by commit SHA when `ref` is one, so an unchanged spec costs no
+    further requests (a branch ref costs one conditional request, a free 304).
+    Returns None when the repository has no openspec/changes directory.
+    """
+    if ref is None:
+        ref = await default_branch(repo_full_name, auth_headers)
+    if _COMMIT_SHA.match(ref) and ref in _tree_by_commit:
+        tree_sha = _tree_by_commit[ref]
+        if tree_sha is None:
+            SPEC_SNAPSHOT_LOADS.labels("commit_memo").inc()
+            return None
+        snapshot = _by_tree.get(tree_sha)
+        if snapshot is not None:
+            SPEC_SNAPSHOT_LOADS.labels("commit_memo").inc()
+            return snapshot
+
+    base_url = f"https://api.github.com/repos/{repo_full_name}"
+    tree_sha, blobs = await _changes_tree(base_url, ref, auth_headers)
+    if _COMMIT_SHA.match(ref):
+        _remember(_tree_by_commit, ref, tree_sha)
+    if tree_sha is None:
+        return None
+
+    snapshot = _by_tree.get(tree_sha)
+    if snapshot is not None:
+        _by_tree.move_to_end(tree_sha)
+        SPEC_SNAPSHOT_LOADS.labels("tree_memo").inc()
+        return snapshot
+
+    semaphore = asyncio.Semaphore(_BLOB_CONCURRENCY)
+    raw_headers = {**auth_headers, "Accept": "application/vnd.github.raw"}
+
+    async def fetch_blob(path: str, sha: str) -> tuple[str, Optional[str]]:
+        async with semaphore:
+            resp = await github_get(f"{base_url}/git/blobs/{sha}", headers=raw_headers)
+        if resp.status_code != 200:
+            logger.warning(f"Could not fetch {path} ({sha}) from {repo_full_name}: HTTP {resp.status_code}")
+            return path, None
+        return path, resp.text
+
+    # tasks.md before design.md within each change folder
+    ordered = sorted(blobs.items(), key=lambda item: (item[0].rsplit("/", 1)[0], SPEC_FILES.index(item[0].rsplit("/", 1)[1])))
+    fetched = await asyncio.gather(*(fetch_blob(path, sha) for path, sha in ordered))
+    if any(text is None for _, text in fetched):
+        # Do not memoize a partial snapshot
+        return SpecSnapshot(tree_sha, {p: t for p, t in fetched if t is not None}, blobs)
+
+    snapshot = SpecSnapshot(tree_sha, dict(fetched), blobs)
+    _remember(_by_tree, tree_sha, snapshot)
+    SPEC_SNAPSHOT_LOADS.labels("fetched").inc()
+    return snapshot
@@ -1,5 +1,5 @@
-import httpx
 from config import settings
+from services.http_clients import http_client
 
 TELEGRAM_API_URL = f"https://api.telegram.org/bot{settings.telegram_bot_token}"
 
@@ -23,10 +23,9 @@ async def send_telegram_message(chat_id: str, text: str):
     print(f"\n[DEBUG] Attempting to send message to Chat ID: {chat_id}")
     
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(url, json=payload)
-            print(f"[DEBUG] Send Status: {response.status_code}")
-            if response.status_code != 200:
-                print(f"[DEBUG] Telegram Response: {response.text}")
+        response = await http_client("telegram").post(url, json=payload)
+        print(f"[DEBUG] Send Status: {response.status_code}")
+        if response.status_code != 200:
+            print(f"[DEBUG] Telegram Response: {response.text}")
     except Exception as e:
         print(f"\n[ERROR] Failed to send message to Telegram: {e}\n")
@@ -0,0 +1,90 @@
+import asyncio
+import hashlib
+from typing import Awaitable, Callable, Optional
+
+from cachetools import TLRUCache
+from prometheus_client import Counter
+
+from config import settings
+
+TOKEN_CACHE_LOOKUPS = Counter(
+    "github_token_cache_lookups_total",
+    "GitHub access-token validations, by outcome (hit, negative_hit, miss, coalesced).",
+    ["result"],
+)
+
+
+class InvalidToken(Exception):
+    """GitHub rejected the access token (401); cached for `auth_token_negative_ttl`."""
+
+
+class TokenCache:
+    """
+    Caches the GitHub profile resolved for an access token, keyed by the
+    token's SHA-256 so raw tokens never sit in memory as dict keys.
+    Rejected tokens are cached for a shorter time, and concurrent lookups for
+    the same token share a single upstream call.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, negative_ttl: float):
+        self._ttl = ttl
+        self._negative_ttl = negative_ttl
+        # Values are the profile dict, or None for a rejected token
+        self._entries: TLRUCache = TLRUCache(maxsize=maxsize, ttu=self._expires_at)
+        self._inflight: dict[str, asyncio.Future] = {}
+
+    def _expires_at(self, key: str, value: Optional[dict], now: float) -> float:
+        return now + (self._ttl if value is not None else self._negative_ttl)
+
+    @staticmethod
+    def key(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    async def get(self, token: str, fetch: Callable[[str], Awaitable[dict]]) -> dict:
+        """
+        Return the cached profile for `token`, calling `fetch(token)` on a miss.
+        `fetch` raises `InvalidToken` when GitHub rejects the token; any other
+        error propagates without being cached.
+        """
+        key = self.key(token)
+        try:
+            profile = self._entries[key]
+        except KeyError:
+            pass
+        else:
+            if profile is None:
+                TOKEN_CACHE_LOOKUPS.labels("negative_hit").inc()
+                raise InvalidToken()
+            TOKEN_CACHE_LOOKUPS.labels("hit").inc()
+            return profile
+
+        task = self._inflight.get(key)
+        if task is not None:
+            TOKEN_CACHE_LOOKUPS.labels("coalesced").inc()
+        else:
+            TOKEN_CACHE_LOOKUPS.labels("miss").inc()
+            task = asyncio.ensure_future(fetch(token))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._store(key, t))
+        # Shielded so one caller disconnecting does not cancel the lookup for the others
+        return await asyncio.shield(task)
+
+    def _store(self, key: str, task: asyncio.Task):
+        self._inflight.pop(key, None)
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is None:
+            self._entries[key] = task.result()
+        elif isinstance(error, InvalidToken):
+            self._entries[key] = None
+
+    def invalidate(self, token: str):
+        self._entries.pop(self.key(token), None)
+
+
+github_token_cache = TokenCache(
+    maxsize=settings.auth_token_cache_size,
+    ttl=settings.auth_token_cache_ttl,
+    negative_ttl=settings.auth_token_negative_ttl,
+)
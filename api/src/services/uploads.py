@@ -0,0 +1,68 @@
+import json
+import os
+
+from fastapi import HTTPException, UploadFile
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class RequestSizeLimitMiddleware:
+    """
+    Rejects request bodies over `max_bytes` with 413: up front when the
+    Content-Length header already says so, otherwise as soon as the streamed
+    body crosses the limit, before the multipart parser has spooled it all.
+    """
+
+    def __init__(self, app: ASGIApp, max_bytes: int):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        declared = dict(scope.get("headers") or []).get(b"content-length")
+        if declared is not None and declared.isdigit() and int(declared) > self.max_bytes:
+            body = json.dumps({"detail": self._detail()}).encode()
+            await send({
+                "type": "http.response.start",
+                "status": 413,
+                "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # FastAPI re-raises HTTPException from body parsing, so this becomes a 413
+                    raise HTTPException(status_code=413, detail=self._detail())
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+    def _detail(self) -> str:
+        return f"Request body exceeds the {self.max_bytes // (1024 * 1024)} MB limit."
+
+
+def spooled_size(file: UploadFile, max_bytes: int) -> int:
+    """
+    Size of an upload already spooled by Starlette (memory up to 1 MiB, a temp
+    file beyond), measured without reading it. Raises 413 over `max_bytes`
+    and leaves the file positioned at its start.
+    """
+    size = file.size
+    if size is None:
+        file.file.seek(0, os.SEEK_END)
+        size = file.file.tell()
+    file.file.seek(0)
+    if size > max_bytes:
+        raise HTTPException(status_code=413, detail=f"File exceeds the {max_bytes // (1024 * 1024)} MB upload limit.")
+    if size == 0:
+        raise HTTPException(status_code=400, detail="File is empty.")
+    return size
@@ -1,25 +1,91 @@
 import logging
+from typing import Optional
 from services.database.tasks import DatabaseTask, db_update_task
 from services.database.activities import DatabaseActivity, db_create_activity
 from fastapi import BackgroundTasks
-from services.database.database import _get_conn, _put_conn
-import psycopg2.extras
+from services.database.database import db_cursor, register_schema
+from services.database.prepared import prepared_statement, execute_prepared
 import re
-from github_app import get_github_client
+from services.github_tokens import installation_token
+from services.spec_snapshot import SpecSnapshot, changed_spec_files, load_spec_snapshot
 from services.database.id_generator import _generator
+from services.executors import run_blocking
+from services.webhook_queue import event_step
 
 logger = logging.getLogger("uvicorn.error")
 
+
+# Lookups hit on every webhook delivery
+_USER_BY_GH_USERNAME = prepared_statement(
+    "user_by_gh_username",
+    "SELECT id FROM public.users WHERE gh_username = %s LIMIT 1;",
+)
+_PROJECT_BY_REPO_URL = prepared_statement(
+    "project_by_repo_url",
+    "SELECT id FROM public.projects WHERE %s = ANY(gh_repo_url) LIMIT 1;",
+)
+_BUCKET_BY_STATE = prepared_statement(
+    "bucket_by_state",
+    "SELECT id FROM public.buckets WHERE project_id = %s AND state = %s ORDER BY order_idx ASC LIMIT 1;",
+)
+_TASK_BY_BRANCH = prepared_statement(
+    "task_by_branch",
+    "SELECT id, title, type, weight FROM public.tasks WHERE project_id = %s AND branch_name = %s LIMIT 1;",
+)
+_TASK_WEIGHT_BY_ID = prepared_statement(
+    "task_weight_by_id",
+    "SELECT id, project_id, weight FROM public.tasks WHERE id = %s LIMIT 1;",
+)
+
+# Backs the title anti-join below. Not unique: meeting imports and approved
+# alerts may legitimately create tasks sharing a title.
+register_schema("""
+    CREATE INDEX IF NOT EXISTS tasks_project_title_idx ON public.tasks (project_id, title);
+""")
+# Last synced blob (git's content hash) and checked items of each spec tasks.md
+register_schema("""
+    CREATE TABLE IF NOT EXISTS public.spec_file_digests (
+        project_id BIGINT NOT NULL,
+        path TEXT NOT NULL,
+        blob_sha TEXT NOT NULL,
+        checked_titles TEXT[] NOT NULL DEFAULT '{}',
+        updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+        PRIMARY KEY (project_id, path)
+    );
+""")
+
+# One row per merge or review already credited, so a replayed event never scores twice
+register_schema("""
+    CREATE TABLE IF NOT EXISTS public.kpi_credits (
+        credit_key TEXT PRIMARY KEY,
+        created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+    );
+""")
+
+# Inserts every spec title the project does not have yet, in one statement
+_INSERT_SPEC_TASKS = (
+    "INSERT INTO public.tasks (id, project_id, bucket_id, lead_assignee_id, title, type, weight) "
+    "SELECT new.id, %s, %s, %s, new.title, 'CODE', 1 "
+    "FROM unnest(%s::bigint[], %s::text[]) AS new(id, title) "
+    "WHERE NOT EXISTS (SELECT 1 FROM public.tasks t WHERE t.project_id = %s AND t.title = new.title);"
+)
+_UPSERT_SPEC_DIGEST = (
+    "INSERT INTO public.spec_file_digests (project_id, path, blob_sha, checked_titles) VALUES (%s, %s, %s, %s) "
+    "ON CONFLICT (project_id, path) DO UPDATE SET blob_sha = EXCLUDED.blob_sha, "
+    "checked_titles = EXCLUDED.checked_titles, updated_at = NOW();"
+)
+
 async def process_github_event(payload: dict, event: str, pool=None):
     action = payload.get("action", "")
 
+    # The queue runs events for one repository one at a time and in order
     if event == "pull_request":
-        if action == "opened":
+        if action == "synchronize":
+            await on_pr_synchronize(payload, pool)
+        elif action == "opened":
             await on_pr_opened(payload, pool)
         elif action == "reopened":
             await on_pr_reopened(payload, pool)
-        elif action == "synchronize":
-            await on_pr_synchronize(payload, pool)
         elif action == "closed":
             await on_pr_closed(payload, pool)
             
@@ -27,6 +93,148 @@ async def process_github_event(payload: dict, event: str, pool=None):
         if action == "submitted":
             await on_pr_review_submitted(payload, pool)
 
+def _store_spec_tasks(repo_full_name: str, repo_url: str, pr_author_gh, snapshot: SpecSnapshot) -> tuple[int, int]:
+    """
+    Create the project and DRAFT bucket if missing, then apply the tasks.md
+    files that changed since the last sync: insert unseen titles and move
+    tasks whose checkbox flipped. Returns (tasks created, tasks moved).
+    """
+    lead_assignee_id = None
+    with db_cursor(commit=True) as cur:
+        # Look up lead_assignee_id by gh_username
+        if pr_author_gh:
+            execute_prepared(cur, _USER_BY_GH_USERNAME, (pr_author_gh,))
+            user_row = cur.fetchone()
+            if user_row:
+                lead_assignee_id = user_row["id"]
+
+        # Find project by repo URL
+        execute_prepared(cur, _PROJECT_BY_REPO_URL, (repo_url,))
+        project_row = cur.fetchone()
+        
+        if not project_row:
+            # Zero-Config: Create project
+            project_id = _generator.generate()
+            cur.execute(
+                "INSERT INTO public.projects (id, name, gh_repo_url) VALUES (%s, %s, %s) RETURNING id;",
+                (project_id, repo_full_name.split("/")[-1], [repo_url])
+            )
+            project_id = cur.fetchone()["id"]
+            
+            # Create default DRAFT bucket
+            bucket_id = _generator.generate()
+            cur.execute(
+                "INSERT INTO public.buckets (id, project_id, name, state, is_system_locked, order_idx) "
+                "VALUES (%s, %s, %s, %s, %s, %s) RETURNING id;",
+                (bucket_id, project_id, "AI Drafts", "DRAFT", True, 0)
+            )
+            target_bucket_id = cur.fetchone()["id"]
+            logger.info(f"Zero-Config: Created project {project_id} and DRAFT bucket for {repo_full_name}")
+        else:
+            project_id = project_row["id"]
+            # Find DRAFT bucket
+            cur.execute("SELECT id FROM public.buckets WHERE project_id = %s AND state = 'DRAFT' LIMIT 1;", (project_id,))
+            bucket_row = cur.fetchone()
+            if bucket_row:
+                target_bucket_id = bucket_row["id"]
+            else:
+                # Create if missing
+                bucket_id = _generator.generate()
+                cur.execute(
+                    "INSERT INTO public.buckets (id, project_id, name, state, is_system_locked, order_idx) "
+                    "VALUES (%s, %s, %s, %s, %s, %s) RETURNING id;",
+                    (bucket_id, project_id, "AI Drafts", "DRAFT", True, 0)
+                )
+                target_bucket_id = cur.fetchone()["id"]
+
+        # Serializes syncs of one project across API instances, so a title is
+        # never inserted twice and digests never go backwards
+        cur.execute("SELECT pg_advisory_xact_lock(%s);", (project_id,))
+        cur.execute(
+            "SELECT path, blob_sha, checked_titles FROM public.spec_file_digests WHERE project_id = %s;",
+            (project_id,)
+        )
+        stored = {row["path"]: row for row in cur.fetchall()}
+
+        # Only files whose blob changed since the last sync are parsed again
+        changed = [
+            path for path in snapshot.task_files()
+            if path not in stored or stored[path]["blob_sha"] != snapshot.blob_shas[path]
+        ]
+        removed = [path for path in stored if path not in snapshot.blob_shas]
+
+        titles = []
+        newly_checked, newly_unchecked = set(), set()
+        for path in changed:
+            items = snapshot.checklist(path)
+            titles.extend(title for title, _ in items)
+            was_checked = set(stored[path]["checked_titles"]) if path in stored else set()
+            newly_checked |= {title for title, checked in items if checked} - was_checked
+            newly_unchecked |= {title for title, checked in items if not checked} & was_checked
+        newly_unchecked -= newly_checked
+
+        created_count = 0
+        if titles:
+            titles = list(dict.fromkeys(titles))
+            task_ids = [_generator.generate() for _ in titles]
+            cur.execute(
+                _INSERT_SPEC_TASKS,
+                (project_id, target_bucket_id, lead_assignee_id, task_ids, titles, project_id)
+            )
+            created_count = cur.rowcount
+
+        moved_count = 0
+        if newly_checked or newly_unchecked:
+            moved_count = _apply_checkbox_flips(cur, project_id, newly_checked, newly_unchecked)
+
+        for path in changed:
+            checked_titles = [title for title, checked in snapshot.checklist(path) if checked]
+            cur.execute(_UPSERT_SPEC_DIGEST, (project_id, path, snapshot.blob_shas[path], checked_titles))
+        if removed:
+            cur.execute(
+                "DELETE FROM public.spec_file_digests WHERE project_id = %s AND path = ANY(%s);",
+                (project_id, removed)
+            )
+    return created_count, moved_count
+
+def _apply_checkbox_flips(cur, project_id: int, newly_checked: set, newly_unchecked: set) -> int:
+    """Move newly checked spec tasks to COMPLETED and unchecked ones back to ONGOING."""
+    execute_prepared(cur, _BUCKET_BY_STATE, (project_id, "COMPLETED"))
+    completed_row = cur.fetchone()
+    if not completed_row:
+        logger.error(f"Project {project_id} is missing a bucket with state 'COMPLETED'")
+        return 0
+    completed_bucket_id = completed_row["id"]
+
+    moved = 0
+    if newly_checked:
+        cur.execute(
+            "UPDATE public.tasks SET bucket_id = %s, updated_at = NOW() "
+            "WHERE project_id = %s AND title = ANY(%s) AND meeting_id IS NULL AND bucket_id IS DISTINCT FROM %s;",
+            (completed_bucket_id, project_id, list(newly_checked), completed_bucket_id)
+        )
+        moved += cur.rowcount
+    if newly_unchecked:
+        execute_prepared(cur, _BUCKET_BY_STATE, (project_id, "ONGOING"))
+        ongoing_row = cur.fetchone()
+        if ongoing_row:
+            cur.execute(
+                "UPDATE public.tasks SET bucket_id = %s, updated_at = NOW() "
+                "WHERE project_id = %s AND title = ANY(%s) AND meeting_id IS NULL AND bucket_id = %s;",
+                (ongoing_row["id"], project_id, list(newly_unchecked), completed_bucket_id)
+            )
+            moved += cur.rowcount
+    return moved
+
+def _has_spec_digests(repo_url: str) -> bool:
+    with db_cursor() as cur:
+        cur.execute(
+            "SELECT 1 FROM public.spec_file_digests d JOIN public.projects p ON p.id = d.project_id "
+            "WHERE %s = ANY(p.gh_repo_url) LIMIT 1;",
+            (repo_url,)
+        )
+        return cur.fetchone() is not None
+
 async def sync_github_tasks(payload: dict):
     """Synchronization of tasks from GitHub tasks.md files to local DB."""
     repo_full_name = payload.get("repository", {}).get("full_name")
@@ -36,214 +244,123 @@ async def sync_github_tasks(payload: dict):
     if not repo_full_name or not installation_id:
         return
 
-    try:
-        gh = get_github_client(installation_id)
-        repo = gh.get_repo(repo_full_name)
-        
-        # Get PR author to assign tasks if possible
-        pr_author_gh = payload.get("pull_request", {}).get("user", {}).get("login")
-        lead_assignee_id = None
-        
-        # 1. Sweep for tasks.md files in openspec/changes/
-        try:
-            contents = repo.get_contents("openspec/changes")
-        except:
-            logger.info(f"No openspec/changes directory found in {repo_full_name}")
+    token = await installation_token(installation_id)
+    auth_headers = {
+        "Authorization": f"token {token}",
+        "X-GitHub-Api-Version": "2022-11-28"
+    }
+    
+    # Get PR author to assign tasks if possible
+    pr_author_gh = payload.get("pull_request", {}).get("user", {}).get("login")
+
+    # Most PRs touch no spec file; once the project has been synced, skip them outright
+    pr_number = payload.get("pull_request", {}).get("number")
+    if pr_number:
+        touched = await changed_spec_files(repo_full_name, pr_number, auth_headers)
+        if touched == set() and await run_blocking(_has_spec_digests, repo_url):
+            logger.info(f"{repo_full_name}#{pr_number} changes no tasks.md; spec sync skipped")
             return
+    
+    # 1. Collect task titles from openspec/changes/*/tasks.md on the default
+    # branch (one tree request; unchanged specs are served from memory)
+    snapshot = await load_spec_snapshot(
+        repo_full_name, payload.get("repository", {}).get("default_branch"), auth_headers
+    )
+    if snapshot is None:
+        logger.info(f"No openspec/changes directory found in {repo_full_name}")
+        return
 
-        all_tasks = []
-        for item in contents:
-            if item.type == "dir":
-                try:
-                    task_files = repo.get_contents(item.path)
-                    for tf in task_files:
-                        if tf.name == "tasks.md":
-                            content = tf.decoded_content.decode("utf-8")
-                            # Simple parser for - [ ] Task Title
-                            lines = content.splitlines()
-                            for line in lines:
-                                match = re.search(r"^- \[[ xX]\] (.*)$", line)
-                                if match:
-                                    all_tasks.append(match.group(1).strip())
-                except Exception as e:
-                    logger.warning(f"Error reading tasks.md in {item.path}: {e}")
-                    continue
-        
-        if not all_tasks:
-            logger.info(f"No tasks found in openspec/changes/ for {repo_full_name}")
-            return
+    if not snapshot.task_files():
+        logger.info(f"No tasks found in openspec/changes/ for {repo_full_name}")
+        return
 
-        # 2. Sync with DB
-        conn = _get_conn()
-        cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-        try:
-            # Look up lead_assignee_id by gh_username
-            if pr_author_gh:
-                cur.execute("SELECT id FROM public.users WHERE gh_username = %s LIMIT 1;", (pr_author_gh,))
-                user_row = cur.fetchone()
-                if user_row:
-                    lead_assignee_id = user_row["id"]
-
-            # Find project by repo URL
-            cur.execute("SELECT id FROM public.projects WHERE %s = ANY(gh_repo_url) LIMIT 1;", (repo_url,))
-            project_row = cur.fetchone()
-            
-            if not project_row:
-                # Zero-Config: Create project
-                project_id = _generator.generate()
-                cur.execute(
-                    "INSERT INTO public.projects (id, name, gh_repo_url) VALUES (%s, %s, %s) RETURNING id;",
-                    (project_id, repo_full_name.split("/")[-1], [repo_url])
-                )
-                project_id = cur.fetchone()["id"]
-                
-                # Create default DRAFT bucket
-                bucket_id = _generator.generate()
-                cur.execute(
-                    "INSERT INTO public.buckets (id, project_id, name, state, is_system_locked, order_idx) "
-                    "VALUES (%s, %s, %s, %s, %s, %s) RETURNING id;",
-                    (bucket_id, project_id, "AI Drafts", "DRAFT", True, 0)
-                )
-                target_bucket_id = cur.fetchone()["id"]
-                logger.info(f"Zero-Config: Created project {project_id} and DRAFT bucket for {repo_full_name}")
-            else:
-                project_id = project_row["id"]
-                # Find DRAFT bucket
-                cur.execute("SELECT id FROM public.buckets WHERE project_id = %s AND state = 'DRAFT' LIMIT 1;", (project_id,))
-                bucket_row = cur.fetchone()
-                if bucket_row:
-                    target_bucket_id = bucket_row["id"]
-                else:
-                    # Create if missing
-                    bucket_id = _generator.generate()
-                    cur.execute(
-                        "INSERT INTO public.buckets (id, project_id, name, state, is_system_locked, order_idx) "
-                        "VALUES (%s, %s, %s, %s, %s, %s) RETURNING id;",
-                        (bucket_id, project_id, "AI Drafts", "DRAFT", True, 0)
-                    )
-                    target_bucket_id = cur.fetchone()["id"]
-
-            # Upsert tasks
-            created_count = 0
-            for task_title in all_tasks:
-                # Check if task already exists
-                cur.execute("SELECT id FROM public.tasks WHERE project_id = %s AND title = %s LIMIT 1;", (project_id, task_title))
-                if cur.fetchone():
-                    continue
-                
-                # Insert new task
-                task_id = _generator.generate()
-                cur.execute(
-                    "INSERT INTO public.tasks (id, project_id, bucket_id, lead_assignee_id, title, type, weight) VALUES (%s, %s, %s, %s, %s, 'CODE', 1);",
-                    (task_id, project_id, target_bucket_id, lead_assignee_id, task_title)
-                )
-                created_count += 1
-            
-            conn.commit()
-            if created_count > 0:
-                logger.info(f"Successfully synced {created_count} new tasks for {repo_full_name}")
-        except Exception as e:
-            conn.rollback()
-            logger.error(f"Error syncing tasks to DB for {repo_full_name}: {e}")
-        finally:
-            cur.close()
-            _put_conn(conn)
-            
-    except Exception as e:
-        logger.error(f"Error fetching tasks from GitHub for {repo_full_name}: {e}")
+    # 2. Sync with DB (psycopg2 blocks, so off the event loop)
+    created_count, moved_count = await run_blocking(
+        _store_spec_tasks, repo_full_name, repo_url, pr_author_gh, snapshot
+    )
+    if created_count > 0 or moved_count > 0:
+        logger.info(f"Successfully synced {created_count} new and {moved_count} moved tasks for {repo_full_name}")
 
-async def on_pr_opened(payload: dict, pool=None):
-    # 1. AI Evaluation
+# Each step runs at most once per queued event: a retry after a later step
+# failed skips what already succeeded (KPI credits, posted reviews, activity)
+
+async def _evaluate_pr(payload: dict):
     from services.pr_evaluator import process_pr_evaluation
     pr = payload.get("pull_request", {})
     repo = payload.get("repository", {})
     installation_id = payload.get("installation", {}).get("id")
     if all([pr.get("number"), repo.get("full_name"), installation_id]):
-        await process_pr_evaluation(repo["full_name"], pr["number"], installation_id)
+        await process_pr_evaluation(
+            repo["full_name"], pr["number"], installation_id, repo.get("default_branch"), pr.get("head", {}).get("sha")
+        )
+
+async def on_pr_opened(payload: dict, pool=None):
+    # 1. AI Evaluation
+    await event_step("evaluate", lambda: _evaluate_pr(payload))
     
     # 2. Task Synchronization (Placeholder)
-    await sync_github_tasks(payload)
+    await event_step("sync_tasks", lambda: sync_github_tasks(payload))
     
     # 3. Legacy State Management
-    await handle_pr_opened(payload)
+    await event_step("move_task", lambda: handle_pr_opened(payload))
 
 async def on_pr_reopened(payload: dict, pool=None):
     # Similar to opened
-    from services.pr_evaluator import process_pr_evaluation
-    pr = payload.get("pull_request", {})
-    repo = payload.get("repository", {})
-    installation_id = payload.get("installation", {}).get("id")
-    if all([pr.get("number"), repo.get("full_name"), installation_id]):
-        await process_pr_evaluation(repo["full_name"], pr["number"], installation_id)
-        
-    await sync_github_tasks(payload)
-    await handle_pr_opened(payload)
+    await event_step("evaluate", lambda: _evaluate_pr(payload))
+    await event_step("sync_tasks", lambda: sync_github_tasks(payload))
+    await event_step("move_task", lambda: handle_pr_opened(payload))
 
 async def on_pr_synchronize(payload: dict, pool=None):
-    from services.pr_evaluator import process_pr_evaluation
-    pr = payload.get("pull_request", {})
-    repo = payload.get("repository", {})
-    installation_id = payload.get("installation", {}).get("id")
-    if all([pr.get("number"), repo.get("full_name"), installation_id]):
-        await process_pr_evaluation(repo["full_name"], pr["number"], installation_id)
-        
-    await sync_github_tasks(payload)
+    # Already debounced by the queue: only the last push of a burst gets here
+    await event_step("evaluate", lambda: _evaluate_pr(payload))
+    await event_step("sync_tasks", lambda: sync_github_tasks(payload))
 
 async def on_pr_closed(payload: dict, pool=None):
     # 1. KPI and Scoring
-    await process_kpi_score(payload, pool)
+    await event_step("kpi", lambda: process_kpi_score(payload, pool))
     
     # 2. Task Synchronization (Placeholder)
-    await sync_github_tasks(payload)
+    await event_step("sync_tasks", lambda: sync_github_tasks(payload))
     
     # 3. Legacy State Management
-    await handle_pr_closed(payload)
+    await event_step("move_task", lambda: handle_pr_closed(payload))
 
 async def on_pr_review_submitted(payload: dict, pool=None):
     # 1. KPI and Scoring for approvals
-    await process_review_kpi(payload, pool)
+    await event_step("kpi", lambda: process_review_kpi(payload, pool))
     
     # 2. Legacy State Management
-    await handle_pr_review_submitted(payload)
-
-
-async def process_kpi_score(payload: dict, pool=None):
-    # Completion Event (Merge): lead_assignee_id receives W * 1.0
-    pr = payload.get("pull_request", {})
-    if not pr.get("merged"):
-        return
-
-    branch_name = pr.get("head", {}).get("ref", "")
-    
-    task_match = re.search(r"^.*?(\d+)-.*$", branch_name)
-    if not task_match:
-        task_match = re.search(r"(\d+)", branch_name)
-        
-    if not task_match:
-        logger.info("KPI score (completion) not updated: couldn't find task ID in branch")
-        return
-        
-    task_id = int(task_match.group(1))
-    
-    conn = _get_conn()
-    cur = None
-    try:
-        cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-        cur.execute("BEGIN;")
-        
+    await event_step("move_task", lambda: handle_pr_review_submitted(payload))
+
+
+def _claim_kpi_credit(cur, credit_key: Optional[str]) -> bool:
+    """Whether `credit_key` is credited for the first time (in the caller's transaction)."""
+    if credit_key is None:
+        return True
+    cur.execute("INSERT INTO public.kpi_credits (credit_key) VALUES (%s) ON CONFLICT DO NOTHING;", (credit_key,))
+    return cur.rowcount == 1
+
+def _apply_merge_kpi(task_id: int, credit_key: Optional[str]):
+    """
+    Credit the lead assignee and move the task to COMPLETED; returns
+    (lead_assignee_id, delta) or None. A merge already credited under
+    `credit_key` is not credited again.
+    """
+    with db_cursor(commit=True) as cur:
         cur.execute("SELECT id, project_id, weight, lead_assignee_id FROM public.tasks WHERE id = %s LIMIT 1;", (task_id,))
         task_row = cur.fetchone()
         if not task_row:
-            logger.info(f"Task {task_id} not found in DB.")
-            cur.execute("ROLLBACK;")
-            return
+            return None
             
         project_id = task_row["project_id"]
         weight = task_row["weight"] or 0
         lead_assignee_id = task_row["lead_assignee_id"]
+        score_delta = weight * 1.0
         
-        if lead_assignee_id:
-            score_delta = weight * 1.0
+        if lead_assignee_id and not _claim_kpi_credit(cur, credit_key):
+            logger.info(f"Merge KPI for task {task_id} was already credited ({credit_key})")
+            score_delta = 0.0
+        elif lead_assignee_id:
             cur.execute(
                 "UPDATE public.project_member "
                 "SET kpi_score = kpi_score + %s "
@@ -260,69 +377,63 @@ async def process_kpi_score(payload: dict, pool=None):
                 "UPDATE public.tasks SET bucket_id = %s, updated_at = NOW() WHERE id = %s;",
                 (completed_bucket_id, task_id)
             )
-            
-        cur.execute("COMMIT;")
-        if lead_assignee_id:
-            logger.info(f"Successfully processed merge KPI for task {task_id}, assignee {lead_assignee_id}, delta {score_delta}")
-        
-    except Exception as e:
-        if cur:
-            cur.execute("ROLLBACK;")
-        logger.error(f"Error processing KPI atomic update: {e}")
-    finally:
-        if cur:
-            cur.close()
-        _put_conn(conn)
+    return lead_assignee_id, score_delta
 
 
-async def process_review_kpi(payload: dict, pool=None):
-    # Review Event (Approval): Reviewer receives W * 0.2
-    review = payload.get("review", {})
-    if review.get("state") != "approved":
+async def process_kpi_score(payload: dict, pool=None):
+    # Completion Event (Merge): lead_assignee_id receives W * 1.0
+    pr = payload.get("pull_request", {})
+    if not pr.get("merged"):
         return
 
-    pr = payload.get("pull_request", {})
     branch_name = pr.get("head", {}).get("ref", "")
-    author_username = pr.get("user", {}).get("login")
-    reviewer_username = review.get("user", {}).get("login")
     
-    if not reviewer_username or reviewer_username == author_username:
-        logger.info("KPI score not updated: reviewer is author or missing")
-        return
-
     task_match = re.search(r"^.*?(\d+)-.*$", branch_name)
     if not task_match:
         task_match = re.search(r"(\d+)", branch_name)
         
     if not task_match:
+        logger.info("KPI score (completion) not updated: couldn't find task ID in branch")
         return
         
     task_id = int(task_match.group(1))
     
-    conn = _get_conn()
-    cur = None
-    try:
-        cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-        cur.execute("BEGIN;")
-        
-        cur.execute("SELECT id FROM public.users WHERE gh_username = %s LIMIT 1;", (reviewer_username,))
+    # The PR id makes a replayed merge event a no-op
+    credit_key = f"merge:{pr['id']}" if pr.get("id") else None
+    result = await run_blocking(_apply_merge_kpi, task_id, credit_key)
+    if result is None:
+        logger.info(f"Task {task_id} not found in DB.")
+        return
+    lead_assignee_id, score_delta = result
+    if lead_assignee_id:
+        logger.info(f"Successfully processed merge KPI for task {task_id}, assignee {lead_assignee_id}, delta {score_delta}")
+
+
+def _apply_review_kpi(task_id: int, reviewer_username: str, credit_key: Optional[str]):
+    """
+    Credit the reviewer a fifth of the task weight; returns the delta, or None
+    if nothing was credited (including a review already credited under `credit_key`).
+    """
+    with db_cursor(commit=True) as cur:
+        execute_prepared(cur, _USER_BY_GH_USERNAME, (reviewer_username,))
         reviewer_row = cur.fetchone()
         if not reviewer_row:
             logger.info(f"Reviewer {reviewer_username} not found in DB.")
-            cur.execute("ROLLBACK;")
-            return
+            return None
             
         reviewer_id = reviewer_row["id"]
         
-        cur.execute("SELECT id, project_id, weight FROM public.tasks WHERE id = %s LIMIT 1;", (task_id,))
+        execute_prepared(cur, _TASK_WEIGHT_BY_ID, (task_id,))
         task_row = cur.fetchone()
         if not task_row:
-            cur.execute("ROLLBACK;")
-            return
+            return None
             
         project_id = task_row["project_id"]
         weight = task_row["weight"] or 0
         score_delta = weight * 0.2
+        if not _claim_kpi_credit(cur, credit_key):
+            logger.info(f"Review KPI for task {task_id} was already credited ({credit_key})")
+            return None
         
         cur.execute(
             "UPDATE public.project_member "
@@ -330,61 +441,62 @@ async def process_review_kpi(payload: dict, pool=None):
             "WHERE user_id = %s AND project_id = %s;",
             (score_delta, reviewer_id, project_id)
         )
-            
-        cur.execute("COMMIT;")
-        logger.info(f"Successfully processed review KPI for task {task_id}, reviewer {reviewer_username}, delta {score_delta}")
-        
-    except Exception as e:
-        if cur:
-            cur.execute("ROLLBACK;")
-        logger.error(f"Error processing review KPI update: {e}")
-    finally:
-        if cur:
-            cur.close()
-        _put_conn(conn)
+    return score_delta
+
+
+async def process_review_kpi(payload: dict, pool=None):
+    # Review Event (Approval): Reviewer receives W * 0.2
+    review = payload.get("review", {})
+    if review.get("state") != "approved":
+        return
+
+    pr = payload.get("pull_request", {})
+    branch_name = pr.get("head", {}).get("ref", "")
+    author_username = pr.get("user", {}).get("login")
+    reviewer_username = review.get("user", {}).get("login")
+    
+    if not reviewer_username or reviewer_username == author_username:
+        logger.info("KPI score not updated: reviewer is author or missing")
+        return
 
+    task_match = re.search(r"^.*?(\d+)-.*$", branch_name)
+    if not task_match:
+        task_match = re.search(r"(\d+)", branch_name)
+        
+    if not task_match:
+        return
+        
+    task_id = int(task_match.group(1))
+    
+    # The review id makes a replayed review event a no-op
+    credit_key = f"review:{review['id']}" if review.get("id") else None
+    score_delta = await run_blocking(_apply_review_kpi, task_id, reviewer_username, credit_key)
+    if score_delta is None:
+        return
+    logger.info(f"Successfully processed review KPI for task {task_id}, reviewer {reviewer_username}, delta {score_delta}")
 
 
 def find_project_bucket_by_state(repo_url: str, target_state: str):
-    conn = _get_conn()
-    cur = None
-    try:
-        cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-        cur.execute(
-            "SELECT id FROM public.projects WHERE %s = ANY(gh_repo_url) LIMIT 1;",
-            (repo_url,)
-        )
+    with db_cursor() as cur:
+        execute_prepared(cur, _PROJECT_BY_REPO_URL, (repo_url,))
         project_row = cur.fetchone()
         if not project_row: return None
         
         # The Magic Query
-        cur.execute(
-            "SELECT id FROM public.buckets WHERE project_id = %s AND state = %s ORDER BY order_idx ASC LIMIT 1;", 
-            (project_row["id"], target_state)
-        )
+        execute_prepared(cur, _BUCKET_BY_STATE, (project_row["id"], target_state))
         bucket_row = cur.fetchone()
         
         bucket_id = bucket_row["id"] if bucket_row else None
         return project_row["id"], bucket_id
-    finally:
-        if cur is not None:
-            cur.close()
-        _put_conn(conn)
 
 def find_task_by_branch(project_id: int, branch_name: str):
-    conn = _get_conn()
-    cur = None
-    try:
-        cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-        cur.execute(
-            "SELECT id, title, type, weight FROM public.tasks WHERE project_id = %s AND branch_name = %s LIMIT 1;",
-            (project_id, branch_name)
-        )
+    with db_cursor() as cur:
+        execute_prepared(cur, _TASK_BY_BRANCH, (project_id, branch_name))
         return cur.fetchone()
-    finally:
-        if cur is not None:
-            cur.close()
-        _put_conn(conn)
+
+def _move_task(task: dict, bucket_id: int, activity: DatabaseActivity):
+    db_update_task(task["id"], DatabaseTask(bucket_id=bucket_id, title=task.get("title", ""), type=task.get("type", "CODE"), weight=task.get("weight", 0)), BackgroundTasks())
+    db_create_activity(activity)
 
 async def handle_pr_closed(payload: dict):
     pr = payload.get("pull_request", {})
@@ -398,30 +510,24 @@ async def handle_pr_closed(payload: dict):
     is_merged = pr.get("merged", False)
     target_state = 'COMPLETED' if is_merged else 'ONGOING'
 
-    project_data = find_project_bucket_by_state(repo_url, target_state)
+    project_data = await run_blocking(find_project_bucket_by_state, repo_url, target_state)
     if not project_data: return
     project_id, target_bucket_id = project_data
 
-    task = find_task_by_branch(project_id, branch_name)
+    task = await run_blocking(find_task_by_branch, project_id, branch_name)
     if not task: return
     
     if not target_bucket_id:
         logger.error(f"Project {project_id} is missing a bucket with state '{target_state}'")
         return
 
-    try:
-        db_update_task(task["id"], DatabaseTask(bucket_id=target_bucket_id, title=task.get("title", ""), type=task.get("type", "CODE"), weight=task.get("weight", 0)), BackgroundTasks()) 
-        logger.info(f"Moved task {task['id']} to bucket {target_bucket_id}.")
-        
-        action_msg = "merged" if is_merged else "closed without merging"
-        db_create_activity(DatabaseActivity(
-            project_id=project_id,
-            user_name=gh_username,
-            action=action_msg,
-            target=f"PR for {branch_name}"
-        ))
-    except Exception as e:
-        logger.error(f"Failed to move task {task['id']}: {e}")
+    await run_blocking(_move_task, task, target_bucket_id, DatabaseActivity(
+        project_id=project_id,
+        user_name=gh_username,
+        action="merged" if is_merged else "closed without merging",
+        target=f"PR for {branch_name}"
+    ))
+    logger.info(f"Moved task {task['id']} to bucket {target_bucket_id}.")
 
 async def handle_pr_opened(payload: dict):
     pr = payload.get("pull_request", {})
@@ -432,7 +538,7 @@ async def handle_pr_opened(payload: dict):
     if not repo_url or not branch_name:
         return
 
-    project_data = find_project_bucket_by_state(repo_url, "ON_REVIEW")
+    project_data = await run_blocking(find_project_bucket_by_state, repo_url, "ON_REVIEW")
     if not project_data: return
     project_id, target_bucket_id = project_data
     
@@ -440,21 +546,17 @@ async def handle_pr_opened(payload: dict):
         logger.error(f"Project {project_id} is missing a bucket with state 'ON_REVIEW'")
         return
 
-    task = find_task_by_branch(project_id, branch_name)
+    task = await run_blocking(find_task_by_branch, project_id, branch_name)
     if not task:
         return
 
-    try:
-        db_update_task(task["id"], DatabaseTask(bucket_id=target_bucket_id, title=task.get("title", ""), type=task.get("type", "CODE"), weight=task.get("weight", 0)), BackgroundTasks())
-        logger.info(f"Moved task {task['id']} to bucket {target_bucket_id}.")
-        db_create_activity(DatabaseActivity(
-            project_id=project_id,
-            user_name=gh_username,
-            action="opened",
-            target=f"PR for {branch_name}"
-        ))
-    except Exception as e:
-        logger.error(f"Failed to move task {task['id']}: {e}")
+    await run_blocking(_move_task, task, target_bucket_id, DatabaseActivity(
+        project_id=project_id,
+        user_name=gh_username,
+        action="opened",
+        target=f"PR for {branch_name}"
+    ))
+    logger.info(f"Moved task {task['id']} to bucket {target_bucket_id}.")
 
 async def handle_pr_review_submitted(payload: dict):
     review = payload.get("review", {})
@@ -471,7 +573,7 @@ async def handle_pr_review_submitted(payload: dict):
     if not repo_url or not branch_name:
         return
 
-    project_data = find_project_bucket_by_state(repo_url, "ONGOING")
+    project_data = await run_blocking(find_project_bucket_by_state, repo_url, "ONGOING")
     if not project_data: return
     project_id, target_bucket_id = project_data
     
@@ -479,18 +581,14 @@ async def handle_pr_review_submitted(payload: dict):
         logger.error(f"Project {project_id} is missing a bucket with state 'ONGOING'")
         return
 
-    task = find_task_by_branch(project_id, branch_name)
+    task = await run_blocking(find_task_by_branch, project_id, branch_name)
     if not task:
         return
 
-    try:
-        db_update_task(task["id"], DatabaseTask(bucket_id=target_bucket_id, title=task.get("title", ""), type=task.get("type", "CODE"), weight=task.get("weight", 0)), BackgroundTasks())
-        logger.info(f"Moved task {task['id']} to bucket {target_bucket_id}.")
-        db_create_activity(DatabaseActivity(
-            project_id=project_id,
-            user_name=gh_username,
-            action="requested changes on",
-            target=f"PR for {branch_name}"
-        ))
-    except Exception as e:
-        logger.error(f"Failed to move task {task['id']}: {e}")
+    await run_blocking(_move_task, task, target_bucket_id, DatabaseActivity(
+        project_id=project_id,
+        user_name=gh_username,
+        action="requested changes on",
+        target=f"PR for {branch_name}"
+    ))
+    logger.info(f"Moved task {task['id']} to bucket {target_bucket_id}.")
@@ -0,0 +1,428 @@
+import asyncio
+import contextvars
+import logging
+import random
+from typing import Awaitable, Callable, Optional
+
+from cachetools import TTLCache
+from prometheus_client import Counter, Gauge
+from psycopg.types.json import Jsonb
+
+from config import settings
+from services.database.database import async_db_cursor, register_schema
+from services.database.id_generator import _generator
+
+logger = logging.getLogger("uvicorn.error")
+
+# pending -> processing -> done
+#                       -> pending (retry, after backoff)
+#                       -> dead    (attempts exhausted)
+# pending -> superseded (a newer push to the same PR arrived while it waited)
+register_schema("""
+    CREATE TABLE IF NOT EXISTS public.webhook_events (
+        id BIGINT PRIMARY KEY,
+        event TEXT NOT NULL,
+        delivery_id TEXT,
+        repo_full_name TEXT,
+        payload JSONB NOT NULL,
+        status TEXT NOT NULL DEFAULT 'pending',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        last_error TEXT,
+        available_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+        locked_at TIMESTAMPTZ,
+        created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+        updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+    );
+""")
+register_schema("""
+    CREATE INDEX IF NOT EXISTS webhook_events_ready_idx
+        ON public.webhook_events (available_at, id)
+        WHERE status IN ('pending', 'processing');
+""")
+# "owner/repo#number" on debounced pull_request.synchronize events, see `_debounce_key`
+register_schema("""
+    ALTER TABLE public.webhook_events ADD COLUMN IF NOT EXISTS coalesce_key TEXT;
+""")
+register_schema("""
+    CREATE INDEX IF NOT EXISTS webhook_events_coalesce_key_idx
+        ON public.webhook_events (coalesce_key)
+        WHERE status = 'pending';
+""")
+# Handler steps that already succeeded, skipped when the event is retried; see `event_step`
+register_schema("""
+    ALTER TABLE public.webhook_events ADD COLUMN IF NOT EXISTS completed_steps TEXT[] NOT NULL DEFAULT '{}';
+""")
+# Backs the per-repository check in `_claim_next` and the depth gauge
+register_schema("""
+    CREATE INDEX IF NOT EXISTS webhook_events_active_repo_idx
+        ON public.webhook_events (repo_full_name, id)
+        WHERE status IN ('pending', 'processing');
+""")
+# GitHub reuses the X-GitHub-Delivery GUID for retries and manual redeliveries
+register_schema("""
+    CREATE UNIQUE INDEX IF NOT EXISTS webhook_events_delivery_id_key
+        ON public.webhook_events (delivery_id)
+        WHERE delivery_id IS NOT NULL;
+""")
+
+WEBHOOK_EVENTS = Counter(
+    "webhook_events_total",
+    "Webhook events handled by the queue workers, by outcome (done, retried, dead).",
+    ["event", "outcome"],
+)
+PR_RUNS_COALESCED = Counter(
+    "pr_runs_coalesced_total",
+    "PR runs skipped because a newer push arrived within the debounce window.",
+)
+WEBHOOK_REPO_DEPTH = Gauge(
+    "webhook_repo_queue_depth",
+    "Queued webhook events per repository, by status (pending, processing).",
+    ["repo", "status"],
+)
+WEBHOOK_DUPLICATES = Counter(
+    "webhook_duplicate_deliveries_total",
+    "Deliveries acknowledged without work because their GUID was already seen.",
+    ["source"],
+)
+
+# Events `process_github_event` acts on; everything else is acknowledged and dropped
+HANDLED_EVENTS = {"pull_request", "pull_request_review"}
+
+
+# Delivery GUIDs this process has already queued, so hot duplicates skip the
+# database entirely; the unique index is the source of truth across processes.
+_recent_deliveries: TTLCache = TTLCache(
+    maxsize=settings.webhook_dedup_cache_size,
+    ttl=settings.webhook_dedup_ttl_hours * 3600,
+)
+
+
+def _debounce_key(event: str, payload: dict) -> Optional[str]:
+    """Pushes to one PR within the debounce window collapse into the last one."""
+    if event != "pull_request" or payload.get("action") != "synchronize":
+        return None
+    repo = payload.get("repository", {}).get("full_name")
+    number = payload.get("pull_request", {}).get("number")
+    return f"{repo}#{number}" if repo and number else None
+
+
+async def enqueue_webhook_event(event: str, payload: dict, delivery_id: Optional[str] = None) -> Optional[int]:
+    """
+    Persist a verified webhook delivery; a queue worker picks it up.
+    Returns None when `delivery_id` was already queued (a duplicate). A
+    redelivery of a dead-lettered event is queued again instead.
+
+    A PR push waits out `pr_synchronize_debounce_seconds` in the table and
+    supersedes any push to the same PR still waiting, so a burst of pushes is
+    evaluated once, at its last head, without holding a worker meanwhile.
+    """
+    coalesce_key = _debounce_key(event, payload)
+    delay = settings.pr_synchronize_debounce_seconds if coalesce_key else 0
+    if delivery_id and delivery_id in _recent_deliveries:
+        WEBHOOK_DUPLICATES.labels("memory").inc()
+        return None
+
+    async with async_db_cursor(commit=True) as cur:
+        await cur.execute(
+            "INSERT INTO public.webhook_events (id, event, delivery_id, repo_full_name, payload, coalesce_key, available_at) "
+            "VALUES (%s, %s, %s, %s, %s, %s, NOW() + make_interval(secs => %s)) "
+            "ON CONFLICT (delivery_id) WHERE delivery_id IS NOT NULL DO UPDATE "
+            "SET status = 'pending', attempts = 0, last_error = NULL, available_at = NOW(), updated_at = NOW() "
+            "WHERE public.webhook_events.status = 'dead' "
+            "RETURNING id;",
+            (
+                _generator.generate(), event, delivery_id, payload.get("repository", {}).get("full_name"),
+                Jsonb(payload), coalesce_key, delay,
+            ),
+        )
+        row = await cur.fetchone()
+        if row is not None and coalesce_key:
+            await cur.execute(
+                "UPDATE public.webhook_events SET status = 'superseded', updated_at = NOW() "
+                "WHERE coalesce_key = %s AND status = 'pending' AND id <> %s;",
+                (coalesce_key, row["id"]),
+            )
+            PR_RUNS_COALESCED.inc(cur.rowcount)
+
+    if delivery_id:
+        _recent_deliveries[delivery_id] = True
+    if row is None:
+        WEBHOOK_DUPLICATES.labels("database").inc()
+        return None
+    if not delay:
+        _wakeup.set()
+    return row["id"]
+
+
+async def purge_expired_events() -> int:
+    """Delete finished and superseded events older than the dedup window; dead-lettered rows are kept."""
+    async with async_db_cursor(commit=True) as cur:
+        await cur.execute(
+            "DELETE FROM public.webhook_events "
+            "WHERE status IN ('done', 'superseded') AND updated_at < NOW() - make_interval(hours => %s);",
+            (settings.webhook_dedup_ttl_hours,),
+        )
+        return cur.rowcount
+
+
+# Any constant shared by all API instances; serializes claims, see `_claim_next`
+_CLAIM_LOCK_KEY = 0x5EB400C
+
+
+async def _claim_next() -> Optional[dict]:
+    """
+    Claim the oldest ready event among those first in line for their
+    repository: an event waits while an older event of its repository is
+    still pending (even one held back by a retry backoff or the debounce) or
+    processing, or while any other one is in progress. Events for one
+    repository therefore run one at a time and in arrival order, while a busy
+    repository never holds up the others. Rows stuck in `processing` past the
+    visibility timeout belong to a worker that died mid-event; they are
+    claimed again like pending rows.
+    """
+    async with async_db_cursor(commit=True) as cur:
+        # Claims are short; taking them one at a time (across all instances) means
+        # the claim below sees every event another worker has just started
+        await cur.execute("SELECT pg_advisory_xact_lock(%s);", (_CLAIM_LOCK_KEY,))
+        await cur.execute(
+            "UPDATE public.webhook_events "
+            "SET status = 'processing', locked_at = NOW(), attempts = attempts + 1, updated_at = NOW() "
+            "WHERE id = ("
+            "  SELECT e.id FROM public.webhook_events e "
+            "  WHERE ((e.status = 'pending' AND e.available_at <= NOW()) "
+            "     OR (e.status = 'processing' AND e.locked_at < NOW() - make_interval(secs => %s))) "
+            "    AND (e.repo_full_name IS NULL OR NOT EXISTS ("
+            "      SELECT 1 FROM public.webhook_events ahead "
+            "      WHERE ahead.repo_full_name = e.repo_full_name AND ahead.id <> e.id "
+            "        AND ahead.status IN ('pending', 'processing') "
+            "        AND (ahead.id < e.id OR (ahead.status = 'processing' "
+            "             AND ahead.locked_at >= NOW() - make_interval(secs => %s)))"
+            "    )) "
+            "  ORDER BY e.available_at, e.id "
+            "  LIMIT 1 FOR UPDATE SKIP LOCKED"
+            ") "
+            "RETURNING id, event, delivery_id, payload, attempts, completed_steps;",
+            (settings.webhook_visibility_timeout_seconds, settings.webhook_visibility_timeout_seconds),
+        )
+        return await cur.fetchone()
+
+
+async def _record_step(event_id: int, step: str):
+    async with async_db_cursor(commit=True) as cur:
+        await cur.execute(
+            "UPDATE public.webhook_events SET completed_steps = array_append(completed_steps, %s), updated_at = NOW() "
+            "WHERE id = %s AND NOT (%s = ANY(completed_steps));",
+            (step, event_id, step),
+        )
+
+
+async def _heartbeat(event_id: int):
+    """Keep a long-running event's claim fresh so it is not reclaimed after the visibility timeout."""
+    while True:
+        await asyncio.sleep(settings.webhook_visibility_timeout_seconds / 3)
+        try:
+            async with async_db_cursor(commit=True) as cur:
+                await cur.execute(
+                    "UPDATE public.webhook_events SET locked_at = NOW() WHERE id = %s AND status = 'processing';",
+                    (event_id,),
+                )
+        except Exception as e:
+            logger.warning(f"Heartbeat for webhook event {event_id} failed: {e}")
+
+
+async def _mark_done(event_id: int):
+    async with async_db_cursor(commit=True) as cur:
+        await cur.execute(
+            "UPDATE public.webhook_events SET status = 'done', last_error = NULL, updated_at = NOW() WHERE id = %s;",
+            (event_id,),
+        )
+
+
+async def _mark_failed(event_id: int, attempts: int, error: str) -> bool:
+    """Schedule a retry with exponential backoff, or dead-letter the event. Returns True when dead."""
+    dead = attempts >= settings.webhook_max_attempts
+    delay = min(
+        settings.webhook_retry_base_seconds * (2 ** (attempts - 1)),
+        settings.webhook_retry_max_seconds,
+    )
+    delay *= random.uniform(0.8, 1.2)
+    async with async_db_cursor(commit=True) as cur:
+        await cur.execute(
+            "UPDATE public.webhook_events "
+            "SET status = %s, last_error = %s, locked_at = NULL, "
+            "    available_at = NOW() + make_interval(secs => %s), updated_at = NOW() "
+            "WHERE id = %s;",
+            ("dead" if dead else "pending", error[:2000], 0 if dead else delay, event_id),
+        )
+    return dead
+
+
+async def _release(event_id: int):
+    """Hand an event back without counting the attempt (worker shutting down)."""
+    async with async_db_cursor(commit=True) as cur:
+        await cur.execute(
+            "UPDATE public.webhook_events "
+            "SET status = 'pending', attempts = GREATEST(attempts - 1, 0), locked_at = NULL, updated_at = NOW() "
+            "WHERE id = %s AND status = 'processing';",
+            (event_id,),
+        )
+
+
+class _EventSteps:
+    __slots__ = ("event_id", "done")
+
+    def __init__(self, event_id: int, done: list):
+        self.event_id = event_id
+        self.done = set(done or ())
+
+
+# The queued event the current handler call belongs to
+_current_event: contextvars.ContextVar[Optional[_EventSteps]] = contextvars.ContextVar("webhook_event", default=None)
+
+
+async def event_step(name: str, fn: Callable[[], Awaitable[None]]):
+    """
+    Run one side-effecting step of the event being handled. Once it succeeds it
+    is recorded on the row, and a retry of the event (after a later step
+    failed) skips it. Outside a queue worker the step simply runs.
+    """
+    steps = _current_event.get()
+    if steps is None:
+        await fn()
+        return
+    if name in steps.done:
+        logger.info(f"Webhook event {steps.event_id}: step {name} already done, skipping")
+        return
+    await fn()
+    await _record_step(steps.event_id, name)
+    steps.done.add(name)
+
+
+# Set by `enqueue_webhook_event` so idle workers start immediately instead of
+# waiting for the next poll.
+_wakeup = asyncio.Event()
+
+_PURGE_INTERVAL_SECONDS = 600
+_DEPTH_INTERVAL_SECONDS = 15
+
+
+async def _refresh_repo_depth(reported: set) -> set:
+    """Set `WEBHOOK_REPO_DEPTH` from the table; returns the label pairs now reported."""
+    async with async_db_cursor() as cur:
+        await cur.execute(
+            "SELECT repo_full_name, status, COUNT(*) AS depth FROM public.webhook_events "
+            "WHERE status IN ('pending', 'processing') AND repo_full_name IS NOT NULL "
+            "GROUP BY repo_full_name, status;"
+        )
+        rows = await cur.fetchall()
+    current = set()
+    for row in rows:
+        labels = (row["repo_full_name"], row["status"])
+        WEBHOOK_REPO_DEPTH.labels(*labels).set(row["depth"])
+        current.add(labels)
+    # Drained repositories drop out instead of reporting 0 forever
+    for labels in reported - current:
+        WEBHOOK_REPO_DEPTH.remove(*labels)
+    return current
+
+
+class WebhookWorkerPool:
+    """
+    Fixed set of asyncio workers draining `public.webhook_events`. Each worker
+    handles one event at a time; `workers` is the overall concurrency.
+    """
+
+    def __init__(self, handler: Callable[[dict, str], Awaitable[None]], workers: int):
+        self._handler = handler
+        self._workers = workers
+        self._tasks: list[asyncio.Task] = []
+
+    def start(self):
+        for i in range(self._workers):
+            self._tasks.append(asyncio.create_task(self._run(), name=f"webhook-worker-{i}"))
+        self._tasks.append(asyncio.create_task(self._purge_loop(), name="webhook-purge"))
+        self._tasks.append(asyncio.create_task(self._depth_loop(), name="webhook-depth"))
+        logger.info(f"Started {self._workers} webhook queue workers")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    async def _run(self):
+        while True:
+            # Cleared before claiming so an enqueue that races the claim still wakes us
+            _wakeup.clear()
+            try:
+                row = await _claim_next()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Webhook queue claim failed: {e}")
+                row = None
+
+            if row is None:
+                try:
+                    await asyncio.wait_for(_wakeup.wait(), timeout=settings.webhook_poll_interval_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self._process(row)
+
+    async def _purge_loop(self):
+        while True:
+            try:
+                purged = await purge_expired_events()
+                if purged:
+                    logger.info(f"Purged {purged} processed webhook events")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Webhook event purge failed: {e}")
+            await asyncio.sleep(_PURGE_INTERVAL_SECONDS)
+
+    async def _depth_loop(self):
+        reported: set = set()
+        while True:
+            try:
+                reported = await _refresh_repo_depth(reported)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Webhook queue depth refresh failed: {e}")
+            await asyncio.sleep(_DEPTH_INTERVAL_SECONDS)
+
+    async def _process(self, row: dict):
+        event_id, event = row["id"], row["event"]
+        token = _current_event.set(_EventSteps(event_id, row["completed_steps"]))
+        heartbeat = asyncio.create_task(_heartbeat(event_id))
+        try:
+            await self._handler(row["payload"], event)
+        except asyncio.CancelledError:
+            await asyncio.shield(_release(event_id))
+            raise
+        except Exception as e:
+            logger.error(f"Webhook event {event_id} ({event}) failed on attempt {row['attempts']}: {e}", exc_info=True)
+            try:
+                dead = await _mark_failed(event_id, row["attempts"], repr(e))
+            except Exception as db_error:
+                # The row stays in `processing` and is reclaimed after the visibility timeout
+                logger.error(f"Could not record failure of webhook event {event_id}: {db_error}")
+                return
+            WEBHOOK_EVENTS.labels(event, "dead" if dead else "retried").inc()
+            if dead:
+                # Let a manual redelivery from GitHub revive it
+                _recent_deliveries.pop(row["delivery_id"], None)
+                logger.error(f"Webhook event {event_id} ({event}) moved to dead-letter after {row['attempts']} attempts")
+            return
+        finally:
+            heartbeat.cancel()
+            _current_event.reset(token)
+
+        WEBHOOK_EVENTS.labels(event, "done").inc()
+        try:
+            await _mark_done(event_id)
+        except Exception as e:
+            logger.error(f"Could not mark webhook event {event_id} done: {e}")